@@ -192,7 +192,7 @@ class MetaForensApp:
         # 3. Chromatic Aberration Analysis
         self.results_text.insert(tk.END, "=== CHROMATIC ABERRATION ===\n")
         chromatic_analysis = analyze_chromatic_aberration(self.filepath)
-        self.results_text.insert(tk.END, f"Aberration Score: {chromatic_analysis.get('aberration_score', 0):.6f}\n")
+        self.results_text.insert(tk.END, f"Aberration Score: {chromatic_analysis.get('aberration_score', 0):.2f} px\n")
         if chromatic_analysis.get('has_chromatic_aberration'):
             self.results_text.insert(tk.END, "✓ Natural lens aberration present\n")
         if chromatic_analysis.get('is_suspicious'):
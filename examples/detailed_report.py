@@ -79,7 +79,7 @@ try:
     print("\n8. Chromatic Aberration:")
     chromatic = detailed['chromatic_analysis']
     print(f"   Has Aberration: {chromatic.get('has_chromatic_aberration', False)}")
-    print(f"   Aberration Score: {chromatic.get('aberration_score', 0):.5f}")
+    print(f"   Aberration Score: {chromatic.get('aberration_score', 0):.2f} px")
     
     # Color Analysis
     print("\n9. Color Distribution:")
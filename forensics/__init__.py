@@ -4,46 +4,79 @@ MetaForens Forensic Analysis Modules
 
 # Core forensic modules
 from .metadata_extractor import extract_metadata
-from .ela import perform_ela
+from .header_scanner import scan_metadata, read_headers, read_metadata_segments, read_exif_thumbnail
+from .generator_signatures import match_generator_signatures, register_generator_signature
+from .ela import perform_ela, analyze_ela, detect_jpeg_ghosts
 from .frequency_analysis import analyze_frequency
 from .noise_analysis import extract_noise_map
 from .jpeg_analysis import analyze_jpeg_artifacts
 from .chromatic_analysis import analyze_chromatic_aberration
-from .color_analysis import analyze_color_distribution
+from .color_analysis import analyze_color_distribution, ColorHistogram
 from .texture_analysis import analyze_texture_consistency
 
 # Advanced forensic modules
-from .gan_detection import detect_gan_fingerprint
+from .gan_detection import detect_gan_fingerprint, detect_gan_fingerprint_batch, GeneratorSpectrumLibrary
 from .noise_inconsistency import analyze_noise_inconsistency
 from .benford_analysis import benford_law_analysis
 from .cfa_detection import detect_cfa_pattern
 from .double_jpeg import detect_double_jpeg_compression
 from .gradient_analysis import analyze_gradient_anomalies
+from .quantization_tables import analyze_quantization_tables, register_encoder_signature
+from .copy_move import detect_copy_move
+from .thumbnail_analysis import analyze_thumbnail_consistency
+from .texture_descriptors import extract_texture_descriptors
+from .prnu import build_prnu_fingerprint, PRNUFingerprintLibrary
+from .noise_level_function import estimate_noise_level_function
 
 # Classifier
-from .classifier import classify_image
+from .classifier import classify_image, classify_batch, build_feature_matrix, render_result
+from .result_store import ResultStore, reclassify
 
 __all__ = [
     # Core modules
     'extract_metadata',
+    'scan_metadata',
+    'read_headers',
+    'read_metadata_segments',
+    'read_exif_thumbnail',
+    'match_generator_signatures',
+    'register_generator_signature',
     'perform_ela',
+    'analyze_ela',
+    'detect_jpeg_ghosts',
     'analyze_frequency',
     'extract_noise_map',
     'analyze_jpeg_artifacts',
     'analyze_chromatic_aberration',
     'analyze_color_distribution',
+    'ColorHistogram',
     'analyze_texture_consistency',
     
     # Advanced modules
     'detect_gan_fingerprint',
+    'detect_gan_fingerprint_batch',
+    'GeneratorSpectrumLibrary',
     'analyze_noise_inconsistency',
     'benford_law_analysis',
     'detect_cfa_pattern',
     'detect_double_jpeg_compression',
     'analyze_gradient_anomalies',
+    'analyze_quantization_tables',
+    'register_encoder_signature',
+    'detect_copy_move',
+    'analyze_thumbnail_consistency',
+    'extract_texture_descriptors',
+    'build_prnu_fingerprint',
+    'PRNUFingerprintLibrary',
+    'estimate_noise_level_function',
     
     # Classifier
-    'classify_image'
+    'classify_image',
+    'classify_batch',
+    'build_feature_matrix',
+    'render_result',
+    'ResultStore',
+    'reclassify'
 ]
 # Contains various image forensic analysis tools
 
@@ -62,5 +95,14 @@ __all__ = [
     'benford_analysis',
     'cfa_detection',
     'double_jpeg',
-    'gradient_analysis'
+    'gradient_analysis',
+    'quantization_tables',
+    'copy_move',
+    'texture_descriptors',
+    'prnu',
+    'noise_level_function',
+    'header_scanner',
+    'generator_signatures',
+    'thumbnail_analysis',
+    'result_store'
 ]
@@ -1,13 +1,160 @@
 import numpy as np
 import cv2
 
-def detect_cfa_pattern(image_path):
+# Bilinear demosaicing predictor: interpolated pixels are matched almost
+# exactly by their neighbours, sensor-native pixels are not
+CFA_PREDICTOR = np.array([[0.0, 0.25, 0.0],
+                          [0.25, 0.0, 0.25],
+                          [0.0, 0.25, 0.0]], dtype=np.float32)
+
+# Position of the red sample in each 2x2 Bayer cell -> pattern name
+BAYER_PHASES = {(0, 0): 'RGGB', (0, 1): 'GRBG', (1, 0): 'GBRG', (1, 1): 'BGGR'}
+
+# Crops and blocks whose residual periodicity falls below this carry no
+# CFA trace, so their phase is not counted
+CFA_BLOCK_THRESHOLD = 0.1
+
+# Median crop periodicity above which the image is taken to be demosaiced.
+# Bilinear-demosaiced images measure 0.09 even after JPEG quality 75, while
+# non-CFA content (noise, gradients, 2x resampling, JPEG blocking) measures
+# about 0.01
+CFA_PERIODIC_THRESHOLD = 0.05
+
+def _stratified_crops(h, w, crop_size, grid=3):
+    """Even-aligned crop origins spread over a grid, or the whole image if small."""
+    if h <= crop_size or w <= crop_size:
+        return [(0, 0, h - h % 2, w - w % 2)]
+    ys = np.linspace(0, h - crop_size, grid).astype(int) // 2 * 2
+    xs = np.linspace(0, w - crop_size, grid).astype(int) // 2 * 2
+    return [(y, x, y + crop_size, x + crop_size) for y in ys for x in xs]
+
+def estimate_cfa_periodicity(img_rgb, crop_size=256):
+    """
+    Measures the 2x2 periodic component of demosaicing residuals.
+    
+    Each channel gets one linear-prediction residual (a single convolution).
+    The residual energy is folded into its four 2x2 polyphase means, from
+    which the DFT bins at the Nyquist frequencies (pi, 0), (0, pi) and
+    (pi, pi) follow directly, without a full FFT.
+    
+    Args:
+        img_rgb (np.ndarray): RGB image (uint8 or float32).
+        crop_size (int): Side of the stratified crops (3x3 grid over the image).
+        
+    Returns:
+        dict: Per-crop strengths, their median, the dominant Bayer phase
+        among crops with a CFA trace and the fraction of all crops that
+        agree on it.
+    """
+    h, w = img_rgb.shape[:2]
+    crop_strengths = []
+    phases = []
+    
+    for y0, x0, y1, x1 in _stratified_crops(h, w, crop_size):
+        crop = img_rgb[y0:y1, x0:x1].astype(np.float32)
+        ch, cw = crop.shape[:2]
+        ch, cw = ch - ch % 2, cw - cw % 2
+        if ch < 4 or cw < 4:
+            continue
+        
+        residual = crop - cv2.filter2D(crop, -1, CFA_PREDICTOR, borderType=cv2.BORDER_REFLECT)
+        energy = residual[1:ch - 1, 1:cw - 1] ** 2  # drop the border, keep 2x2 alignment odd/odd
+        energy = energy[:(energy.shape[0] // 2) * 2, :(energy.shape[1] // 2) * 2]
+        
+        # Polyphase means, shape (2, 2, channels); index 0 is odd rows/cols of the crop
+        poly = energy.reshape(energy.shape[0] // 2, 2, energy.shape[1] // 2, 2, 3).mean(axis=(0, 2))
+        poly = np.roll(poly, (1, 1), axis=(0, 1))  # re-align to even crop coordinates
+        
+        dc = poly.sum(axis=(0, 1)) + 1e-6
+        nyquist_v = poly[0, 0] + poly[0, 1] - poly[1, 0] - poly[1, 1]   # (pi, 0)
+        nyquist_h = poly[0, 0] - poly[0, 1] + poly[1, 0] - poly[1, 1]   # (0, pi)
+        nyquist_d = poly[0, 0] - poly[0, 1] - poly[1, 0] + poly[1, 1]   # (pi, pi)
+        strength = (np.abs(nyquist_v) + np.abs(nyquist_h) + np.abs(nyquist_d)) / dc
+        crop_strengths.append(float(np.mean(strength)))
+        if crop_strengths[-1] < CFA_BLOCK_THRESHOLD:
+            continue
+        
+        # Native red/blue samples carry the largest prediction residual
+        red = np.unravel_index(np.argmax(poly[:, :, 0]), (2, 2))
+        blue = np.unravel_index(np.argmax(poly[:, :, 2]), (2, 2))
+        if red[0] != blue[0] and red[1] != blue[1]:
+            phases.append(BAYER_PHASES[(int(red[0]), int(red[1]))])
+    
+    result = {
+        'crop_strengths': crop_strengths,
+        'periodic_strength': float(np.median(crop_strengths)) if crop_strengths else 0.0,
+        'bayer_phase': 'Unknown',
+        'phase_consistency': 0.0
+    }
+    if phases:
+        names, counts = np.unique(phases, return_counts=True)
+        result['bayer_phase'] = str(names[np.argmax(counts)])
+        result['phase_consistency'] = float(np.max(counts) / len(crop_strengths))
+    return result
+
+# Blocks weaker than this fraction of the image's typical strength have lost
+# their CFA trace (resampled or synthesised content)
+CFA_RELATIVE_DROP = 0.5
+
+def cfa_block_map(img_rgb, block_size=32):
+    """
+    Block-wise CFA presence and phase for tamper localisation.
+    
+    One prediction-residual convolution per channel, then a single reshape
+    reduction into per-block 2x2 polyphase energy means, so the cost is
+    linear in the image size.
+    
+    Args:
+        img_rgb (np.ndarray): RGB image.
+        block_size (int): Even block side in pixels (e.g. 32 or 64).
+        
+    Returns:
+        tuple: (float32 periodic strength per block, int8 phase per block as
+        an index into `BAYER_PHASES` or -1 where no consistent phase exists,
+        boolean mask of textured blocks where the measurement is meaningful)
+    """
+    block_size -= block_size % 2
+    h, w = img_rgb.shape[:2]
+    rows, cols = h // block_size, w // block_size
+    if rows == 0 or cols == 0:
+        empty = np.zeros((rows, cols), dtype=np.float32)
+        return empty, empty.astype(np.int8), empty.astype(bool)
+    
+    half = block_size // 2
+    poly = np.zeros((3, rows, cols, 4), dtype=np.float32)
+    for c in range(3):
+        channel = img_rgb[:rows * block_size, :cols * block_size, c].astype(np.float32)
+        residual = channel - cv2.filter2D(channel, -1, CFA_PREDICTOR, borderType=cv2.BORDER_REFLECT)
+        energy = residual * residual
+        # (rows, half, 2, cols, half, 2) -> mean per block and 2x2 phase
+        blocks = energy.reshape(rows, half, 2, cols, half, 2).mean(axis=(1, 4))
+        poly[c] = blocks.transpose(0, 2, 1, 3).reshape(rows, cols, 4)
+    
+    # Polyphase order is (0,0), (0,1), (1,0), (1,1)
+    p00, p01, p10, p11 = poly[..., 0], poly[..., 1], poly[..., 2], poly[..., 3]
+    dc = p00 + p01 + p10 + p11
+    nyquist = np.abs(p00 + p01 - p10 - p11) + np.abs(p00 - p01 + p10 - p11) + np.abs(p00 - p01 - p10 + p11)
+    strength = (nyquist / (dc + 1e-6)).mean(axis=0)
+    
+    # Red and blue native samples must sit on opposite corners of the cell
+    red = np.argmax(poly[0], axis=-1)
+    blue = np.argmax(poly[2], axis=-1)
+    phase = np.where((red + blue == 3) & (strength >= CFA_BLOCK_THRESHOLD), red, -1).astype(np.int8)
+    
+    # Flat blocks have too little residual energy to carry a CFA trace
+    textured = dc.mean(axis=0) > 0.5
+    return strength.astype(np.float32), phase, textured
+
+def detect_cfa_pattern(image_path, return_map=False, block_size=32):
     """
     Detects Color Filter Array (CFA) patterns (Bayer pattern).
     Real digital cameras use CFA sensors. AI images lack this pattern.
     
     Args:
         image_path (str): Path to image file
+        return_map (bool): If True, includes a block map of CFA presence and
+            phase; blocks with a missing or shifted CFA are flagged as tampered
+        block_size (int): Block side of the map in pixels
         
     Returns:
         dict: CFA pattern detection results
@@ -17,6 +164,10 @@ def detect_cfa_pattern(image_path):
         'cfa_strength': 0.0,
         'pattern_type': 'None',
         'is_real_camera': False,
+        'periodic_strength': 0.0,
+        'crop_strengths': [],
+        'bayer_phase': 'Unknown',
+        'phase_consistency': 0.0,
         'is_suspicious': False
     }
     
@@ -27,76 +178,41 @@ def detect_cfa_pattern(image_path):
         
         # Convert to RGB
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        h, w = img_rgb.shape[:2]
         
-        # Sample a region from the center (avoiding edges)
-        center_h, center_w = h // 2, w // 2
-        sample_size = min(256, h // 4, w // 4)
+        # Demosaicing periodicity over stratified crops of the whole image
+        results.update(estimate_cfa_periodicity(img_rgb))
         
-        region = img_rgb[
-            center_h - sample_size:center_h + sample_size,
-            center_w - sample_size:center_w + sample_size
-        ]
-        
-        # Separate color channels
-        r = region[:, :, 0].astype(float)
-        g = region[:, :, 1].astype(float)
-        b = region[:, :, 2].astype(float)
-        
-        # Check for Bayer pattern artifacts (2x2 periodic pattern)
-        # In Bayer pattern: RGGB or GBRG arrangement
-        
-        # Calculate correlation at different offsets
-        def calculate_periodic_correlation(channel, offset=2):
-            """Check for periodic patterns"""
-            h, w = channel.shape
-            if h < offset * 2 or w < offset * 2:
-                return 0.0
-                
-            # Compare pixels with their offset neighbors
-            shifted_h = channel[offset:, :]
-            shifted_v = channel[:, offset:]
-            original_h = channel[:-offset, :]
-            original_v = channel[:, :-offset]
+        if return_map:
+            strength, phase, textured = cfa_block_map(img_rgb, block_size)
+            results['cfa_block_strength'] = strength
+            results['cfa_block_phase'] = phase
+            results['cfa_tamper_map'] = np.zeros(phase.shape, dtype=bool)
+            results['cfa_tampered_ratio'] = 0.0
             
-            # Calculate correlation
-            corr_h = np.corrcoef(shifted_h.flatten(), original_h.flatten())[0, 1]
-            corr_v = np.corrcoef(shifted_v.flatten(), original_v.flatten())[0, 1]
-            
-            return (corr_h + corr_v) / 2
-        
-        # Check for 2-pixel periodicity (CFA signature)
-        cfa_corr_r = calculate_periodic_correlation(r, 2)
-        cfa_corr_g = calculate_periodic_correlation(g, 2)
-        cfa_corr_b = calculate_periodic_correlation(b, 2)
+            # Localisation only makes sense when most of the image has a CFA
+            located = phase[textured & (phase >= 0)]
+            if located.size and located.size >= 0.5 * np.sum(textured):
+                dominant = np.bincount(located, minlength=4).argmax()
+                weak = strength < CFA_RELATIVE_DROP * np.median(strength[textured])
+                tampered = textured & ((phase != dominant) | weak)
+                results['cfa_tamper_map'] = tampered
+                results['cfa_tampered_ratio'] = float(np.sum(tampered) / max(np.sum(textured), 1))
         
-        # Average CFA correlation
-        cfa_strength = (cfa_corr_r + cfa_corr_g + cfa_corr_b) / 3
-        results['cfa_strength'] = float(cfa_strength)
-        
-        # Real cameras show weak but detectable CFA patterns
-        # Correlation around 0.7-0.95 is typical for real photos
-        if 0.65 < cfa_strength < 0.98:
+        # The stratified periodicity drives the decision; the Bayer phase
+        # is only named when the crops agree on it (JPEG chroma subsampling
+        # blurs red and blue but keeps the periodicity)
+        results['cfa_strength'] = results['periodic_strength']
+        if results['periodic_strength'] >= CFA_PERIODIC_THRESHOLD:
             results['cfa_pattern_detected'] = True
             results['is_real_camera'] = True
-            results['pattern_type'] = 'Bayer-like'
-        elif cfa_strength > 0.98:
-            # Too perfect - might be upscaled or AI
-            results['is_suspicious'] = True
-            results['pattern_type'] = 'Suspiciously perfect'
+            if results['phase_consistency'] >= 0.5:
+                results['pattern_type'] = f"Bayer ({results['bayer_phase']})"
+            else:
+                results['pattern_type'] = 'Bayer-like'
         else:
             # No CFA pattern - likely not from a real camera
             results['is_suspicious'] = True
             results['pattern_type'] = 'No CFA detected'
-        
-        # Additional check: Green channel has higher resolution in Bayer
-        g_detail = np.std(g)
-        r_detail = np.std(r)
-        b_detail = np.std(b)
-        
-        # In real Bayer, green channel typically has more detail
-        if g_detail > max(r_detail, b_detail) * 1.1:
-            results['is_real_camera'] = True
             
     except Exception as e:
         print(f"Error in CFA pattern detection: {e}")
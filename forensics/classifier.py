@@ -1,69 +1,50 @@
+import copy
+import operator
 import numpy as np
 from PIL import Image
 
-def classify_image(metadata, jpeg_analysis, chromatic_analysis, color_analysis, texture_analysis, 
-                   gan_detection, noise_inconsistency, benford_analysis, cfa_detection, 
-                   double_jpeg, gradient_analysis, image_path):
-    """
-    Advanced AI Image Classifier
-    Combines multiple forensic analyses to determine if an image is AI-generated, AI-edited, or real.
-    
-    Args:
-        metadata (dict): Metadata analysis results
-        jpeg_analysis (dict): JPEG artifacts analysis
-        chromatic_analysis (dict): Chromatic aberration analysis
-        color_analysis (dict): Color distribution analysis
-        texture_analysis (dict): Texture consistency analysis
-        gan_detection (dict): GAN fingerprint detection results
-        noise_inconsistency (dict): Advanced noise analysis results
-        benford_analysis (dict): Benford's Law analysis results
-        cfa_detection (dict): CFA pattern detection results
-        double_jpeg (dict): Double JPEG compression results
-        gradient_analysis (dict): Gradient anomaly detection results
-        image_path (str): Path to the image
-        
-    Returns:
-        dict: Classification results with probabilities and evidence
-    """
-    
-    # Initialize scores for each category
-    ai_generated_score = 0
-    ai_edited_score = 0
-    real_photo_score = 0
-    
-    # Evidence collection
-    evidence = {
-        'ai_generated': [],
-        'ai_edited': [],
-        'real_photo': []
-    }
-    
-    # Check if image is old (pre-2020) based on metadata
-    is_old_image = False
-    image_year = None
-    
-    if metadata.get('exif'):
-        # Try to extract date from EXIF
-        date_fields = ['DateTime', 'DateTimeOriginal', 'DateTimeDigitized', 'DateTime']
-        for field in date_fields:
-            date_str = metadata['exif'].get(field, '')
-            if date_str and len(str(date_str)) >= 4:
-                try:
-                    # Extract year (first 4 characters)
-                    year_str = str(date_str)[:4]
-                    if year_str.isdigit():
-                        image_year = int(year_str)
-                        if 1990 <= image_year < 2020:  # Old image (before AI era)
-                            is_old_image = True
-                            evidence['real_photo'].append(f"✓ Old image from {image_year} (pre-AI era)")
-                        break
-                except:
-                    pass
-    
+# Score categories and the verdict each one produces (column order of the score matrix)
+CATEGORIES = ('ai_generated', 'ai_edited', 'real_photo')
+VERDICTS = ("AI Generated", "AI Edited / Modified", "Likely Real Photo")
+CONFIDENCE_LEVELS = ("Low", "Medium", "High")
+AI_GENERATED, AI_EDITED, REAL_PHOTO = range(3)
+
+# Per-detector evidence sections, in display order
+EVIDENCE_SECTIONS = ('cfa', 'gan', 'noise', 'benford', 'double_jpeg', 'gradient', 'metadata',
+                     'chromatic', 'jpeg', 'color', 'texture', 'copy_move', 'thumbnail')
+
+# Columns of the feature matrix; flags are 0/1, missing values 0 (image_year: NaN)
+FEATURES = (
+    'image_year',
+    'cfa_detected', 'cfa_strength',
+    'gan_detected', 'gan_suspicious', 'gan_high_freq',
+    'noise_suspicious', 'noise_confidence', 'noise_regions',
+    'benford_follows', 'benford_suspicious', 'benford_deviation', 'benford_p',
+    'has_exif', 'has_software', 'editing_software',
+    'double_detected', 'double_likely_edited',
+    'gradient_unnatural', 'gradient_smoothness',
+    'chromatic_present', 'chromatic_suspicious', 'aberration_score',
+    'color_ai_signature', 'color_unusual', 'color_saturation',
+    'texture_repetition', 'texture_suspicious', 'texture_variance',
+    'jpeg_suspicious', 'jpeg_unusual_quality',
+    'clone_detected', 'clone_area_pct',
+    'thumbnail_present', 'thumbnail_mismatch', 'thumbnail_ssim',
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+# Noise-inconsistency confidence labels as ordinal feature values
+NOISE_CONFIDENCE_LEVELS = {'Low': 0, 'Medium': 1, 'High': 2}
+
+# Software names that mark an EXIF-bearing image as edited
+EDITING_SOFTWARE_TERMS = ['ai', 'neural', 'adobe', 'photoshop', 'gimp', 'paint', 'canva']
+
+# Weights, confidence cut-offs and the old-image rules; pass a modified copy
+# to classify_batch to re-score without re-running the detectors
+DEFAULT_CLASSIFIER_CONFIG = {
     # Weight configuration (total = 100)
-    # Adjust weights for old images
-    if is_old_image:
-        weights = {
+    # copy_move and thumbnail sit outside the total: they only score when an edit is found
+    'weights': {
+        'old_image': {
             'metadata': 15,           # Trust metadata more for old images
             'chromatic': 12,          # Old cameras had more aberration
             'double_jpeg': 5,         # Multiple re-saves are normal for old images
@@ -74,10 +55,11 @@ def classify_image(metadata, jpeg_analysis, chromatic_analysis, color_analysis,
             'gradient': 8,
             'color': 7,
             'texture': 5,
-            'jpeg': 5
-        }
-    else:
-        weights = {
+            'jpeg': 5,
+            'copy_move': 8,
+            'thumbnail': 10
+        },
+        'modern': {
             'cfa_detection': 15,      # Strongest indicator for modern images
             'gan_fingerprint': 12,    # Very strong AI indicator
             'noise_inconsistency': 12,
@@ -88,349 +70,526 @@ def classify_image(metadata, jpeg_analysis, chromatic_analysis, color_analysis,
             'chromatic': 7,
             'color': 7,
             'texture': 7,
-            'jpeg': 6
+            'jpeg': 6,
+            'copy_move': 10,
+            'thumbnail': 12
         }
-    
+    },
+    # (High, Medium) cut-offs on the gap between the two best scores / total
+    'confidence_thresholds': {
+        'old_image': (0.15, 0.08),    # More lenient confidence for old images
+        'modern': (0.25, 0.12)
+    },
+    'old_image_years': (1990, 2020),  # Pre-AI era
+    'ai_era_year': 2015,              # Before modern GAN era
+    'old_image_real_ratio': 0.7       # Old images favour real if real > ratio * AI generated
+}
+
+# Scoring rules. Each group is one detector's if/elif chain: the first branch
+# whose clauses (feature, op, threshold) all hold adds weight * multiplier to
+# its categories and contributes its evidence strings. 'is_old' is derived
+# from image_year and the config.
+RULES = [
     # 1. CFA DETECTION - Most Critical Test (Real camera vs AI/Screen)
-    cfa_evidence = []
-    
-    if cfa_detection.get('cfa_pattern_detected'):
-        real_photo_score += weights['cfa_detection']
-        evidence['real_photo'].append("✓✓ Camera sensor pattern (CFA) detected - Strong indicator of real camera photo")
-        cfa_evidence.append(f"CFA detected: {cfa_detection.get('pattern_type')}")
-    else:
-        # No CFA = either AI generated OR old/heavily compressed image
-        cfa_strength = cfa_detection.get('cfa_strength', 0)
-        
-        if is_old_image:
-            # For old images, lack of CFA is more acceptable (compression degradation)
-            if cfa_strength >= 0.01:  # Any detectable pattern in old image is good
-                real_photo_score += weights['cfa_detection'] * 0.7
-                evidence['real_photo'].append(f"✓ Weak CFA detected ({cfa_strength:.4f}) - Acceptable for old/compressed image")
-                cfa_evidence.append(f"Weak CFA (old image): {cfa_strength:.4f}")
-            else:
-                # Even very weak CFA in old image doesn't mean AI
-                real_photo_score += weights['cfa_detection'] * 0.3
-                ai_edited_score += weights['cfa_detection'] * 0.4
-                evidence['real_photo'].append(f"⚠ CFA degraded by age/compression ({image_year})")
-                cfa_evidence.append(f"CFA lost to compression (pre-{image_year})")
-        else:
-            # For modern images, no CFA is more suspicious
-            if cfa_strength < 0.02:  # Very low = likely AI generated
-                ai_generated_score += weights['cfa_detection']
-                evidence['ai_generated'].append("⚠⚠ No camera sensor pattern - Not taken with a camera")
-                cfa_evidence.append("No CFA pattern detected")
-            else:  # Weak CFA = might be edited/compressed
-                ai_edited_score += weights['cfa_detection'] * 0.7
-                ai_generated_score += weights['cfa_detection'] * 0.3
-                evidence['ai_edited'].append("⚠ Weak camera sensor pattern - Possibly edited or compressed")
-                cfa_evidence.append(f"Weak CFA: {cfa_strength:.4f}")
-    
+    ('cfa', 'cfa_detection', [
+        ([('cfa_detected', '==', 1)], {'real_photo': 1.0},
+         ('real_photo', "✓✓ Camera sensor pattern (CFA) detected - Strong indicator of real camera photo"),
+         "CFA detected: {cfa_pattern_type}"),
+        # For old images, lack of CFA is more acceptable (compression degradation)
+        ([('is_old', '==', 1), ('cfa_strength', '>=', 0.01)], {'real_photo': 0.7},
+         ('real_photo', "✓ Weak CFA detected ({cfa_strength:.4f}) - Acceptable for old/compressed image"),
+         "Weak CFA (old image): {cfa_strength:.4f}"),
+        ([('is_old', '==', 1)], {'real_photo': 0.3, 'ai_edited': 0.4},
+         ('real_photo', "⚠ CFA degraded by age/compression ({image_year})"),
+         "CFA lost to compression (pre-{image_year})"),
+        # For modern images, no CFA is more suspicious
+        ([('cfa_strength', '<', 0.02)], {'ai_generated': 1.0},
+         ('ai_generated', "⚠⚠ No camera sensor pattern - Not taken with a camera"),
+         "No CFA pattern detected"),
+        ([], {'ai_edited': 0.7, 'ai_generated': 0.3},
+         ('ai_edited', "⚠ Weak camera sensor pattern - Possibly edited or compressed"),
+         "Weak CFA: {cfa_strength:.4f}"),
+    ]),
     # 2. GAN FINGERPRINT DETECTION
-    gan_evidence = []
-    
-    if gan_detection.get('gan_signature_detected'):
-        ai_generated_score += weights['gan_fingerprint']
-        evidence['ai_generated'].append(f"⚠⚠ GAN fingerprint detected (High-freq: {gan_detection.get('high_freq_pattern_score', 0):.4f})")
-        gan_evidence.append("GAN signature detected")
-    elif gan_detection.get('is_suspicious'):
-        ai_generated_score += weights['gan_fingerprint'] * 0.5
-        ai_edited_score += weights['gan_fingerprint'] * 0.3
-        evidence['ai_generated'].append("⚠ Suspicious frequency patterns detected")
-        gan_evidence.append("Suspicious frequency patterns")
-    else:
-        real_photo_score += weights['gan_fingerprint'] * 0.5
-        evidence['real_photo'].append("✓ Natural frequency patterns")
-        gan_evidence.append("Natural frequency patterns")
-    
+    ('gan', 'gan_fingerprint', [
+        ([('gan_detected', '==', 1)], {'ai_generated': 1.0},
+         ('ai_generated', "⚠⚠ GAN fingerprint detected (High-freq: {gan_high_freq:.4f})"),
+         "GAN signature detected"),
+        ([('gan_suspicious', '==', 1)], {'ai_generated': 0.5, 'ai_edited': 0.3},
+         ('ai_generated', "⚠ Suspicious frequency patterns detected"),
+         "Suspicious frequency patterns"),
+        ([], {'real_photo': 0.5},
+         ('real_photo', "✓ Natural frequency patterns"),
+         "Natural frequency patterns"),
+    ]),
     # 3. NOISE INCONSISTENCY ANALYSIS
-    noise_evidence = []
-    
-    if noise_inconsistency.get('is_suspicious'):
-        confidence_level = noise_inconsistency.get('confidence', 'Low')
-        suspicious_count = noise_inconsistency.get('suspicious_regions', 0)
-        
-        if confidence_level == 'High' and suspicious_count >= 3:
-            ai_generated_score += weights['noise_inconsistency']
-            evidence['ai_generated'].append(f"⚠ Inconsistent noise across {suspicious_count} regions - AI artifact")
-            noise_evidence.append(f"High noise inconsistency ({suspicious_count} regions)")
-        elif confidence_level in ['High', 'Medium']:
-            ai_edited_score += weights['noise_inconsistency']
-            evidence['ai_edited'].append(f"⚠ Regional noise inconsistency ({suspicious_count} regions) - Likely edited")
-            noise_evidence.append(f"Noise inconsistency in {suspicious_count} regions")
-        else:
-            ai_edited_score += weights['noise_inconsistency'] * 0.5
-            evidence['ai_edited'].append("⚠ Minor noise inconsistencies detected")
-            noise_evidence.append("Minor noise variations")
-    else:
-        real_photo_score += weights['noise_inconsistency']
-        evidence['real_photo'].append("✓ Consistent sensor noise throughout image")
-        noise_evidence.append("Consistent sensor noise")
-    
+    ('noise', 'noise_inconsistency', [
+        ([('noise_suspicious', '==', 1), ('noise_confidence', '==', 2), ('noise_regions', '>=', 3)],
+         {'ai_generated': 1.0},
+         ('ai_generated', "⚠ Inconsistent noise across {noise_regions} regions - AI artifact"),
+         "High noise inconsistency ({noise_regions} regions)"),
+        ([('noise_suspicious', '==', 1), ('noise_confidence', '>=', 1)], {'ai_edited': 1.0},
+         ('ai_edited', "⚠ Regional noise inconsistency ({noise_regions} regions) - Likely edited"),
+         "Noise inconsistency in {noise_regions} regions"),
+        ([('noise_suspicious', '==', 1)], {'ai_edited': 0.5},
+         ('ai_edited', "⚠ Minor noise inconsistencies detected"),
+         "Minor noise variations"),
+        ([], {'real_photo': 1.0},
+         ('real_photo', "✓ Consistent sensor noise throughout image"),
+         "Consistent sensor noise"),
+    ]),
     # 4. BENFORD'S LAW ANALYSIS
-    benford_evidence = []
-    
-    if benford_analysis.get('follows_benford'):
-        real_photo_score += weights['benford_law']
-        evidence['real_photo'].append(f"✓ Follows Benford's Law (p={benford_analysis.get('p_value', 0):.3f}) - Natural distribution")
-        benford_evidence.append("Follows Benford's Law")
-    elif benford_analysis.get('is_suspicious'):
-        deviation = benford_analysis.get('benford_deviation', 0)
-        if deviation > 0.15:
-            ai_generated_score += weights['benford_law']
-            evidence['ai_generated'].append(f"⚠ Significant deviation from Benford's Law ({deviation:.3f}) - Unnatural distribution")
-            benford_evidence.append(f"Deviates from Benford's Law ({deviation:.3f})")
-        else:
-            ai_edited_score += weights['benford_law'] * 0.6
-            evidence['ai_edited'].append(f"⚠ Minor deviation from Benford's Law ({deviation:.3f})")
-            benford_evidence.append(f"Minor Benford deviation ({deviation:.3f})")
-    
-    # 5. METADATA ANALYSIS
-    metadata_evidence = []
-    
-    anomalies = metadata.get('anomalies', [])
-    has_exif = metadata.get('exif', {})
-    software_tags = metadata.get('software_tags', [])
-    
-    if not has_exif or 'No EXIF data found' in str(anomalies):
-        # No EXIF could mean AI or edited
-        if not software_tags:
-            ai_generated_score += weights['metadata']
-            evidence['ai_generated'].append("⚠ No EXIF data - Not from a camera")
-            metadata_evidence.append("No EXIF data")
-        else:
-            ai_edited_score += weights['metadata']
-            evidence['ai_edited'].append(f"⚠ Editing software detected: {', '.join(software_tags)}")
-            metadata_evidence.append(f"Software: {', '.join(software_tags)}")
-    else:
-        # Has EXIF - good sign
-        real_photo_score += weights['metadata']
-        evidence['real_photo'].append("✓ Camera metadata present")
-        metadata_evidence.append("EXIF data present")
-        
-        # Check for AI/editing software
-        ai_software = ['ai', 'neural', 'adobe', 'photoshop', 'gimp', 'paint', 'canva']
-        if any(any(ai_term in tag.lower() for ai_term in ai_software) for tag in software_tags):
-            ai_edited_score += weights['metadata'] * 0.5
-            evidence['ai_edited'].append(f"⚠ Editing software in metadata: {', '.join(software_tags)}")
-            metadata_evidence.append(f"Editing software: {', '.join(software_tags)}")
-    
-    # 6. DOUBLE JPEG COMPRESSION
-    double_jpeg_evidence = []
-    
-    if double_jpeg.get('double_compression_detected'):
-        if is_old_image:
-            # Multiple compressions are NORMAL for old images (re-saved many times)
-            real_photo_score += weights['double_jpeg'] * 0.5
-            evidence['real_photo'].append(f"✓ Multiple compressions expected for old image ({double_jpeg.get('compression_count_estimate')} cycles)")
-            double_jpeg_evidence.append(f"Normal re-compression for old image")
-        else:
-            # For modern images, double compression suggests editing
-            ai_edited_score += weights['double_jpeg']
-            evidence['ai_edited'].append(f"⚠ Double JPEG compression detected ({double_jpeg.get('compression_count_estimate')} cycles)")
-            double_jpeg_evidence.append(f"Double compression ({double_jpeg.get('compression_count_estimate')} times)")
-    elif double_jpeg.get('likely_edited'):
-        if is_old_image:
-            real_photo_score += weights['double_jpeg'] * 0.3
-            double_jpeg_evidence.append("Compression artifacts (age-related)")
-        else:
-            ai_edited_score += weights['double_jpeg'] * 0.6
-            evidence['ai_edited'].append("⚠ Compression artifacts suggest editing")
-            double_jpeg_evidence.append("Compression artifacts")
-    else:
-        real_photo_score += weights['double_jpeg'] * 0.4
-        double_jpeg_evidence.append("Single compression")
-    
+    ('benford', 'benford_law', [
+        ([('benford_follows', '==', 1)], {'real_photo': 1.0},
+         ('real_photo', "✓ Follows Benford's Law (p={benford_p:.3f}) - Natural distribution"),
+         "Follows Benford's Law"),
+        ([('benford_suspicious', '==', 1), ('benford_deviation', '>', 0.15)], {'ai_generated': 1.0},
+         ('ai_generated', "⚠ Significant deviation from Benford's Law ({benford_deviation:.3f}) - Unnatural distribution"),
+         "Deviates from Benford's Law ({benford_deviation:.3f})"),
+        ([('benford_suspicious', '==', 1)], {'ai_edited': 0.6},
+         ('ai_edited', "⚠ Minor deviation from Benford's Law ({benford_deviation:.3f})"),
+         "Minor Benford deviation ({benford_deviation:.3f})"),
+    ]),
+    # 5. METADATA ANALYSIS - no EXIF could mean AI or edited
+    ('metadata', 'metadata', [
+        ([('has_exif', '==', 0), ('has_software', '==', 0)], {'ai_generated': 1.0},
+         ('ai_generated', "⚠ No EXIF data - Not from a camera"),
+         "No EXIF data"),
+        ([('has_exif', '==', 0)], {'ai_edited': 1.0},
+         ('ai_edited', "⚠ Editing software detected: {software}"),
+         "Software: {software}"),
+        ([], {'real_photo': 1.0},
+         ('real_photo', "✓ Camera metadata present"),
+         "EXIF data present"),
+    ]),
+    # Check for AI/editing software alongside camera metadata
+    ('metadata', 'metadata', [
+        ([('has_exif', '==', 1), ('editing_software', '==', 1)], {'ai_edited': 0.5},
+         ('ai_edited', "⚠ Editing software in metadata: {software}"),
+         "Editing software: {software}"),
+    ]),
+    # 6. DOUBLE JPEG COMPRESSION - multiple compressions are NORMAL for old images
+    ('double_jpeg', 'double_jpeg', [
+        ([('double_detected', '==', 1), ('is_old', '==', 1)], {'real_photo': 0.5},
+         ('real_photo', "✓ Multiple compressions expected for old image ({double_count} cycles)"),
+         "Normal re-compression for old image"),
+        ([('double_detected', '==', 1)], {'ai_edited': 1.0},
+         ('ai_edited', "⚠ Double JPEG compression detected ({double_count} cycles)"),
+         "Double compression ({double_count} times)"),
+        ([('double_likely_edited', '==', 1), ('is_old', '==', 1)], {'real_photo': 0.3},
+         None,
+         "Compression artifacts (age-related)"),
+        ([('double_likely_edited', '==', 1)], {'ai_edited': 0.6},
+         ('ai_edited', "⚠ Compression artifacts suggest editing"),
+         "Compression artifacts"),
+        ([], {'real_photo': 0.4},
+         None,
+         "Single compression"),
+    ]),
     # 7. GRADIENT ANALYSIS
-    gradient_evidence = []
-    
-    if gradient_analysis.get('unnatural_smoothness_detected'):
-        smoothness = gradient_analysis.get('gradient_smoothness', 0)
-        if smoothness > 15:  # Very smooth - AI characteristic
-            ai_generated_score += weights['gradient']
-            evidence['ai_generated'].append(f"⚠ Unnatural smoothness ({smoothness:.1f}) - AI artifact")
-            gradient_evidence.append(f"Unnatural smoothness ({smoothness:.1f})")
-        else:
-            ai_edited_score += weights['gradient'] * 0.7
-            evidence['ai_edited'].append(f"⚠ Smoothing detected ({smoothness:.1f})")
-            gradient_evidence.append(f"Smoothing detected")
-    else:
-        real_photo_score += weights['gradient'] * 0.5
-        evidence['real_photo'].append("✓ Natural gradient transitions")
-        gradient_evidence.append("Natural gradients")
-    
+    ('gradient', 'gradient', [
+        ([('gradient_unnatural', '==', 1), ('gradient_smoothness', '>', 15)], {'ai_generated': 1.0},
+         ('ai_generated', "⚠ Unnatural smoothness ({gradient_smoothness:.1f}) - AI artifact"),
+         "Unnatural smoothness ({gradient_smoothness:.1f})"),
+        ([('gradient_unnatural', '==', 1)], {'ai_edited': 0.7},
+         ('ai_edited', "⚠ Smoothing detected ({gradient_smoothness:.1f})"),
+         "Smoothing detected"),
+        ([], {'real_photo': 0.5},
+         ('real_photo', "✓ Natural gradient transitions"),
+         "Natural gradients"),
+    ]),
     # 8. CHROMATIC ABERRATION
-    chromatic_evidence = []
-    
-    if chromatic_analysis.get('has_chromatic_aberration'):
-        real_photo_score += weights['chromatic']
-        evidence['real_photo'].append(f"✓ Natural lens aberration present ({chromatic_analysis.get('aberration_score', 0):.5f})")
-        chromatic_evidence.append("Natural lens aberration")
-    elif chromatic_analysis.get('is_suspicious'):
-        ai_generated_score += weights['chromatic'] * 0.6
-        ai_edited_score += weights['chromatic'] * 0.4
-        evidence['ai_generated'].append("⚠ Missing expected lens aberration - Too perfect")
-        chromatic_evidence.append("Missing lens aberration")
-    
+    ('chromatic', 'chromatic', [
+        ([('chromatic_present', '==', 1)], {'real_photo': 1.0},
+         ('real_photo', "✓ Natural lens aberration present ({aberration_score:.2f} px at corner)"),
+         "Natural lens aberration"),
+        ([('chromatic_suspicious', '==', 1)], {'ai_generated': 0.6, 'ai_edited': 0.4},
+         ('ai_generated', "⚠ Missing expected lens aberration - Too perfect"),
+         "Missing lens aberration"),
+    ]),
     # 9. COLOR DISTRIBUTION
-    color_evidence = []
-    
-    if color_analysis.get('ai_signature_detected'):
-        ai_generated_score += weights['color']
-        evidence['ai_generated'].append(f"⚠ AI color signature (Saturation: {color_analysis.get('color_saturation_avg', 0):.1f})")
-        color_evidence.append("AI color signature")
-    elif color_analysis.get('unusual_patterns'):
-        ai_edited_score += weights['color'] * 0.7
-        evidence['ai_edited'].append("⚠ Unusual color distribution patterns")
-        color_evidence.append("Unusual color patterns")
-    else:
-        real_photo_score += weights['color'] * 0.5
-        evidence['real_photo'].append("✓ Natural color distribution")
-        color_evidence.append("Natural colors")
-    
+    ('color', 'color', [
+        ([('color_ai_signature', '==', 1)], {'ai_generated': 1.0},
+         ('ai_generated', "⚠ AI color signature (Saturation: {color_saturation:.1f})"),
+         "AI color signature"),
+        ([('color_unusual', '==', 1)], {'ai_edited': 0.7},
+         ('ai_edited', "⚠ Unusual color distribution patterns"),
+         "Unusual color patterns"),
+        ([], {'real_photo': 0.5},
+         ('real_photo', "✓ Natural color distribution"),
+         "Natural colors"),
+    ]),
     # 10. TEXTURE CONSISTENCY
-    texture_evidence = []
-    
-    if texture_analysis.get('repetition_detected'):
-        ai_edited_score += weights['texture']
-        evidence['ai_edited'].append("⚠ Repetitive texture patterns (clone stamp detected)")
-        texture_evidence.append("Clone stamp detected")
-    elif texture_analysis.get('is_suspicious'):
-        variance = texture_analysis.get('texture_variance', 0)
-        if variance < 50:  # Very uniform
-            ai_generated_score += weights['texture'] * 0.6
-            evidence['ai_generated'].append(f"⚠ Overly uniform texture ({variance:.1f})")
-            texture_evidence.append("Overly uniform texture")
-        else:
-            ai_edited_score += weights['texture'] * 0.5
-            texture_evidence.append("Suspicious texture")
-    else:
-        real_photo_score += weights['texture'] * 0.5
-        evidence['real_photo'].append("✓ Natural texture variation")
-        texture_evidence.append("Natural texture")
-    
-    # 11. JPEG ARTIFACTS
-    jpeg_evidence = []
-    
-    if jpeg_analysis.get('is_suspicious'):
-        quality = jpeg_analysis.get('compression_quality_estimate', 'Unknown')
-        if 'Uncompressed' in str(quality) or 'Very High' in str(quality):
-            # Uncompressed is unusual for photos but common for AI
-            ai_generated_score += weights['jpeg'] * 0.6
-            evidence['ai_generated'].append(f"⚠ Unusual compression: {quality}")
-            jpeg_evidence.append(f"Unusual compression: {quality}")
+    ('texture', 'texture', [
+        ([('texture_repetition', '==', 1)], {'ai_edited': 1.0},
+         ('ai_edited', "⚠ Repetitive texture patterns (clone stamp detected)"),
+         "Clone stamp detected"),
+        ([('texture_suspicious', '==', 1), ('texture_variance', '<', 50)], {'ai_generated': 0.6},
+         ('ai_generated', "⚠ Overly uniform texture ({texture_variance:.1f})"),
+         "Overly uniform texture"),
+        ([('texture_suspicious', '==', 1)], {'ai_edited': 0.5},
+         None,
+         "Suspicious texture"),
+        ([], {'real_photo': 0.5},
+         ('real_photo', "✓ Natural texture variation"),
+         "Natural texture"),
+    ]),
+    # 11. JPEG ARTIFACTS - uncompressed is unusual for photos but common for AI
+    ('jpeg', 'jpeg', [
+        ([('jpeg_suspicious', '==', 1), ('jpeg_unusual_quality', '==', 1)], {'ai_generated': 0.6},
+         ('ai_generated', "⚠ Unusual compression: {jpeg_quality}"),
+         "Unusual compression: {jpeg_quality}"),
+        ([('jpeg_suspicious', '==', 1)], {'ai_edited': 0.5},
+         ('ai_edited', "⚠ Suspicious JPEG patterns ({jpeg_quality})"),
+         "Suspicious patterns"),
+    ]),
+    # 12. COPY-MOVE (CLONE) DETECTION
+    ('copy_move', 'copy_move', [
+        ([('clone_detected', '==', 1)], {'ai_edited': 1.0},
+         ('ai_edited', "⚠ Cloned regions detected ({clone_area_pct:.1f}% of image, shift {clone_shift})"),
+         "Cloned regions ({clone_area_pct:.1f}% of image)"),
+    ]),
+    # 13. EXIF THUMBNAIL CONSISTENCY
+    ('thumbnail', 'thumbnail', [
+        ([('thumbnail_mismatch', '==', 1)], {'ai_edited': 1.0},
+         ('ai_edited', "⚠ EXIF thumbnail differs from image (SSIM {thumbnail_ssim:.2f})"),
+         "Thumbnail mismatch (SSIM {thumbnail_ssim:.2f})"),
+        ([('thumbnail_present', '==', 1)], {},
+         None,
+         "Thumbnail matches image"),
+    ]),
+]
+
+_OPERATORS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt,
+              '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+def extract_features(metadata, jpeg_analysis, chromatic_analysis, color_analysis, texture_analysis,
+                     gan_detection, noise_inconsistency, benford_analysis, cfa_detection,
+                     double_jpeg, gradient_analysis, image_path=None, copy_move=None,
+                     thumbnail_analysis=None):
+    """
+    Flattens the detector outputs consumed by the classifier into one
+    feature row. Arguments are the same as for `classify_image`.
+
+    Returns:
+        tuple: (np.ndarray of len(FEATURES) float64, dict of the text values
+        only needed to render evidence strings)
+    """
+    row = np.zeros(len(FEATURES), dtype=np.float64)
+
+    def put(name, value):
+        row[FEATURE_INDEX[name]] = float(value)
+
+    # Year of the first EXIF date field; old (pre-AI era) images are scored differently
+    image_year = None
+    if metadata.get('exif'):
+        date_fields = ['DateTime', 'DateTimeOriginal', 'DateTimeDigitized', 'DateTime']
+        for field in date_fields:
+            date_str = metadata['exif'].get(field, '')
+            if date_str and len(str(date_str)) >= 4:
+                year_str = str(date_str)[:4]
+                if year_str.isdigit():
+                    image_year = int(year_str)
+                    break
+    put('image_year', np.nan if image_year is None else image_year)
+
+    put('cfa_detected', bool(cfa_detection.get('cfa_pattern_detected')))
+    put('cfa_strength', cfa_detection.get('cfa_strength', 0))
+
+    put('gan_detected', bool(gan_detection.get('gan_signature_detected')))
+    put('gan_suspicious', bool(gan_detection.get('is_suspicious')))
+    put('gan_high_freq', gan_detection.get('high_freq_pattern_score', 0))
+
+    put('noise_suspicious', bool(noise_inconsistency.get('is_suspicious')))
+    put('noise_confidence', NOISE_CONFIDENCE_LEVELS.get(noise_inconsistency.get('confidence', 'Low'), 0))
+    put('noise_regions', noise_inconsistency.get('suspicious_regions', 0))
+
+    put('benford_follows', bool(benford_analysis.get('follows_benford')))
+    put('benford_suspicious', bool(benford_analysis.get('is_suspicious')))
+    put('benford_deviation', benford_analysis.get('benford_deviation', 0))
+    put('benford_p', benford_analysis.get('p_value', 0))
+
+    anomalies = metadata.get('anomalies', [])
+    software_tags = metadata.get('software_tags', [])
+    put('has_exif', bool(metadata.get('exif', {})) and 'No EXIF data found' not in str(anomalies))
+    put('has_software', bool(software_tags))
+    put('editing_software', any(any(term in tag.lower() for term in EDITING_SOFTWARE_TERMS)
+                                for tag in software_tags))
+
+    put('double_detected', bool(double_jpeg.get('double_compression_detected')))
+    put('double_likely_edited', bool(double_jpeg.get('likely_edited')))
+
+    put('gradient_unnatural', bool(gradient_analysis.get('unnatural_smoothness_detected')))
+    put('gradient_smoothness', gradient_analysis.get('gradient_smoothness', 0))
+
+    put('chromatic_present', bool(chromatic_analysis.get('has_chromatic_aberration')))
+    put('chromatic_suspicious', bool(chromatic_analysis.get('is_suspicious')))
+    put('aberration_score', chromatic_analysis.get('aberration_score', 0))
+
+    put('color_ai_signature', bool(color_analysis.get('ai_signature_detected')))
+    put('color_unusual', bool(color_analysis.get('unusual_patterns')))
+    put('color_saturation', color_analysis.get('color_saturation_avg', 0))
+
+    put('texture_repetition', bool(texture_analysis.get('repetition_detected')))
+    put('texture_suspicious', bool(texture_analysis.get('is_suspicious')))
+    put('texture_variance', texture_analysis.get('texture_variance', 0))
+
+    quality = jpeg_analysis.get('compression_quality_estimate', 'Unknown')
+    put('jpeg_suspicious', bool(jpeg_analysis.get('is_suspicious')))
+    put('jpeg_unusual_quality', 'Uncompressed' in str(quality) or 'Very High' in str(quality))
+
+    copy_move = copy_move or {}
+    put('clone_detected', bool(copy_move.get('clone_detected')))
+    put('clone_area_pct', copy_move.get('clone_area_ratio', 0) * 100)
+
+    thumbnail_analysis = thumbnail_analysis or {}
+    put('thumbnail_present', bool(thumbnail_analysis.get('has_thumbnail')))
+    put('thumbnail_mismatch', bool(thumbnail_analysis.get('thumbnail_mismatch')))
+    put('thumbnail_ssim', thumbnail_analysis.get('structural_similarity', 0))
+
+    context = {
+        'image_year': image_year,
+        'cfa_pattern_type': cfa_detection.get('pattern_type'),
+        'noise_regions': noise_inconsistency.get('suspicious_regions', 0),
+        'software': ', '.join(software_tags),
+        'double_count': double_jpeg.get('compression_count_estimate'),
+        'jpeg_quality': quality,
+        'clone_shift': copy_move.get('dominant_shift')
+    }
+    return row, context
+
+def build_feature_matrix(analyses):
+    """
+    Stacks the features of many images.
+
+    Args:
+        analyses (iterable): dicts of `classify_image` keyword arguments
+
+    Returns:
+        tuple: ((N, len(FEATURES)) float64 matrix, list of N evidence contexts)
+    """
+    rows, contexts = [], []
+    for analysis in analyses:
+        row, context = extract_features(**analysis)
+        rows.append(row)
+        contexts.append(context)
+    matrix = np.vstack(rows) if rows else np.zeros((0, len(FEATURES)))
+    return matrix, contexts
+
+def _merge_config(config):
+    """
+    Overlays a partial classifier config on the defaults.
+
+    Raises:
+        ValueError: If the config names a key DEFAULT_CLASSIFIER_CONFIG does not have
+    """
+    merged = copy.deepcopy(DEFAULT_CLASSIFIER_CONFIG)
+    for key, value in (config or {}).items():
+        if key not in merged:
+            raise ValueError(f"Unknown classifier config key: {key!r}")
+        if isinstance(value, dict) and isinstance(merged[key], dict):
+            for sub_key, sub_value in value.items():
+                if sub_key not in merged[key]:
+                    raise ValueError(f"Unknown classifier config key: '{key}.{sub_key}'")
+                if isinstance(sub_value, dict) and isinstance(merged[key][sub_key], dict):
+                    unknown = sorted(set(sub_value) - set(merged[key][sub_key]))
+                    if unknown:
+                        raise ValueError(f"Unknown classifier config key: '{key}.{sub_key}.{unknown[0]}'")
+                    merged[key][sub_key].update(sub_value)
+                else:
+                    merged[key][sub_key] = sub_value
         else:
-            ai_edited_score += weights['jpeg'] * 0.5
-            evidence['ai_edited'].append(f"⚠ Suspicious JPEG patterns ({quality})")
-            jpeg_evidence.append(f"Suspicious patterns")
-    
+            merged[key] = value
+    return merged
+
+def _branch_masks(features, is_old):
+    """
+    Evaluates every rule group over the feature matrix.
+
+    Returns:
+        list: per group, an (N,) int array with the index of the branch taken (-1 for none)
+    """
+    def column(name):
+        return is_old if name == 'is_old' else features[:, FEATURE_INDEX[name]]
+
+    taken = []
+    for _, _, branches in RULES:
+        choice = np.full(len(features), -1, dtype=np.int64)
+        for b, (clauses, _, _, _) in enumerate(branches):
+            mask = choice < 0
+            for name, op, threshold in clauses:
+                mask &= _OPERATORS[op](column(name), threshold)
+            choice[mask] = b
+        taken.append(choice)
+    return taken
+
+def classify_batch(features, config=None):
+    """
+    Classifies a batch of images from their feature matrix.
+
+    The rule table is applied column-wise, so verdicts, confidences and
+    probabilities for the whole batch come from a few array operations.
+    Evidence strings are not built here; see `render_result`.
+
+    Args:
+        features (np.ndarray): (N, len(FEATURES)) matrix from `build_feature_matrix`
+        config (dict): Optional overrides of DEFAULT_CLASSIFIER_CONFIG
+
+    Returns:
+        dict: 'verdict' and 'confidence' (N,) indices into VERDICTS and
+        CONFIDENCE_LEVELS, 'probabilities' and 'raw_scores' (N, 3) in
+        CATEGORIES order, plus the intermediate arrays `render_result` needs
+    """
+    config = _merge_config(config)
+    features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+    n = len(features)
+
+    image_year = features[:, FEATURE_INDEX['image_year']]
+    first_year, last_year = config['old_image_years']
+    with np.errstate(invalid='ignore'):
+        is_old = (image_year >= first_year) & (image_year < last_year)
+        pre_ai = is_old & (image_year < config['ai_era_year'])
+
+    old_weights = config['weights']['old_image']
+    modern_weights = config['weights']['modern']
+
+    taken = _branch_masks(features, is_old)
+    scores = np.zeros((n, len(CATEGORIES)), dtype=np.float64)
+    for (_, weight_key, branches), choice in zip(RULES, taken):
+        for b, (_, multipliers, _, _) in enumerate(branches):
+            mask = choice == b
+            for category, multiplier in multipliers.items():
+                weight = np.where(is_old, old_weights[weight_key] * multiplier,
+                                  modern_weights[weight_key] * multiplier)
+                scores[:, CATEGORIES.index(category)] += np.where(mask, weight, 0.0)
+
     # Calculate total and percentages
-    total_score = ai_generated_score + ai_edited_score + real_photo_score
-    
-    if total_score == 0:
-        total_score = 100  # Prevent division by zero
-        real_photo_score = 50
-        ai_edited_score = 30
-        ai_generated_score = 20
-    
-    ai_gen_pct = round((ai_generated_score / total_score) * 100, 2)
-    ai_edit_pct = round((ai_edited_score / total_score) * 100, 2)
-    real_pct = round((real_photo_score / total_score) * 100, 2)
-    
-    # Determine verdict
-    max_score = max(ai_generated_score, ai_edited_score, real_photo_score)
-    
-    # Special handling for old images
-    if is_old_image and real_photo_score > ai_generated_score * 0.7:
-        # If it's from pre-AI era and has reasonable real score, favor real photo
-        verdict = "Likely Real Photo"
-    elif max_score == ai_generated_score:
-        # Double check: Old images can't be AI generated if they predate AI technology
-        if is_old_image and image_year < 2015:  # Before modern GAN era
-            verdict = "Likely Real Photo"
-            evidence['real_photo'].append(f"✓✓ Image predates modern AI technology ({image_year})")
-        else:
-            verdict = "AI Generated"
-    elif max_score == ai_edited_score:
-        verdict = "AI Edited / Modified"
-    else:
-        verdict = "Likely Real Photo"
-    
+    total = scores.sum(axis=1)
+    empty = total == 0
+    scores[empty] = (20, 30, 50)  # Prevent division by zero
+    total[empty] = 100
+    probabilities = np.round(scores / total[:, None] * 100, 2)
+
+    # Determine verdict (ties go to the first category, as in the per-image rules)
+    best = np.argmax(scores, axis=1)
+    ai_generated, real_photo = scores[:, AI_GENERATED], scores[:, REAL_PHOTO]
+    favour_real = is_old & (real_photo > ai_generated * config['old_image_real_ratio'])
+    # Old images can't be AI generated if they predate AI technology
+    predates_ai = ~favour_real & (best == AI_GENERATED) & pre_ai
+    verdict = np.where(favour_real | predates_ai, REAL_PHOTO, best)
+
     # Calculate confidence based on score separation
-    score_diff = max_score - sorted([ai_generated_score, ai_edited_score, real_photo_score])[-2]
-    score_ratio = score_diff / total_score if total_score > 0 else 0
-    
-    # More lenient confidence for old images
-    if is_old_image:
-        if score_ratio > 0.15:  # Lower threshold for old images
-            confidence = "High"
-        elif score_ratio > 0.08:
-            confidence = "Medium"
-        else:
-            confidence = "Low"
-    else:
-        if score_ratio > 0.25:  # Clear winner (>25% gap)
-            confidence = "High"
-        elif score_ratio > 0.12:  # Moderate separation (>12% gap)
-            confidence = "Medium"
-        else:  # Close scores
-            confidence = "Low"
-    
+    ordered = np.sort(scores, axis=1)
+    score_ratio = (ordered[:, -1] - ordered[:, -2]) / total
+    old_high, old_medium = config['confidence_thresholds']['old_image']
+    high, medium = config['confidence_thresholds']['modern']
+    confidence = np.where(score_ratio > np.where(is_old, old_high, high), 2,
+                          np.where(score_ratio > np.where(is_old, old_medium, medium), 1, 0))
+
     # Additional confidence adjustments
-    if verdict == "Likely Real Photo":
-        if is_old_image:
-            # Old images get benefit of doubt
-            if confidence == "Low":
-                confidence = "Medium"
-        else:
-            # Real photos should have strong CFA (for modern images)
-            if cfa_detection.get('cfa_pattern_detected'):
-                if confidence == "Medium":
-                    confidence = "High"
-            else:
-                # No CFA = can't be high confidence real photo
-                if confidence == "High":
-                    confidence = "Medium"
-    
-    elif verdict == "AI Generated":
-        # AI generated should have NO CFA
-        if not cfa_detection.get('cfa_pattern_detected') and gan_detection.get('gan_signature_detected'):
-            if confidence == "Medium":
-                confidence = "High"
-        # Can't be AI generated if it's from before AI era
-        if is_old_image and image_year < 2015:
-            verdict = "Likely Real Photo"
-            confidence = "Medium"
-            evidence['real_photo'].append("✓✓ Corrected: Image too old to be AI-generated")
-    
-    # Compile all evidence for display
-    all_evidence = {
-        'cfa': cfa_evidence,
-        'gan': gan_evidence,
-        'noise': noise_evidence,
-        'benford': benford_evidence,
-        'double_jpeg': double_jpeg_evidence,
-        'gradient': gradient_evidence,
-        'metadata': metadata_evidence,
-        'chromatic': chromatic_evidence,
-        'jpeg': jpeg_evidence,
-        'color': color_evidence,
-        'texture': texture_evidence
-    }
-    
+    cfa = features[:, FEATURE_INDEX['cfa_detected']] == 1
+    gan = features[:, FEATURE_INDEX['gan_detected']] == 1
+    real = verdict == REAL_PHOTO
+    # Old images get benefit of doubt; modern real photos need a CFA for High
+    confidence = np.where(real & is_old & (confidence == 0), 1, confidence)
+    confidence = np.where(real & ~is_old & cfa & (confidence == 1), 2, confidence)
+    confidence = np.where(real & ~is_old & ~cfa & (confidence == 2), 1, confidence)
+    generated = verdict == AI_GENERATED
+    confidence = np.where(generated & ~cfa & gan & (confidence == 1), 2, confidence)
+    corrected = generated & pre_ai
+    verdict = np.where(corrected, REAL_PHOTO, verdict)
+    confidence = np.where(corrected, 1, confidence)
+
     return {
         'verdict': verdict,
         'confidence': confidence,
-        'probabilities': {
-            'ai_generated': ai_gen_pct,
-            'ai_edited': ai_edit_pct,
-            'real_photo': real_pct
-        },
+        'probabilities': probabilities,
+        'raw_scores': scores,
+        'is_old': is_old,
+        'predates_ai': predates_ai,
+        'corrected': corrected,
+        'branches': np.stack(taken, axis=1) if taken else np.zeros((n, 0), dtype=np.int64)
+    }
+
+def render_result(batch, index, features, context):
+    """
+    Builds the full `classify_image` result, evidence strings included,
+    for one row of a `classify_batch` result.
+
+    Args:
+        batch (dict): Output of `classify_batch`
+        index (int): Row to render
+        features (np.ndarray): The feature matrix passed to `classify_batch`
+        context (dict): The row's evidence context from `extract_features`
+
+    Returns:
+        dict: Classification results with probabilities and evidence
+    """
+    values = dict(zip(FEATURES, features[index].tolist()))
+    values.update(context)
+
+    evidence = {category: [] for category in CATEGORIES}
+    all_evidence = {section: [] for section in EVIDENCE_SECTIONS}
+
+    if batch['is_old'][index]:
+        evidence['real_photo'].append(f"✓ Old image from {context['image_year']} (pre-AI era)")
+
+    for (section, _, branches), b in zip(RULES, batch['branches'][index]):
+        if b < 0:
+            continue
+        _, _, categorized, detail = branches[b]
+        if categorized:
+            evidence[categorized[0]].append(categorized[1].format(**values))
+        if detail:
+            all_evidence[section].append(detail.format(**values))
+
+    if batch['predates_ai'][index]:
+        evidence['real_photo'].append(f"✓✓ Image predates modern AI technology ({context['image_year']})")
+    if batch['corrected'][index]:
+        evidence['real_photo'].append("✓✓ Corrected: Image too old to be AI-generated")
+
+    probabilities = batch['probabilities'][index]
+    raw_scores = batch['raw_scores'][index]
+    return {
+        'verdict': VERDICTS[batch['verdict'][index]],
+        'confidence': CONFIDENCE_LEVELS[batch['confidence'][index]],
+        'probabilities': {category: float(probabilities[i]) for i, category in enumerate(CATEGORIES)},
         'evidence': all_evidence,
         'categorized_evidence': evidence,
-        'raw_scores': {
-            'ai_generated': round(ai_generated_score, 3),
-            'ai_edited': round(ai_edited_score, 3),
-            'real_photo': round(real_photo_score, 3)
-        }
+        'raw_scores': {category: round(float(raw_scores[i]), 3) for i, category in enumerate(CATEGORIES)}
     }
+
+def classify_image(metadata, jpeg_analysis, chromatic_analysis, color_analysis, texture_analysis,
+                   gan_detection, noise_inconsistency, benford_analysis, cfa_detection,
+                   double_jpeg, gradient_analysis, image_path, copy_move=None,
+                   thumbnail_analysis=None, config=None):
+    """
+    Advanced AI Image Classifier
+    Combines multiple forensic analyses to determine if an image is AI-generated, AI-edited, or real.
+
+    Args:
+        metadata (dict): Metadata analysis results
+        jpeg_analysis (dict): JPEG artifacts analysis
+        chromatic_analysis (dict): Chromatic aberration analysis
+        color_analysis (dict): Color distribution analysis
+        texture_analysis (dict): Texture consistency analysis
+        gan_detection (dict): GAN fingerprint detection results
+        noise_inconsistency (dict): Advanced noise analysis results
+        benford_analysis (dict): Benford's Law analysis results
+        cfa_detection (dict): CFA pattern detection results
+        double_jpeg (dict): Double JPEG compression results
+        gradient_analysis (dict): Gradient anomaly detection results
+        image_path (str): Path to the image
+        copy_move (dict): Optional copy-move (clone) detection results
+        thumbnail_analysis (dict): Optional EXIF thumbnail consistency results
+        config (dict): Optional overrides of DEFAULT_CLASSIFIER_CONFIG
+
+    Returns:
+        dict: Classification results with probabilities and evidence
+    """
+    row, context = extract_features(
+        metadata, jpeg_analysis, chromatic_analysis, color_analysis, texture_analysis,
+        gan_detection, noise_inconsistency, benford_analysis, cfa_detection,
+        double_jpeg, gradient_analysis, image_path, copy_move, thumbnail_analysis)
+    features = row[None, :]
+    return render_result(classify_batch(features, config), 0, features, context)
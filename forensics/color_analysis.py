@@ -2,14 +2,133 @@ import numpy as np
 from PIL import Image
 import cv2
 
-def analyze_color_distribution(image_path):
+# Row order of ColorHistogram.channels
+HISTOGRAM_CHANNELS = ('b', 'g', 'r', 'h', 's', 'v')
+
+# Bins of the joint hue/saturation histogram (OpenCV hue spans 0-179)
+HUE_BINS = 18
+SATURATION_BINS = 16
+
+class ColorHistogram:
+    """
+    Mergeable colour histograms accumulated strip by strip.
+
+    The image is walked in row strips; each strip is converted to HSV while
+    it is still in cache and counted into the B, G, R, H, S and V histograms
+    and a joint hue/saturation histogram with OpenCV's 8-bit histogram
+    routine, one call per histogram (packing every channel into a single
+    np.bincount measured several times slower). Means and entropies are
+    derived from the counts, so histograms from tiles, images or whole
+    corpora can be merged by addition and still give exact statistics.
+
+    Usage:
+        baseline = ColorHistogram()
+        for path in image_paths:
+            baseline.merge(ColorHistogram.from_image(path))
+        baseline.save('baseline.npz')
+    """
+
+    def __init__(self, strip_rows=256):
+        """
+        Args:
+            strip_rows (int): Rows processed per strip in `update`
+        """
+        self.strip_rows = strip_rows
+        self.channels = np.zeros((len(HISTOGRAM_CHANNELS), 256), dtype=np.float64)
+        self.hue_saturation = np.zeros((HUE_BINS, SATURATION_BINS), dtype=np.float64)
+        self.pixel_count = 0
+
+    @classmethod
+    def from_image(cls, image_path, strip_rows=256):
+        """Builds the histograms of one image file (empty if it cannot be read)."""
+        histogram = cls(strip_rows)
+        img = cv2.imread(image_path)
+        if img is not None:
+            histogram.update(img)
+        return histogram
+
+    @classmethod
+    def load(cls, path):
+        """Loads histograms written by `save`."""
+        data = np.load(path)
+        histogram = cls()
+        histogram.channels = data['channels'].astype(np.float64)
+        histogram.hue_saturation = data['hue_saturation'].astype(np.float64)
+        histogram.pixel_count = int(data['pixel_count'])
+        return histogram
+
+    def update(self, bgr):
+        """
+        Adds the pixels of a BGR uint8 image or tile.
+
+        Args:
+            bgr (np.ndarray): (H, W, 3) uint8 array
+
+        Returns:
+            ColorHistogram: self, for chaining
+        """
+        for y in range(0, bgr.shape[0], self.strip_rows):
+            strip = bgr[y:y + self.strip_rows]
+            hsv = cv2.cvtColor(strip, cv2.COLOR_BGR2HSV)
+            for row, (source, channel) in enumerate([(strip, 0), (strip, 1), (strip, 2),
+                                                     (hsv, 0), (hsv, 1), (hsv, 2)]):
+                self.channels[row] += cv2.calcHist([source], [channel], None, [256], [0, 256]).ravel()
+            joint = cv2.calcHist([hsv], [0, 1], None, [HUE_BINS, SATURATION_BINS], [0, 180, 0, 256])
+            self.hue_saturation += joint.reshape(HUE_BINS, SATURATION_BINS)
+        self.pixel_count += bgr.shape[0] * bgr.shape[1]
+        return self
+
+    def merge(self, other):
+        """
+        Adds another histogram's counts to this one.
+
+        Args:
+            other (ColorHistogram): Histogram of a tile, image or corpus
+
+        Returns:
+            ColorHistogram: self, for chaining
+        """
+        self.channels += other.channels
+        self.hue_saturation += other.hue_saturation
+        self.pixel_count += other.pixel_count
+        return self
+
+    __iadd__ = merge
+
+    def save(self, path):
+        """Stores the counts as a .npz file."""
+        np.savez(path, channels=self.channels, hue_saturation=self.hue_saturation,
+                 pixel_count=self.pixel_count)
+
+    def channel(self, name):
+        """Returns the 256-bin histogram of one channel ('b', 'g', 'r', 'h', 's' or 'v')."""
+        return self.channels[HISTOGRAM_CHANNELS.index(name)]
+
+    def mean(self, name):
+        """Exact channel mean computed from the counts."""
+        hist = self.channel(name)
+        total = hist.sum()
+        return float(np.dot(hist, np.arange(256)) / total) if total else 0.0
+
+    def entropy(self, name):
+        """Shannon entropy (bits) of one channel histogram."""
+        hist = self.channel(name)
+        total = hist.sum()
+        if not total:
+            return 0.0
+        p = hist[hist > 0] / total
+        return float(-np.sum(p * np.log2(p)))
+
+def analyze_color_distribution(image_path, histogram=None):
     """
     Analyzes color distribution and histogram patterns.
     AI-generated images often have unusual color distributions.
-    
+
     Args:
         image_path (str): The path to the image file.
-        
+        histogram (ColorHistogram): Optional accumulator; this image's
+            histograms are merged into it (e.g. for corpus baselines).
+
     Returns:
         dict: Analysis results.
     """
@@ -19,55 +138,38 @@ def analyze_color_distribution(image_path):
         'unusual_patterns': False,
         'ai_signature_detected': False
     }
-    
+
     try:
         img = cv2.imread(image_path)
         if img is None:
             return results
-            
-        # Convert to HSV for better color analysis
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        
+
+        # Channel and joint hue/saturation histograms in one strip-wise walk
+        color_hist = ColorHistogram().update(img)
+        if histogram is not None:
+            histogram.merge(color_hist)
+
         # Analyze saturation
-        saturation = hsv[:, :, 1]
-        results['color_saturation_avg'] = float(np.mean(saturation))
-        
-        # Calculate histogram for each channel
-        hist_h = cv2.calcHist([hsv], [0], None, [256], [0, 256])
-        hist_s = cv2.calcHist([hsv], [1], None, [256], [0, 256])
-        hist_v = cv2.calcHist([hsv], [2], None, [256], [0, 256])
-        
+        results['color_saturation_avg'] = color_hist.mean('s')
+
         # Calculate uniformity (entropy)
-        def calculate_entropy(hist):
-            hist = hist / np.sum(hist)
-            hist = hist[hist > 0]
-            return -np.sum(hist * np.log2(hist))
-        
-        entropy_h = calculate_entropy(hist_h)
-        entropy_s = calculate_entropy(hist_s)
-        entropy_v = calculate_entropy(hist_v)
-        
-        avg_entropy = (entropy_h + entropy_s + entropy_v) / 3.0
+        avg_entropy = (color_hist.entropy('h') + color_hist.entropy('s') + color_hist.entropy('v')) / 3.0
         results['histogram_uniformity'] = float(avg_entropy)
-        
+
         # AI images often have very high saturation or unusual distributions
         if results['color_saturation_avg'] > 180:
             results['unusual_patterns'] = True
             results['ai_signature_detected'] = True
-        
-        # Check for unrealistic color peaks
-        hist_b = cv2.calcHist([img], [0], None, [256], [0, 256])
-        hist_g = cv2.calcHist([img], [1], None, [256], [0, 256])
-        hist_r = cv2.calcHist([img], [2], None, [256], [0, 256])
-        
-        # Look for unusual spikes in histogram
-        for hist in [hist_b, hist_g, hist_r]:
+
+        # Look for unusual spikes in the B, G and R histograms
+        for name in ('b', 'g', 'r'):
+            hist = color_hist.channel(name)
             max_val = np.max(hist)
             mean_val = np.mean(hist)
             if max_val > mean_val * 50:  # Very high spike
                 results['unusual_patterns'] = True
-                
+
     except Exception as e:
         print(f"Error in color analysis: {e}")
-        
+
     return results
@@ -0,0 +1,249 @@
+import numpy as np
+import cv2
+
+# Longest side of the working copy; copy-move traces survive this downscale
+WORKING_MAX_SIDE = 1024
+
+# A block is textured when its AC energy exceeds this many times the energy
+# that sensor noise alone would give it
+NOISE_AC_MARGIN = 1.5
+
+# A shift needs at least this many matched pairs, and at least this share of
+# the textured blocks, to be considered
+MIN_CLONE_PAIRS = 40
+CLONE_PAIR_FRACTION = 0.0005
+
+# Matched blocks of a shift must form connected regions of at least this many
+# block origins on both the source and the target side
+MIN_REGION_ORIGINS = 64
+
+# Strongest shifts examined for connected regions
+MAX_CANDIDATE_SHIFTS = 10
+
+# Immerkaer's noise-estimation kernel (an 8-connected second difference)
+NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+def _dct_basis(block_size, keep):
+    """Returns the first `keep` rows of the orthonormal DCT-II matrix."""
+    n = np.arange(block_size)
+    k = np.arange(keep)[:, None]
+    basis = np.cos(np.pi * (2 * n + 1) * k / (2 * block_size)) * np.sqrt(2.0 / block_size)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+def extract_block_features(gray, block_size=8, stride=1, keep=4):
+    """
+    Reduced DCT features for every overlapping block, fully vectorized.
+
+    Args:
+        gray (np.ndarray): 2-D float32 image.
+        block_size (int): Side of the square blocks.
+        stride (int): Step between neighbouring block origins.
+        keep (int): Number of low-frequency DCT rows/columns kept per block.
+
+    Returns:
+        tuple: (features, origins) with features of shape (N, keep * keep) and
+        block origins of shape (N, 2) as (y, x).
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(gray, (block_size, block_size))
+    windows = windows[::stride, ::stride]
+    rows, cols = windows.shape[:2]
+
+    basis = _dct_basis(block_size, keep)
+    coeffs = basis @ windows @ basis.T  # (rows, cols, keep, keep)
+    features = coeffs.reshape(rows * cols, keep * keep)
+
+    oy, ox = np.meshgrid(np.arange(rows) * stride, np.arange(cols) * stride, indexing='ij')
+    origins = np.stack([oy.ravel(), ox.ravel()], axis=1)
+    return features, origins
+
+def estimate_noise_sigma(gray):
+    """
+    Robust estimate of the additive noise level of an image.
+
+    The image is filtered with Immerkaer's kernel, which cancels locally
+    linear content, and the noise level is taken from the median absolute
+    response so that edges and texture barely bias it.
+
+    Args:
+        gray (np.ndarray): 2-D float32 image.
+
+    Returns:
+        float: Estimated noise standard deviation in grey levels.
+    """
+    response = cv2.filter2D(gray, -1, NOISE_KERNEL)[1:-1, 1:-1]
+    # The kernel has unit-variance gain 6 and |N(0, 1)| has median 0.6745
+    return float(np.median(np.abs(response)) / (0.6745 * 6.0))
+
+def _region_mask(origins, shape):
+    """Marks block origins that belong to connected regions of at least MIN_REGION_ORIGINS."""
+    seeds = np.zeros(shape, dtype=np.uint8)
+    seeds[origins[:, 0], origins[:, 1]] = 1
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(seeds, connectivity=8)
+    large = stats[:, cv2.CC_STAT_AREA] >= MIN_REGION_ORIGINS
+    large[0] = False  # background
+    return large[labels[origins[:, 0], origins[:, 1]]]
+
+def match_blocks(features, origins, min_shift, tolerance=1, neighbours=4):
+    """
+    Finds pairs of similar blocks by lexicographic sorting.
+
+    Only rows that end up close in sorted order are compared, so the cost is
+    dominated by the O(N log N) sort rather than an all-pairs comparison.
+
+    Args:
+        features (np.ndarray): Quantized integer features, shape (N, F).
+        origins (np.ndarray): Block origins, shape (N, 2).
+        min_shift (float): Minimum distance between matched blocks.
+        tolerance (int): Maximum per-feature difference for a match.
+        neighbours (int): How many following rows in sorted order to compare.
+
+    Returns:
+        tuple: (first, second, shifts) index arrays and (M, 2) shift vectors
+        normalised to point downwards (or right when dy == 0).
+    """
+    # Big-endian unsigned packing makes a byte-wise sort lexicographic, which
+    # is several times faster than np.lexsort over every feature column
+    packed = np.clip(features, -32768, 32767).astype(np.int64) + 32768
+    packed = np.ascontiguousarray(packed.astype('>u2'))
+    order = np.argsort(packed.view(f'V{2 * features.shape[1]}').ravel(), kind='stable')
+    sorted_features = features[order]
+
+    firsts, seconds = [], []
+    for offset in range(1, neighbours + 1):
+        if offset >= len(order):
+            break
+        diff = np.abs(sorted_features[offset:] - sorted_features[:-offset]).max(axis=1)
+        idx = np.nonzero(diff <= tolerance)[0]
+        firsts.append(idx)
+        seconds.append(idx + offset)
+
+    if not firsts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros((0, 2), dtype=np.int64)
+
+    first = order[np.concatenate(firsts)]
+    second = order[np.concatenate(seconds)]
+    shifts = origins[second] - origins[first]
+
+    # Canonical direction so that A->B and B->A share a histogram bin
+    flip = (shifts[:, 0] < 0) | ((shifts[:, 0] == 0) & (shifts[:, 1] < 0))
+    shifts[flip] *= -1
+    first, second = np.where(flip, second, first), np.where(flip, first, second)
+
+    far = np.hypot(shifts[:, 0], shifts[:, 1]) >= min_shift
+    return first[far], second[far], shifts[far]
+
+def detect_copy_move(image_path, return_mask=False):
+    """
+    Detects copy-move (cloned) regions using block matching.
+    Duplicated regions share a consistent shift vector between many blocks.
+
+    Args:
+        image_path (str): Path to image file
+        return_mask (bool): If True, includes the full-size clone mask
+
+    Returns:
+        dict: Copy-move detection results
+    """
+    results = {
+        'clone_detected': False,
+        'clone_area_ratio': 0.0,
+        'matched_block_pairs': 0,
+        'dominant_shift': (0, 0),
+        'shift_histogram': [],
+        'is_suspicious': False
+    }
+
+    try:
+        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            return results
+
+        h, w = img.shape
+        if return_mask:
+            results['clone_mask'] = np.zeros((h, w), dtype=np.uint8)
+
+        scale = min(1.0, WORKING_MAX_SIDE / max(h, w))
+        if scale < 1.0:
+            work = cv2.resize(img, (max(int(w * scale), 1), max(int(h * scale), 1)),
+                              interpolation=cv2.INTER_AREA)
+        else:
+            work = img
+
+        block_size = 8
+        if min(work.shape) < block_size * 4:
+            return results
+
+        features, origins = extract_block_features(work.astype(np.float32), block_size)
+
+        # Flat blocks (sky, walls) match everywhere and carry no evidence. With
+        # an orthonormal DCT every AC coefficient of pure noise has the noise's
+        # variance, so noisy but flat blocks are rejected relative to it.
+        ac_energy = np.sqrt(np.sum(features[:, 1:] ** 2, axis=1))
+        noise_ac_energy = estimate_noise_sigma(work.astype(np.float32)) * np.sqrt(features.shape[1] - 1)
+        textured = ac_energy > max(2.0 * block_size, NOISE_AC_MARGIN * noise_ac_energy)
+        features, origins = features[textured], origins[textured]
+        if len(features) < 2:
+            return results
+
+        # Coarser quantization for higher frequencies (JPEG-like step)
+        keep = int(np.sqrt(features.shape[1]))
+        u, v = np.meshgrid(np.arange(keep), np.arange(keep), indexing='ij')
+        steps = (3.0 * (1 + u + v)).ravel().astype(np.float32)
+        quantized = np.round(features / steps).astype(np.int32)
+
+        first, second, shifts = match_blocks(quantized, origins, min_shift=2 * block_size)
+
+        # Shift histogram: genuine clones share one displacement across many blocks
+        if len(shifts):
+            # One integer code per shift makes the histogram a 1-D unique
+            span = 2 * work.shape[1] + 1
+            codes = shifts[:, 0].astype(np.int64) * span + (shifts[:, 1] + work.shape[1])
+            unique_codes, inverse, counts = np.unique(codes, return_inverse=True, return_counts=True)
+            unique_shifts = np.stack([unique_codes // span, unique_codes % span - work.shape[1]], axis=1)
+            min_pairs = max(MIN_CLONE_PAIRS, CLONE_PAIR_FRACTION * len(features))
+
+            top = np.argsort(-counts)[:5]
+            results['shift_histogram'] = [
+                ((int(round(unique_shifts[i][0] / scale)), int(round(unique_shifts[i][1] / scale))), int(counts[i]))
+                for i in top
+            ]
+
+            # Genuine clones are contiguous: keep a shift only where its matched
+            # blocks form large connected regions on both sides
+            keep_pairs = np.zeros(len(shifts), dtype=bool)
+            for candidate in np.argsort(-counts)[:MAX_CANDIDATE_SHIFTS]:
+                if counts[candidate] < min_pairs:
+                    break
+                members = np.nonzero(inverse == candidate)[0]
+                in_regions = (_region_mask(origins[first[members]], work.shape)
+                              & _region_mask(origins[second[members]], work.shape))
+                if np.sum(in_regions) >= min_pairs:
+                    keep_pairs[members[in_regions]] = True
+
+            if np.any(keep_pairs):
+                marked = np.concatenate([origins[first[keep_pairs]], origins[second[keep_pairs]]])
+
+                seeds = np.zeros(work.shape, dtype=np.uint8)
+                seeds[marked[:, 0], marked[:, 1]] = 1
+                # Grow every block origin into its full block
+                kernel = np.ones((block_size, block_size), np.uint8)
+                mask = cv2.dilate(seeds, kernel, anchor=(block_size - 1, block_size - 1))
+
+                kept_codes, kept_counts = np.unique(inverse[keep_pairs], return_counts=True)
+                dominant = unique_shifts[kept_codes[np.argmax(kept_counts)]]
+
+                results['clone_detected'] = True
+                results['is_suspicious'] = True
+                results['matched_block_pairs'] = int(np.sum(keep_pairs))
+                results['dominant_shift'] = (int(round(dominant[0] / scale)), int(round(dominant[1] / scale)))
+                results['clone_area_ratio'] = float(np.mean(mask))
+
+                if return_mask:
+                    results['clone_mask'] = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
+
+    except Exception as e:
+        print(f"Error in copy-move detection: {e}")
+
+    return results
@@ -1,29 +1,80 @@
 from PIL import Image, ImageChops, ImageEnhance
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
 import os
 
-def perform_ela(image_path, quality=90):
+# Huge images are re-encoded in tiles of this side; a multiple of 16 keeps the
+# tiles aligned with the 8x8 blocks and 2x2-subsampled chroma MCUs
+ELA_TILE_SIZE = 2048
+
+# Robust z-score above which a block's error level is an outlier
+ELA_OUTLIER_Z = 3.0
+
+# Re-encoding qualities swept by the JPEG-ghost analyser
+GHOST_QUALITIES = tuple(range(50, 101, 5))
+
+# On a block's difference curve normalised to [0, 1], a ghost is a valley
+# whose bottom lies within GHOST_FLOOR of the curve minimum and that rises
+# by at least GHOST_MIN_DEPTH on both sides
+GHOST_FLOOR = 0.1
+GHOST_MIN_DEPTH = 0.03
+
+def _recompress(image, quality):
+    """JPEG round trip of an RGB PIL image in memory; returns a uint8 array."""
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    buffer.seek(0)
+    with Image.open(buffer) as resaved:
+        return np.asarray(resaved if resaved.mode == 'RGB' else resaved.convert('RGB'))
+
+def ela_difference(image, quality=90, tile_size=ELA_TILE_SIZE):
+    """
+    Absolute difference between an image and its JPEG re-encoding.
+
+    Everything happens in memory, so concurrent calls are independent. Images
+    larger than `tile_size` are re-encoded tile by tile on the JPEG grid.
+
+    Args:
+        image (PIL.Image): RGB image
+        quality (int): JPEG quality used for re-encoding
+        tile_size (int): Tile side in pixels (multiple of 16)
+
+    Returns:
+        np.ndarray: uint8 (H, W, 3) difference
+    """
+    original = np.asarray(image)
+    h, w = original.shape[:2]
+    if h <= tile_size and w <= tile_size:
+        resaved = _recompress(image, quality)
+    else:
+        resaved = np.empty_like(original)
+        for y in range(0, h, tile_size):
+            for x in range(0, w, tile_size):
+                tile = Image.fromarray(original[y:y + tile_size, x:x + tile_size])
+                resaved[y:y + tile_size, x:x + tile_size] = _recompress(tile, quality)
+    return cv2.absdiff(original, resaved)
+
+def perform_ela(image_path, quality=90, return_array=False):
     """
     Performs Error Level Analysis (ELA) on an image.
     
     Args:
         image_path (str): The path to the image file.
         quality (int): The JPEG quality to use for re-saving the image.
+        return_array (bool): If True, also returns the raw difference array.
         
     Returns:
-        PIL.Image: An image representing the ELA result.
+        PIL.Image: An image representing the ELA result, or
+        (PIL.Image, np.ndarray) if return_array is True.
     """
     try:
         original_image = Image.open(image_path).convert('RGB')
         
-        # Re-save the image at a specific quality
-        temp_filename = 'temp_ela_image.jpg'
-        original_image.save(temp_filename, 'JPEG', quality=quality)
-        
-        # Load the re-saved image
-        resaved_image = Image.open(temp_filename)
-        
-        # Find the difference between the original and re-saved images
-        ela_image = ImageChops.difference(original_image, resaved_image)
+        # Re-save the image in memory and take the difference
+        difference = ela_difference(original_image, quality)
+        ela_image = Image.fromarray(difference)
         
         # Enhance the ELA image to make differences more visible
         extrema = ela_image.getextrema()
@@ -34,17 +85,183 @@ def perform_ela(image_path, quality=90):
         scale = 255.0 / max_diff
         ela_image = ImageEnhance.Brightness(ela_image).enhance(scale)
         
-        # Clean up the temporary file
-        os.remove(temp_filename)
-        
+        if return_array:
+            return ela_image, difference
         return ela_image
         
     except Exception as e:
         print(f"Error during ELA: {e}")
-        # Clean up if error occurs
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        return None
+        return (None, None) if return_array else None
+
+def analyze_ela(image_path, quality=90, block_size=16):
+    """
+    Numeric error-level statistics per block.
+    Regions pasted from another source or re-saved at a different quality
+    stand out with an error level unlike the rest of the image.
+    
+    Args:
+        image_path (str): The path to the image file.
+        quality (int): The JPEG quality to use for re-saving the image.
+        block_size (int): Block side of the error map in pixels.
+        
+    Returns:
+        dict: Error-level statistics and the per-block error map.
+    """
+    results = {
+        'ela_mean': 0.0,
+        'ela_max': 0,
+        'block_error_std': 0.0,
+        'outlier_block_ratio': 0.0,
+        'block_errors': np.zeros((0, 0), dtype=np.float32),
+        'is_suspicious': False
+    }
+    
+    try:
+        original_image = Image.open(image_path).convert('RGB')
+        error = ela_difference(original_image, quality).max(axis=2)
+        
+        results['ela_mean'] = float(np.mean(error))
+        results['ela_max'] = int(np.max(error))
+        
+        # Mean error per block via one reshape reduction
+        rows, cols = error.shape[0] // block_size, error.shape[1] // block_size
+        if rows == 0 or cols == 0:
+            return results
+        blocks = error[:rows * block_size, :cols * block_size].reshape(rows, block_size, cols, block_size)
+        block_errors = blocks.mean(axis=(1, 3), dtype=np.float32)
+        results['block_errors'] = block_errors
+        results['block_error_std'] = float(np.std(block_errors))
+        
+        # Blocks whose error level departs from the image's typical level
+        median = np.median(block_errors)
+        mad = 1.4826 * np.median(np.abs(block_errors - median))
+        z_scores = np.abs(block_errors - median) / max(mad, 0.5)
+        results['outlier_block_ratio'] = float(np.mean(z_scores > ELA_OUTLIER_Z))
+        
+        # A compact set of outlying blocks suggests a locally edited region
+        if 0.01 < results['outlier_block_ratio'] < 0.3:
+            results['is_suspicious'] = True
+        
+    except Exception as e:
+        print(f"Error during ELA analysis: {e}")
+    
+    return results
+
+def _block_sampled_mosaic(img, block_size, stride):
+    """Keeps every `stride`-th block in each direction, preserving the JPEG grid inside blocks."""
+    rows, cols = img.shape[0] // block_size, img.shape[1] // block_size
+    blocks = img[:rows * block_size, :cols * block_size].reshape(rows, block_size, cols, block_size, -1)
+    sampled = blocks[::stride, :, ::stride]
+    return np.ascontiguousarray(sampled.reshape(sampled.shape[0] * block_size, sampled.shape[2] * block_size, -1))
+
+def _ghost_block_difference(img, quality, block_size):
+    """Block-averaged squared difference between an image and its re-encoding at one quality."""
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError(f"JPEG encoding failed at quality {quality}")
+    diff = cv2.absdiff(img, cv2.imdecode(encoded, cv2.IMREAD_COLOR)).astype(np.float32)
+    rows, cols = img.shape[0] // block_size, img.shape[1] // block_size
+    return (diff * diff).reshape(rows, block_size, cols, block_size, 3).mean(axis=(1, 3, 4))
+
+def detect_jpeg_ghosts(image_path, qualities=GHOST_QUALITIES, block_size=16, max_side=None, workers=None):
+    """
+    JPEG-ghost analysis: sweeps re-encoding qualities to find the quality a
+    region was previously saved at. A region re-encoded at its earlier
+    quality changes least, so its difference curve dips there; regions
+    pasted from a different source dip at a different quality.
+    
+    Encodes run in parallel on a thread pool and each one is reduced to a
+    block-averaged difference map straight away.
+    
+    Args:
+        image_path (str): The path to the image file.
+        qualities (sequence): JPEG qualities to test.
+        block_size (int): Block side in pixels (multiple of 16 keeps chroma MCUs whole).
+        max_side (int): Optional triage size; larger images are reduced to a
+            mosaic of every n-th block, which keeps the JPEG grid intact.
+        workers (int): Thread pool size (None lets Python choose).
+        
+    Returns:
+        dict: Per-block quality map (0 for flat blocks), dominant prior
+        quality, quality of the latest save and ghost statistics.
+    """
+    results = {
+        'quality_map': np.zeros((0, 0), dtype=np.int32),
+        'dominant_quality': None,
+        'last_quality': None,
+        'ghost_block_ratio': 0.0,
+        'qualities_tested': list(qualities),
+        'block_stride': 1,
+        'is_suspicious': False
+    }
+    
+    try:
+        img = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if img is None:
+            return results
+        
+        if max_side and max(img.shape[:2]) > max_side:
+            results['block_stride'] = int(np.ceil(max(img.shape[:2]) / float(max_side)))
+        img = _block_sampled_mosaic(img, block_size, results['block_stride'])
+        if img.size == 0:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            curves = np.stack(list(pool.map(lambda q: _ghost_block_difference(img, q, block_size), qualities)))
+        
+        quality_values = np.asarray(qualities)
+        
+        # Flat blocks are unchanged at every quality and carry no evidence
+        textured = curves.max(axis=0) > 1.0
+        results['quality_map'] = np.zeros(curves.shape[1:], dtype=np.int32)
+        if not np.any(textured):
+            return results
+        
+        # The latest save is where the whole image changes least; a minimum
+        # at the top tested quality means no visible earlier compression
+        last_index = int(np.argmin(np.median(curves[:, textured], axis=1)))
+        if last_index < len(quality_values) - 1:
+            results['last_quality'] = int(quality_values[last_index])
+        
+        # Earlier saves leave a second dip below the latest quality. Each
+        # block's curve is normalised to its own range, so the test does not
+        # depend on how much texture the block has; a block whose curve only
+        # falls towards the latest quality has no ghost
+        upper = last_index if last_index < len(quality_values) - 1 else len(quality_values) - 1
+        quality_map = np.full(curves.shape[1:], quality_values[upper], dtype=np.int32)
+        if upper > 2:
+            lower = curves[:upper]
+            floor = lower.min(axis=0)
+            normalised = (lower - floor) / np.maximum(lower.max(axis=0) - floor, 1e-6)
+            # Depth of every interior quality: how far the curve rises on
+            # both sides before the latest quality
+            left = np.maximum.accumulate(normalised, axis=0)[:-2]
+            right = np.maximum.accumulate(normalised[::-1], axis=0)[::-1][2:]
+            depth = np.minimum(left, right) - normalised[1:-1]
+            valid = (depth > GHOST_MIN_DEPTH) & (normalised[1:-1] < GHOST_FLOOR)
+            earlier = np.argmax(np.where(valid, depth, -1.0), axis=0)
+            dipped = valid.any(axis=0)
+            quality_map[dipped] = quality_values[earlier[dipped] + 1]
+        quality_map[~textured] = 0
+        results['quality_map'] = quality_map
+        
+        values, counts = np.unique(quality_map[textured], return_counts=True)
+        dominant = int(values[np.argmax(counts)])
+        if dominant < quality_values.max():
+            results['dominant_quality'] = dominant
+        
+        # Blocks remembering a different earlier quality than the rest
+        ghosts = textured & (quality_map != dominant)
+        results['ghost_block_ratio'] = float(np.sum(ghosts) / np.sum(textured))
+        
+        # A minority of such blocks suggests a spliced region
+        if 0.03 < results['ghost_block_ratio'] < 0.5:
+            results['is_suspicious'] = True
+        
+    except Exception as e:
+        print(f"Error in JPEG ghost analysis: {e}")
+    
+    return results
 
 if __name__ == '__main__':
     # This is for testing purposes.
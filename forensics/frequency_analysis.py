@@ -1,44 +1,117 @@
 import numpy as np
 from PIL import Image
-from scipy.fft import fft2, fftshift
+from scipy.fft import fft2, fftshift, rfft2
 import os
 
-def analyze_frequency(image_path):
+# Tiles transformed together in Welch mode
+WELCH_BATCH = 8
+
+# Spectrum modes accepted by analyze_frequency
+FREQUENCY_MODES = ('full', 'welch')
+
+def welch_spectrum(gray, tile_size=1024, overlap=0.5, batch_size=WELCH_BATCH):
+    """
+    Welch-averaged power spectrum of a grayscale image.
+
+    Hann-windowed, mean-removed tiles are transformed in batches with rfft2
+    and their power spectra averaged, so memory is bounded by the tile size
+    rather than the image size. Tiles of images smaller than `tile_size` are
+    zero-padded, so the output size is always fixed.
+
+    Args:
+        gray (np.ndarray): 2-D grayscale image
+        tile_size (int): Tile side and output size in pixels (even)
+        overlap (float): Fractional overlap between neighbouring tiles
+        batch_size (int): Tiles per batched transform
+
+    Returns:
+        np.ndarray: float32 (tile_size, tile_size) log power spectrum,
+        zero frequency at the centre
+    """
+    h, w = gray.shape
+    tile_h, tile_w = min(tile_size, h), min(tile_size, w)
+    step_y = max(1, int(tile_h * (1 - overlap)))
+    step_x = max(1, int(tile_w * (1 - overlap)))
+
+    def starts(length, tile, step):
+        positions = list(range(0, length - tile + 1, step))
+        if positions[-1] != length - tile:
+            positions.append(length - tile)
+        return positions
+
+    origins = [(y, x) for y in starts(h, tile_h, step_y) for x in starts(w, tile_w, step_x)]
+    window = np.outer(np.hanning(tile_h), np.hanning(tile_w)).astype(np.float32)
+    power = np.zeros((tile_size, tile_size // 2 + 1), dtype=np.float64)
+
+    for start in range(0, len(origins), batch_size):
+        tiles = np.stack([gray[y:y + tile_h, x:x + tile_w] for y, x in origins[start:start + batch_size]])
+        tiles = tiles.astype(np.float32)
+        tiles -= tiles.mean(axis=(1, 2), keepdims=True)
+        spectra = rfft2(tiles * window, s=(tile_size, tile_size), axes=(1, 2))
+        power += np.sum(spectra.real ** 2 + spectra.imag ** 2, axis=0)
+
+    power /= len(origins) * float(np.sum(window ** 2))
+
+    # Rebuild the full spectrum from its Hermitian half and centre it
+    rows = (-np.arange(tile_size)) % tile_size
+    cols = tile_size - np.arange(tile_size // 2 + 1, tile_size)
+    full = np.concatenate([power, power[np.ix_(rows, cols)]], axis=1)
+    return np.log(fftshift(full) + 1).astype(np.float32)
+
+def analyze_frequency(image_path, mode='full', tile_size=1024, return_array=False):
     """
     Analyzes the frequency domain of an image.
     
     Args:
         image_path (str): The path to the image file.
+        mode (str): 'full' for one transform of the whole image, or 'welch'
+            to average windowed spectra of overlapping tiles at a fixed
+            `tile_size` output (bounded memory, less noisy, periodic
+            upsampling peaks stand out).
+        tile_size (int): Tile side and output size in Welch mode.
+        return_array (bool): If True, also returns the log spectrum array.
         
     Returns:
-        PIL.Image: A visual representation of the frequency spectrum.
+        PIL.Image: A visual representation of the frequency spectrum, or
+        (PIL.Image, np.ndarray) if return_array is True.
+    
+    Raises:
+        ValueError: If mode is not one of FREQUENCY_MODES
     """
+    if mode not in FREQUENCY_MODES:
+        raise ValueError(f"Unknown frequency mode {mode!r}; expected one of {FREQUENCY_MODES}")
+    
     try:
         with Image.open(image_path).convert('L') as img: # Convert to grayscale
             # Convert image to numpy array
             np_image = np.array(img)
             
-            # Perform 2D Fast Fourier Transform
-            f_transform = fft2(np_image)
-            
-            # Shift the zero frequency component to the center
-            f_transform_shifted = fftshift(f_transform)
-            
-            # Get the magnitude spectrum (log scale for visualization)
-            magnitude_spectrum = np.log(np.abs(f_transform_shifted) + 1)
+            if mode == 'welch':
+                magnitude_spectrum = welch_spectrum(np_image, tile_size)
+            else:
+                # Perform 2D Fast Fourier Transform
+                f_transform = fft2(np_image)
+                
+                # Shift the zero frequency component to the center
+                f_transform_shifted = fftshift(f_transform)
+                
+                # Get the magnitude spectrum (log scale for visualization)
+                magnitude_spectrum = np.log(np.abs(f_transform_shifted) + 1)
             
             # Normalize the magnitude spectrum to 0-255 for image display
-            magnitude_spectrum = (magnitude_spectrum / np.max(magnitude_spectrum)) * 255
-            magnitude_spectrum = magnitude_spectrum.astype(np.uint8)
+            preview = (magnitude_spectrum / max(np.max(magnitude_spectrum), 1e-12)) * 255
+            preview = preview.astype(np.uint8)
             
             # Create an image from the magnitude spectrum
-            freq_image = Image.fromarray(magnitude_spectrum)
+            freq_image = Image.fromarray(preview)
             
+            if return_array:
+                return freq_image, magnitude_spectrum
             return freq_image
 
     except Exception as e:
         print(f"Error during frequency analysis: {e}")
-        return None
+        return (None, None) if return_array else None
 
 if __name__ == '__main__':
     # This is for testing purposes.
@@ -1,20 +1,131 @@
 import numpy as np
 from PIL import Image
-from scipy import fftpack
+from scipy import fft as sp_fft
 from scipy.stats import chisquare
 import cv2
 
-def detect_gan_fingerprint(image_path):
+# All images are analysed at this size
+WORKING_SIZE = 512
+
+# Radial bins inspected for spectral anomalies
+RADIAL_BINS_CHECKED = 50
+
+# Images transformed together by detect_gan_fingerprint_batch
+BATCH_SIZE = 16
+
+# Length of a generator-attribution descriptor (two S/2-bin radial profiles)
+DESCRIPTOR_SIZE = 2 * (WORKING_SIZE // 2)
+
+_radial_index_cache = {}
+
+def _radial_index(size):
     """
-    Advanced frequency domain analysis to detect GAN fingerprints.
-    GANs often leave specific patterns in high-frequency components.
-    
+    Radial-bin index of the half spectrum returned by rfft2, cached per size.
+
+    Radii are measured from the centre of the fftshift-ed full spectrum. Every
+    interior rfft column stands for itself and its Hermitian mirror, so it is
+    counted twice; the DC and Nyquist columns are counted once.
+
+    Returns:
+        tuple: (int radius per half-spectrum entry, entry weights, pixels per radius)
+    """
+    if size not in _radial_index_cache:
+        fy = np.fft.fftfreq(size, 1.0 / size)[:, None]
+        fx = np.arange(size // 2 + 1)[None, :]
+        radius = np.sqrt(fx ** 2 + fy ** 2).astype(int)
+        weights = np.full(radius.shape, 2.0)
+        weights[:, 0] = 1.0
+        if size % 2 == 0:
+            weights[:, -1] = 1.0
+        counts = np.bincount(radius.ravel(), weights.ravel())
+        _radial_index_cache[size] = (radius, weights, counts)
+    return _radial_index_cache[size]
+
+def _full_shifted_spectrum(half, size):
+    """Rebuilds an fftshift-ed full (real, symmetric) spectrum from an rfft2 half."""
+    mirror = half[np.ix_((-np.arange(size)) % size, size - np.arange(size // 2 + 1, size))]
+    return np.fft.fftshift(np.concatenate([half, mirror], axis=1))
+
+def gan_spectrum_scores(stack, workers=-1):
+    """
+    Spectral GAN-fingerprint scores for a stack of equally sized square images.
+
+    The whole stack goes through one batched DCT and one batched real FFT.
+
     Args:
-        image_path (str): Path to image file
-        
+        stack (np.ndarray): (N, S, S) grayscale images
+        workers (int): Worker threads for scipy.fft (-1 uses all cores)
+
     Returns:
-        dict: GAN fingerprint analysis results
+        list: One dict per image with high_freq_pattern_score,
+        frequency_anomaly_score and spectral_residual_score
     """
+    stack = np.asarray(stack, dtype=np.float64)
+    n, h, w = stack.shape
+
+    # 2D DCT: energy of the low, mid and high frequency bands
+    dct = np.abs(sp_fft.dctn(stack, norm='ortho', axes=(1, 2), workers=workers))
+    low_energy = dct[:, :h // 4, :w // 4].sum(axis=(1, 2))
+    mid_energy = dct[:, h // 4:h // 2, w // 4:w // 2].sum(axis=(1, 2))
+    high_energy = dct[:, h // 2:, w // 2:].sum(axis=(1, 2))
+    total_energy = low_energy + mid_energy + high_energy
+
+    # Radial profile of the magnitude spectrum from the half spectrum
+    half_magnitude = np.abs(sp_fft.rfft2(stack, axes=(1, 2), workers=workers))
+    radius, weights, counts = _radial_index(h)
+    n_bins = counts.size
+    packed = (np.arange(n)[:, None, None] * n_bins + radius).ravel()
+    radial_sums = np.bincount(packed, (half_magnitude * weights).ravel(), minlength=n * n_bins)
+    radial_mean = radial_sums.reshape(n, n_bins) / counts
+
+    # Log magnitude on the half spectrum only; the mirror is a copy
+    log_half = np.log(half_magnitude + 1)
+
+    scores = []
+    for i in range(n):
+        score = {
+            'high_freq_pattern_score': None,
+            'frequency_anomaly_score': None,
+            'spectral_residual_score': 0.0
+        }
+        if total_energy[i] > 0:
+            score['high_freq_pattern_score'] = float(high_energy[i] / total_energy[i])
+        if n_bins > 10:
+            radial_diff = np.diff(radial_mean[i, :min(RADIAL_BINS_CHECKED, n_bins)])
+            score['frequency_anomaly_score'] = float(np.std(radial_diff))
+
+        # Spectral residual analysis (detects upsampling artifacts)
+        log_spectrum = _full_shifted_spectrum(log_half[i], w)
+        spectral_residual = log_spectrum - cv2.GaussianBlur(log_spectrum, (3, 3), 0)
+        score['spectral_residual_score'] = float(np.sum(np.abs(spectral_residual)))
+        scores.append(score)
+    return scores
+
+def _load_working_image(image_path):
+    """Reads an image as grayscale at the working size, or None."""
+    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    return cv2.resize(img, (WORKING_SIZE, WORKING_SIZE))
+
+def _iter_working_stacks(image_paths, batch_size):
+    """Yields (readable paths, uint8 working-size stack) per batch of images."""
+    for start in range(0, len(image_paths), batch_size):
+        images, loaded = [], []
+        for path in image_paths[start:start + batch_size]:
+            try:
+                img = _load_working_image(path)
+            except Exception as e:
+                print(f"Error loading {path}: {e}")
+                img = None
+            if img is not None:
+                images.append(img)
+                loaded.append(path)
+        if images:
+            yield loaded, np.stack(images)
+
+def _gan_results(score):
+    """Turns the spectral scores of one image into the detection results dict."""
     results = {
         'gan_signature_detected': False,
         'frequency_anomaly_score': 0.0,
@@ -22,79 +133,252 @@ def detect_gan_fingerprint(image_path):
         'spectral_residual_score': 0.0,
         'is_suspicious': False
     }
-    
-    try:
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        if img is None:
-            return results
-        
-        # Resize for consistent analysis
-        img = cv2.resize(img, (512, 512))
-        
-        # Perform 2D DCT (Discrete Cosine Transform)
-        dct = fftpack.dct(fftpack.dct(img.T, norm='ortho').T, norm='ortho')
-        
-        # Analyze high-frequency components (where GAN artifacts appear)
-        h, w = dct.shape
-        
-        # Extract different frequency bands
-        low_freq = dct[:h//4, :w//4]
-        mid_freq = dct[h//4:h//2, w//4:w//2]
-        high_freq = dct[h//2:, w//2:]
-        
-        # Calculate energy in each band
-        low_energy = np.sum(np.abs(low_freq))
-        mid_energy = np.sum(np.abs(mid_freq))
-        high_energy = np.sum(np.abs(high_freq))
-        
-        total_energy = low_energy + mid_energy + high_energy
-        
-        if total_energy > 0:
-            high_freq_ratio = high_energy / total_energy
-            results['high_freq_pattern_score'] = float(high_freq_ratio)
-            
-            # Real photos have more high-frequency content
-            # AI images tend to be smoother with less high-frequency detail
-            if high_freq_ratio < 0.05:  # Very low high-frequency content
-                results['gan_signature_detected'] = True
-                results['is_suspicious'] = True
-        
-        # Analyze radial frequency spectrum
-        # GANs often show unusual circular patterns
-        f_transform = np.fft.fft2(img)
-        f_shift = np.fft.fftshift(f_transform)
-        magnitude_spectrum = np.abs(f_shift)
-        
-        # Calculate radial average
-        center_y, center_x = h // 2, w // 2
-        y, x = np.ogrid[:h, :w]
-        r = np.sqrt((x - center_x)**2 + (y - center_y)**2).astype(int)
-        
-        # Radial profile
-        radial_mean = np.bincount(r.ravel(), magnitude_spectrum.ravel()) / np.bincount(r.ravel())
-        
-        # Check for unnatural peaks or valleys
-        # AI images often show periodic patterns
-        if len(radial_mean) > 10:
-            radial_diff = np.diff(radial_mean[:min(50, len(radial_mean))])
-            anomaly_score = np.std(radial_diff)
-            results['frequency_anomaly_score'] = float(anomaly_score)
-            
-            # High variation in radial spectrum suggests AI generation
-            if anomaly_score > 1000:
-                results['is_suspicious'] = True
-        
-        # Spectral residual analysis (detects upsampling artifacts)
-        log_spectrum = np.log(magnitude_spectrum + 1)
-        spectral_residual = log_spectrum - cv2.GaussianBlur(log_spectrum, (3, 3), 0)
-        residual_energy = np.sum(np.abs(spectral_residual))
-        results['spectral_residual_score'] = float(residual_energy)
-        
-        # AI images often have lower spectral residual
-        if residual_energy < 50000:
+    if score is None:
+        return results
+
+    if score['high_freq_pattern_score'] is not None:
+        high_freq_ratio = score['high_freq_pattern_score']
+        results['high_freq_pattern_score'] = high_freq_ratio
+
+        # Real photos have more high-frequency content
+        # AI images tend to be smoother with less high-frequency detail
+        if high_freq_ratio < 0.05:  # Very low high-frequency content
+            results['gan_signature_detected'] = True
+            results['is_suspicious'] = True
+
+    if score['frequency_anomaly_score'] is not None:
+        anomaly_score = score['frequency_anomaly_score']
+        results['frequency_anomaly_score'] = anomaly_score
+
+        # High variation in radial spectrum suggests AI generation
+        if anomaly_score > 1000:
             results['is_suspicious'] = True
-            
+
+    residual_energy = score['spectral_residual_score']
+    results['spectral_residual_score'] = residual_energy
+
+    # AI images often have lower spectral residual
+    if residual_energy < 50000:
+        results['is_suspicious'] = True
+
+    return results
+
+def detect_gan_fingerprint(image_path):
+    """
+    Advanced frequency domain analysis to detect GAN fingerprints.
+    GANs often leave specific patterns in high-frequency components.
+
+    Args:
+        image_path (str): Path to image file
+
+    Returns:
+        dict: GAN fingerprint analysis results
+    """
+    score = None
+    try:
+        img = _load_working_image(image_path)
+        if img is not None:
+            score = gan_spectrum_scores(img[None])[0]
     except Exception as e:
         print(f"Error in GAN fingerprint detection: {e}")
-    
-    return results
+
+    return _gan_results(score)
+
+def detect_gan_fingerprint_batch(image_paths, batch_size=BATCH_SIZE):
+    """
+    Runs `detect_gan_fingerprint` over many images, transforming them in
+    batched FFT calls.
+
+    Args:
+        image_paths (list): Paths to image files
+        batch_size (int): Images per batched transform
+
+    Returns:
+        dict: Mapping of image path -> GAN fingerprint analysis results
+    """
+    scores = {}
+    for loaded, stack in _iter_working_stacks(image_paths, batch_size):
+        # A failing batch leaves only its own images with default results
+        try:
+            scores.update(zip(loaded, gan_spectrum_scores(stack)))
+        except Exception as e:
+            print(f"Error in GAN fingerprint detection: {e}")
+
+    return {path: _gan_results(scores.get(path)) for path in image_paths}
+
+def spectral_descriptors(stack, workers=-1):
+    """
+    Generator-attribution descriptors for a stack of working-size images.
+
+    Each descriptor joins two azimuthally averaged log-magnitude spectra: one
+    of the image and one of its median-filter noise residual, where the
+    upsampling traces of a generator are strongest. Both profiles are
+    mean-centred and L2-normalised, so descriptors are unit vectors and
+    cosine similarity is a dot product.
+
+    Args:
+        stack (np.ndarray): (N, S, S) uint8 grayscale images
+        workers (int): Worker threads for scipy.fft (-1 uses all cores)
+
+    Returns:
+        np.ndarray: (N, S) float32 descriptors (S // 2 radial bins per profile)
+    """
+    stack = np.asarray(stack, dtype=np.uint8)
+    n, size = stack.shape[0], stack.shape[1]
+    residuals = [img.astype(np.float32) - cv2.medianBlur(img, 3) for img in stack]
+    planes = np.concatenate([stack.astype(np.float32), np.stack(residuals)])
+
+    log_half = np.log(np.abs(sp_fft.rfft2(planes, axes=(1, 2), workers=workers)) + 1)
+
+    # Radial bins 1 .. S/2; the DC bin and the corners beyond S/2 are dropped
+    radius, weights, counts = _radial_index(size)
+    n_bins = size // 2 + 1
+    clipped = np.minimum(radius, n_bins)
+    packed = (np.arange(2 * n)[:, None, None] * (n_bins + 1) + clipped).ravel()
+    sums = np.bincount(packed, (log_half * weights).ravel(), minlength=2 * n * (n_bins + 1))
+    profiles = sums.reshape(2 * n, n_bins + 1)[:, 1:n_bins] / counts[1:n_bins]
+
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    profiles /= np.maximum(np.linalg.norm(profiles, axis=1, keepdims=True), 1e-12)
+    descriptors = np.concatenate([profiles[:n], profiles[n:]], axis=1) / np.sqrt(2.0)
+    return descriptors.astype(np.float32)
+
+class GeneratorSpectrumLibrary:
+    """
+    Reference spectra of known generators for nearest-neighbour attribution.
+
+    Each generator (or camera corpus) is summarised by the mean of its
+    images' spectral descriptors. Running sums are kept, so references can be
+    extended with new batches at any time; all references are matched at once
+    with one matrix multiply.
+
+    Usage:
+        library = GeneratorSpectrumLibrary()
+        library.add_images('stylegan2', stylegan_paths)
+        library.add_images('camera', camera_paths)
+        result = library.match('image.png', top_k=3)
+    """
+
+    def __init__(self):
+        self.names = []
+        self._sums = np.zeros((0, DESCRIPTOR_SIZE), dtype=np.float64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._references = None
+
+    @classmethod
+    def load(cls, path):
+        """Loads a library written by `save`."""
+        data = np.load(path)
+        library = cls()
+        library.names = [str(name) for name in data['names']]
+        library._sums = data['sums'].astype(np.float64)
+        library._counts = data['counts'].astype(np.int64)
+        return library
+
+    def save(self, path):
+        """Stores the running sums and counts as a .npz file."""
+        np.savez(path, names=np.array(self.names), sums=self._sums, counts=self._counts)
+
+    @property
+    def references(self):
+        """(G, D) float32 matrix of unit-norm reference descriptors."""
+        if self._references is None:
+            means = self._sums / np.maximum(self._counts, 1)[:, None]
+            means /= np.maximum(np.linalg.norm(means, axis=1, keepdims=True), 1e-12)
+            self._references = means.astype(np.float32)
+        return self._references
+
+    def add_descriptors(self, name, descriptors):
+        """
+        Adds descriptors of one generator, creating its reference if needed.
+
+        Args:
+            name (str): Generator label
+            descriptors (np.ndarray): (N, D) output of `spectral_descriptors`
+        """
+        descriptors = np.atleast_2d(descriptors)
+        if name not in self.names:
+            self.names.append(name)
+            self._sums = np.vstack([self._sums, np.zeros((1, self._sums.shape[1]))])
+            self._counts = np.append(self._counts, 0)
+        index = self.names.index(name)
+        self._sums[index] += descriptors.sum(axis=0)
+        self._counts[index] += len(descriptors)
+        self._references = None
+
+    def add_images(self, name, image_paths, batch_size=BATCH_SIZE):
+        """
+        Adds a labelled batch of images to a generator's reference.
+
+        Args:
+            name (str): Generator label
+            image_paths (list): Images produced by that generator
+            batch_size (int): Images per batched transform
+
+        Returns:
+            int: Number of images that could be read and were added
+        """
+        added = 0
+        for _, stack in _iter_working_stacks(image_paths, batch_size):
+            self.add_descriptors(name, spectral_descriptors(stack))
+            added += len(stack)
+        return added
+
+    def match_batch(self, image_paths, top_k=3, batch_size=BATCH_SIZE):
+        """
+        Attributes many images to their nearest reference generators.
+
+        Args:
+            image_paths (list): Paths to image files
+            top_k (int): Number of nearest generators reported per image
+            batch_size (int): Images per batched transform
+
+        Returns:
+            dict: Mapping of image path -> attribution results
+        """
+        results = {}
+        for path in image_paths:
+            results[path] = {
+                'generator_matches': [],
+                'best_match': None,
+                'best_distance': 0.0,
+                'references_compared': 0
+            }
+        if not self.names:
+            return results
+
+        references = self.references
+        k = min(top_k, len(self.names))
+        for loaded, stack in _iter_working_stacks(image_paths, batch_size):
+            try:
+                # Unit vectors: squared Euclidean distance is 2 - 2 * cosine
+                similarity = spectral_descriptors(stack) @ references.T
+                distances = np.sqrt(np.maximum(2.0 - 2.0 * similarity, 0.0))
+                nearest = np.argsort(distances, axis=1)[:, :k]
+            except Exception as e:
+                print(f"Error in generator spectrum matching: {e}")
+                continue
+
+            for row, path in enumerate(loaded):
+                matches = [{'generator': self.names[j], 'distance': float(distances[row, j])}
+                           for j in nearest[row]]
+                results[path]['generator_matches'] = matches
+                results[path]['best_match'] = matches[0]['generator']
+                results[path]['best_distance'] = matches[0]['distance']
+                results[path]['references_compared'] = len(self.names)
+
+        return results
+
+    def match(self, image_path, top_k=3):
+        """
+        Attributes one image to its nearest reference generators.
+
+        Args:
+            image_path (str): Path to image file
+            top_k (int): Number of nearest generators reported
+
+        Returns:
+            dict: Top-k generators with descriptor distances (0 = identical,
+            2 = opposite), the best match and the number of references
+        """
+        return self.match_batch([image_path], top_k)[image_path]
@@ -0,0 +1,232 @@
+from collections import deque
+
+from .header_scanner import read_metadata_segments, HEADER_READ_LIMIT
+
+# Categories in decreasing order of strength
+SIGNATURE_CATEGORIES = ('ai_generated', 'ai_edited', 'provenance', 'editor')
+
+# Only these categories can settle a verdict from metadata alone
+DECISIVE_CATEGORIES = ('ai_generated', 'ai_edited')
+
+# (pattern, generator, category, decisive). Patterns are matched
+# case-insensitively against the raw metadata bytes; a pattern that starts or
+# ends with a letter or digit must not continue a longer word there. A
+# decisive hit is strong enough to skip the pixel detectors.
+DEFAULT_SIGNATURES = [
+    # Diffusion front-ends: generation parameters and workflow graphs
+    ('negative prompt:', 'Stable Diffusion WebUI', 'ai_generated', True),
+    ('sampler: ', 'Stable Diffusion WebUI', 'ai_generated', True),
+    ('cfg scale: ', 'Stable Diffusion WebUI', 'ai_generated', True),
+    ('"class_type"', 'ComfyUI', 'ai_generated', True),
+    ('comfyui', 'ComfyUI', 'ai_generated', True),
+    ('invokeai', 'InvokeAI', 'ai_generated', True),
+    ('sd-metadata', 'InvokeAI', 'ai_generated', True),
+    ('fooocus', 'Fooocus', 'ai_generated', True),
+    ('novelai', 'NovelAI', 'ai_generated', True),
+    ('midjourney', 'Midjourney', 'ai_generated', True),
+    ('dall-e', 'DALL-E', 'ai_generated', True),
+    ('dall\xb7e', 'DALL-E', 'ai_generated', True),
+    ('stable diffusion', 'Stable Diffusion', 'ai_generated', True),
+    ('stability ai', 'Stable Diffusion', 'ai_generated', True),
+    ('adobe firefly', 'Adobe Firefly', 'ai_generated', True),
+    ('leonardo.ai', 'Leonardo.Ai', 'ai_generated', True),
+    ('google imagen', 'Google Imagen', 'ai_generated', False),
+    ('ideogram', 'Ideogram', 'ai_generated', True),
+    # IPTC DigitalSourceType values written by generators and editors
+    ('trainedalgorithmicmedia', 'IPTC DigitalSourceType', 'ai_generated', True),
+    ('compositewithtrainedalgorithmicmedia', 'IPTC DigitalSourceType', 'ai_edited', True),
+    ('algorithmicallyenhanced', 'IPTC DigitalSourceType', 'ai_edited', False),
+    # Generative editing features
+    ('generative fill', 'Adobe Photoshop Generative Fill', 'ai_edited', True),
+    ('generative expand', 'Adobe Photoshop Generative Expand', 'ai_edited', True),
+    ('magic eraser', 'Google Magic Eraser', 'ai_edited', False),
+    ('upscayl', 'Upscayl', 'ai_edited', False),
+    ('topaz gigapixel', 'Topaz Gigapixel AI', 'ai_edited', False),
+    # Content credentials
+    ('c2pa', 'C2PA manifest', 'provenance', False),
+    # Conventional editors
+    ('photoshop', 'Adobe Photoshop', 'editor', False),
+    ('lightroom', 'Adobe Lightroom', 'editor', False),
+    ('gimp', 'GIMP', 'editor', False),
+    ('affinity photo', 'Affinity Photo', 'editor', False),
+    ('pixelmator', 'Pixelmator', 'editor', False),
+    ('snapseed', 'Snapseed', 'editor', False),
+]
+
+class AhoCorasick:
+    """
+    Multi-pattern byte matcher: every pattern is found in one pass over the
+    text, so the cost barely depends on the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (list): bytes patterns; match ids are their list indices
+        """
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, pattern in enumerate(patterns):
+            self._insert(pattern, index)
+        self._build_failure_links()
+
+    def _insert(self, pattern, index):
+        state = 0
+        for byte in pattern:
+            if byte not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][byte] = len(self._goto) - 1
+            state = self._goto[state][byte]
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        # Depth-one states fail to the root; deeper ones follow their parent's links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and byte not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(byte, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def search(self, text):
+        """
+        Finds every pattern occurrence.
+
+        Args:
+            text (bytes): Haystack
+
+        Returns:
+            list: (end offset, pattern index) for each occurrence
+        """
+        matches = []
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, byte in enumerate(text):
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            if output[state]:
+                matches.extend((position, index) for index in output[state])
+        return matches
+
+_signatures = list(DEFAULT_SIGNATURES)
+_matcher = None
+
+def _is_word_byte(byte):
+    """True for ASCII letters and digits."""
+    return 48 <= byte <= 57 or 97 <= byte <= 122 or 65 <= byte <= 90
+
+def _on_word_boundaries(text, end, pattern):
+    """
+    Checks that a match does not start or end inside a longer word, so that
+    e.g. 'imagen' does not fire on 'ImageNumber'. Edges of the pattern that
+    are not letters or digits (': ', '"') need no boundary.
+    """
+    start = end - len(pattern) + 1
+    if _is_word_byte(pattern[0]) and start > 0 and _is_word_byte(text[start - 1]):
+        return False
+    if _is_word_byte(pattern[-1]) and end + 1 < len(text) and _is_word_byte(text[end + 1]):
+        return False
+    return True
+
+def register_generator_signature(pattern, generator, category, decisive=False):
+    """
+    Adds a metadata signature to the triage database.
+
+    Args:
+        pattern (str): Text matched case-insensitively in raw metadata.
+        generator (str): Human-readable generator or tool name.
+        category (str): One of 'ai_generated', 'ai_edited', 'provenance'
+            or 'editor'.
+        decisive (bool): If True, a hit settles the verdict on its own
+            (only for the 'ai_generated' and 'ai_edited' categories).
+    """
+    global _matcher
+    _signatures.append((pattern, generator, category, decisive))
+    _matcher = None
+
+def _get_matcher():
+    """Builds the automaton on first use and after new registrations."""
+    global _matcher
+    if _matcher is None:
+        _matcher = AhoCorasick([pattern.lower().encode('utf-8') for pattern, _, _, _ in _signatures])
+    return _matcher
+
+def match_generator_signatures(image_path, max_bytes=HEADER_READ_LIMIT, headers=None):
+    """
+    Matches the raw metadata of an image (EXIF, XMP, PNG text chunks,
+    C2PA/JUMBF boxes, comments) against the generator-signature database
+    in a single pass.
+
+    Args:
+        image_path (str): Path to image file
+        max_bytes (int): Maximum number of header bytes read
+        headers (dict): Output of `read_headers` for the file; walked here
+            if not given
+
+    Returns:
+        dict: Signature hits, the strongest category over all hits, whether
+        a hit is decisive and the strongest category among decisive hits
+    """
+    results = {
+        'signature_hits': [],
+        'generators': [],
+        'category': None,
+        'decisive': False,
+        'decisive_category': None
+    }
+
+    try:
+        if headers is not None:
+            segments = headers['segments']
+        else:
+            segments = read_metadata_segments(image_path, max_bytes)
+        if not segments:
+            return results
+
+        text = b'\x00'.join(segments).lower()
+        patterns = _get_matcher().patterns
+        matches = [(end, index) for end, index in _get_matcher().search(text)
+                   if _on_word_boundaries(text, end, patterns[index])]
+
+        # A longer pattern ending at the same byte supersedes the ones it
+        # contains (e.g. the composite DigitalSourceType value)
+        longest = {}
+        for end, index in matches:
+            if end not in longest or len(_signatures[index][0]) > len(_signatures[longest[end]][0]):
+                longest[end] = index
+
+        for index in sorted(set(longest.values())):
+            pattern, generator, category, decisive = _signatures[index]
+            results['signature_hits'].append({
+                'pattern': pattern,
+                'generator': generator,
+                'category': category,
+                'decisive': decisive
+            })
+            if generator not in results['generators']:
+                results['generators'].append(generator)
+            if decisive and category in DECISIVE_CATEGORIES:
+                results['decisive'] = True
+
+        hit_categories = {hit['category'] for hit in results['signature_hits']}
+        decisive_categories = {hit['category'] for hit in results['signature_hits']
+                               if hit['decisive'] and hit['category'] in DECISIVE_CATEGORIES}
+        for category in SIGNATURE_CATEGORIES:
+            if category in hit_categories and results['category'] is None:
+                results['category'] = category
+            if category in decisive_categories and results['decisive_category'] is None:
+                results['decisive_category'] = category
+
+    except Exception as e:
+        print(f"Error in generator signature matching: {e}")
+
+    return results
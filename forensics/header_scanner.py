@@ -0,0 +1,450 @@
+import re
+import struct
+import zlib
+from PIL.ExifTags import TAGS
+
+from .metadata_extractor import extract_metadata
+
+# Upper bound on the bytes read from one file; pixel data is always skipped
+HEADER_READ_LIMIT = 1 << 20
+
+# Editing tools flagged in software tags (same list as extract_metadata)
+EDITING_SOFTWARE = ['photoshop', 'gimp', 'lightroom', 'ai', 'upscaler']
+
+# Byte size of one value of each TIFF field type
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+
+# IFD1 tags locating the embedded JPEG thumbnail
+THUMBNAIL_OFFSET_TAG = 0x0201
+THUMBNAIL_LENGTH_TAG = 0x0202
+
+# JPEG segments kept as raw metadata: APP1 (EXIF/XMP), APP11 (JUMBF/C2PA),
+# APP13 (Photoshop IRB) and COM
+JPEG_METADATA_MARKERS = {0xE1, 0xEB, 0xED, 0xFE}
+
+# PNG chunks kept as raw metadata (caBX carries C2PA manifests)
+PNG_METADATA_CHUNKS = {b'tEXt', b'iTXt', b'zTXt', b'eXIf', b'caBX'}
+
+# WebP chunks that hold pixels or layout rather than metadata
+WEBP_IMAGE_CHUNKS = {b'VP8 ', b'VP8L', b'VP8X', b'ALPH', b'ANIM', b'ANMF', b'ICCP'}
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_COMPONENT_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_COLOR_MODES = {0: 'L', 2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+
+XMP_JPEG_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+XMP_PNG_KEYWORD = 'XML:com.adobe.xmp'
+XMP_CREATOR_TOOL = re.compile(r'CreatorTool(?:="|>)([^"<]*)')
+
+class _BoundedReader:
+    """
+    File wrapper that reads at most a fixed number of bytes. A read past the
+    limit returns what is left and marks the reader as truncated, so the
+    walk stops with everything found so far.
+    """
+
+    def __init__(self, handle, limit):
+        self.handle = handle
+        self.remaining = limit
+        self.truncated = False
+
+    def read(self, size):
+        if size > self.remaining:
+            size = self.remaining
+            self.truncated = True
+        data = self.handle.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def skip(self, size):
+        self.handle.seek(size, 1)
+
+def _read_ifd_value(data, endian, field_type, count, value_offset, base):
+    """Decodes one IFD entry, following the offset for values wider than 4 bytes."""
+    size = TIFF_TYPE_SIZES.get(field_type)
+    if size is None:
+        return None
+    total = size * count
+    if total <= 4:
+        raw = value_offset
+    else:
+        offset = struct.unpack(endian + 'I', value_offset)[0] + base
+        if offset + total > len(data):
+            return None
+        raw = data[offset:offset + total]
+
+    if field_type == 2:
+        return raw[:count].split(b'\x00', 1)[0].decode('utf-8', 'replace')
+    if field_type in (1, 7):
+        return raw[:count] if count > 1 or field_type == 7 else raw[0]
+
+    formats = {3: 'H', 4: 'I', 5: 'II', 6: 'b', 8: 'h', 9: 'i', 10: 'ii', 11: 'f', 12: 'd'}
+    values = struct.unpack(endian + formats[field_type] * count, raw[:total])
+    if field_type in (5, 10):
+        values = tuple(num / den if den else float('nan') for num, den in zip(values[::2], values[1::2]))
+    return values[0] if count == 1 else values
+
+def _read_ifd(data, endian, offset, base):
+    """Reads one IFD into {tag: value}; returns it with the next-IFD offset."""
+    entries = {}
+    if offset + 2 > len(data):
+        return entries, 0
+    count = struct.unpack(endian + 'H', data[offset:offset + 2])[0]
+    for i in range(count):
+        start = offset + 2 + 12 * i
+        if start + 12 > len(data):
+            break
+        tag, field_type, value_count = struct.unpack(endian + 'HHI', data[start:start + 8])
+        value = _read_ifd_value(data, endian, field_type, value_count, data[start + 8:start + 12], base)
+        if value is not None:
+            entries[tag] = value
+    end = offset + 2 + 12 * count
+    next_offset = struct.unpack(endian + 'I', data[end:end + 4])[0] if end + 4 <= len(data) else 0
+    return entries, next_offset
+
+def _tiff_header(data):
+    """
+    Locates the TIFF header of an EXIF block.
+
+    Returns:
+        tuple: (TIFF bytes, struct endian prefix, IFD0 offset), or None if not TIFF
+    """
+    base = 6 if data.startswith(b'Exif\x00\x00') else 0
+    header = data[base:base + 8]
+    if header[:4] == b'II*\x00':
+        endian = '<'
+    elif header[:4] == b'MM\x00*':
+        endian = '>'
+    else:
+        return None
+    # Offsets inside the block are relative to the TIFF header
+    return data[base:], endian, struct.unpack(endian + 'I', header[4:8])[0]
+
+def parse_tiff_exif(data):
+    """
+    Parses a TIFF/EXIF block the way `PIL.Image._getexif` reports it.
+
+    IFD0 and the Exif IFD are merged into one {tag id: value} dict and the
+    GPS IFD is nested under its pointer tag. Rationals become floats.
+
+    Args:
+        data (bytes): TIFF header and IFDs, optionally prefixed by 'Exif\\0\\0'
+
+    Returns:
+        dict: Tag id -> value, or {} if the block is not valid TIFF
+    """
+    located = _tiff_header(data)
+    if located is None:
+        return {}
+    tiff, endian, ifd0_offset = located
+    exif, _ = _read_ifd(tiff, endian, ifd0_offset, 0)
+
+    if isinstance(exif.get(EXIF_IFD_POINTER), int):
+        sub_ifd, _ = _read_ifd(tiff, endian, exif[EXIF_IFD_POINTER], 0)
+        exif.update(sub_ifd)
+    if isinstance(exif.get(GPS_IFD_POINTER), int):
+        exif[GPS_IFD_POINTER], _ = _read_ifd(tiff, endian, exif[GPS_IFD_POINTER], 0)
+    return exif
+
+def parse_exif_thumbnail(data):
+    """
+    Extracts the JPEG thumbnail referenced by IFD1 of a TIFF/EXIF block.
+
+    Args:
+        data (bytes): TIFF header and IFDs, optionally prefixed by 'Exif\\0\\0'
+
+    Returns:
+        bytes: The embedded JPEG stream, or b'' if there is none
+    """
+    located = _tiff_header(data)
+    if located is None:
+        return b''
+    tiff, endian, ifd0_offset = located
+    _, ifd1_offset = _read_ifd(tiff, endian, ifd0_offset, 0)
+    if not ifd1_offset:
+        return b''
+    ifd1, _ = _read_ifd(tiff, endian, ifd1_offset, 0)
+    offset, length = ifd1.get(THUMBNAIL_OFFSET_TAG), ifd1.get(THUMBNAIL_LENGTH_TAG)
+    if not isinstance(offset, int) or not isinstance(length, int):
+        return b''
+    thumbnail = tiff[offset:offset + length]
+    return thumbnail if thumbnail.startswith(b'\xff\xd8') else b''
+
+def _inflate(data):
+    """Decompresses a zlib stream, keeping what decodes if it was cut short."""
+    return zlib.decompressobj().decompress(data)
+
+def _scan_jpeg(reader, found):
+    """Walks JPEG marker segments up to the first scan, reading only metadata and frame headers."""
+    while True:
+        marker = reader.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return
+        code = marker[1]
+        if code == 0xFF:
+            reader.skip(-1)  # fill byte before a marker
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            return
+        length = struct.unpack('>H', reader.read(2))[0] - 2
+        if code in JPEG_METADATA_MARKERS:
+            body = reader.read(length)
+            found['segments'].append(body)
+        if code == 0xE1:
+            if body.startswith(b'Exif\x00\x00') and not found['exif_block']:
+                found['exif_block'] = body
+            elif body.startswith(XMP_JPEG_HEADER):
+                found['xmp'] = body[len(XMP_JPEG_HEADER):].decode('utf-8', 'replace')
+        elif code in JPEG_SOF_MARKERS:
+            body = reader.read(length)
+            height, width = struct.unpack('>HH', body[1:5])
+            found['size'] = (width, height)
+            found['mode'] = JPEG_COMPONENT_MODES.get(body[5], 'RGB')
+        elif code not in JPEG_METADATA_MARKERS:
+            reader.skip(length)
+
+def _scan_png(reader, found):
+    """Walks PNG chunks up to the first IDAT, reading only metadata chunks."""
+    while True:
+        header = reader.read(8)
+        if len(header) < 8:
+            return
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type in (b'IDAT', b'IEND'):
+            return
+        if chunk_type == b'IHDR' or chunk_type in PNG_METADATA_CHUNKS:
+            body = reader.read(length)
+            reader.skip(4)  # CRC
+        else:
+            reader.skip(length + 4)
+            continue
+
+        if chunk_type == b'IHDR':
+            width, height, depth, color_type = struct.unpack('>IIBB', body[:10])
+            found['size'] = (width, height)
+            mode = PNG_COLOR_MODES.get(color_type, 'RGB')
+            if color_type == 0 and depth == 1:
+                mode = '1'
+            elif color_type == 0 and depth == 16:
+                mode = 'I'
+            found['mode'] = mode
+        elif chunk_type == b'eXIf':
+            found['exif_block'] = body
+            found['segments'].append(body)
+        elif chunk_type == b'caBX':
+            found['segments'].append(body)
+        else:
+            keyword, _, rest = body.partition(b'\x00')
+            keyword = keyword.decode('latin-1')
+            if chunk_type == b'tEXt':
+                text = rest.decode('latin-1')
+            elif chunk_type == b'zTXt':
+                text = _inflate(rest[1:]).decode('latin-1')
+            else:
+                # iTXt: compression flag, method, language tag, translated keyword, text
+                compressed, rest = rest[0], rest[2:]
+                _, _, rest = rest.partition(b'\x00')
+                _, _, rest = rest.partition(b'\x00')
+                text = (_inflate(rest) if compressed else rest).decode('utf-8', 'replace')
+            found['segments'].append(keyword.encode('latin-1') + b'\x00' + text.encode('utf-8'))
+            if keyword == XMP_PNG_KEYWORD:
+                found['xmp'] = text
+            else:
+                found['text'][keyword] = text
+
+def _scan_webp(reader, found):
+    """Walks RIFF chunks of a WebP file, skipping the bitstream chunks."""
+    reader.read(4)  # 'WEBP'
+    while True:
+        header = reader.read(8)
+        if len(header) < 8:
+            return
+        chunk_type, length = struct.unpack('<4sI', header)
+        padded = length + (length & 1)
+        if chunk_type == b'VP8X':
+            body = reader.read(padded)
+            width = 1 + int.from_bytes(body[4:7], 'little')
+            height = 1 + int.from_bytes(body[7:10], 'little')
+            found['size'] = (width, height)
+            found['mode'] = 'RGBA' if body[0] & 0x10 else 'RGB'
+        elif chunk_type == b'VP8 ' and 'size' not in found:
+            body = reader.read(10)
+            reader.skip(padded - 10)
+            width, height = struct.unpack('<HH', body[6:10])
+            found['size'] = (width & 0x3FFF, height & 0x3FFF)
+            found['mode'] = 'RGB'
+        elif chunk_type == b'VP8L' and 'size' not in found:
+            body = reader.read(5)
+            reader.skip(padded - 5)
+            bits = int.from_bytes(body[1:5], 'little')
+            found['size'] = ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+            found['mode'] = 'RGBA' if (bits >> 28) & 1 else 'RGB'
+        elif chunk_type in WEBP_IMAGE_CHUNKS:
+            reader.skip(padded)
+        else:
+            body = reader.read(padded)[:length]
+            found['segments'].append(body)
+            if chunk_type == b'EXIF':
+                found['exif_block'] = body
+            elif chunk_type == b'XMP ':
+                found['xmp'] = body.decode('utf-8', 'replace')
+
+def _walk_headers(image_path, max_bytes):
+    """
+    Runs the container walker for a file.
+
+    Returns:
+        tuple: (format name or None if unsupported, dict of found items;
+        'truncated' is True if the read limit cut the walk short)
+    """
+    found = {'exif_block': b'', 'xmp': '', 'text': {}, 'segments': [], 'truncated': False}
+    walkers = {'JPEG': _scan_jpeg, 'PNG': _scan_png, 'WEBP': _scan_webp}
+    with open(image_path, 'rb') as handle:
+        reader = _BoundedReader(handle, max_bytes)
+        signature = reader.read(12)
+        if signature[:3] == b'\xff\xd8\xff':
+            image_format, rewind = 'JPEG', -10
+        elif signature[:8] == PNG_SIGNATURE:
+            image_format, rewind = 'PNG', -4
+        elif signature[:4] == b'RIFF' and signature[8:12] == b'WEBP':
+            image_format, rewind = 'WEBP', -4
+        else:
+            return None, found
+        reader.skip(rewind)
+        try:
+            walkers[image_format](reader, found)
+        except (struct.error, IndexError, zlib.error):
+            # A header cut off by the read limit; keep what was found
+            if not reader.truncated:
+                raise
+        found['truncated'] = reader.truncated
+    return image_format, found
+
+def read_headers(image_path, max_bytes=HEADER_READ_LIMIT):
+    """
+    Walks the container headers of a file once, so that the metadata scan,
+    the signature triage and the thumbnail check can share the result.
+
+    Args:
+        image_path (str): The path to the image file.
+        max_bytes (int): Maximum number of bytes read from the file.
+
+    Returns:
+        dict: 'format' (None for unsupported containers), 'exif_block',
+        'xmp', 'text', 'segments', 'truncated' and, when found, 'size' and
+        'mode'
+    """
+    image_format, found = _walk_headers(image_path, max_bytes)
+    found['format'] = image_format
+    return found
+
+def read_metadata_segments(image_path, max_bytes=HEADER_READ_LIMIT):
+    """
+    Raw metadata payloads of a file (EXIF, XMP, text chunks, C2PA/JUMBF,
+    comments), read without touching pixel data.
+
+    Args:
+        image_path (str): The path to the image file.
+        max_bytes (int): Maximum number of bytes read from the file.
+
+    Returns:
+        list: bytes objects, one per metadata segment or chunk; empty for
+        unsupported formats
+    """
+    return _walk_headers(image_path, max_bytes)[1]['segments']
+
+def read_exif_thumbnail(image_path, max_bytes=HEADER_READ_LIMIT):
+    """
+    Embedded EXIF thumbnail of a file, read from the headers only.
+
+    Args:
+        image_path (str): The path to the image file.
+        max_bytes (int): Maximum number of bytes read from the file.
+
+    Returns:
+        bytes: JPEG thumbnail stream, or b'' if the file has none
+    """
+    exif_block = _walk_headers(image_path, max_bytes)[1]['exif_block']
+    return parse_exif_thumbnail(exif_block) if exif_block else b''
+
+def scan_metadata(image_path, max_bytes=HEADER_READ_LIMIT, headers=None):
+    """
+    Reads metadata from the file headers only, without decoding pixels.
+
+    JPEG APP1 (EXIF and XMP), PNG tEXt/iTXt/zTXt/eXIf and WebP EXIF/XMP
+    chunks are located by walking the container structure with seeks and a
+    bounded read, and the TIFF IFDs are parsed directly. Other formats fall
+    back to `extract_metadata`.
+
+    Args:
+        image_path (str): The path to the image file.
+        max_bytes (int): Maximum number of bytes read from the file.
+        headers (dict): Output of `read_headers` for the file; walked here
+            if not given.
+
+    Returns:
+        dict: Same layout as `extract_metadata`, plus 'xmp' (raw packet) and
+        'text' (PNG text chunks).
+    """
+    metadata = {
+        "exif": {},
+        "software_tags": [],
+        "anomalies": [],
+        "xmp": "",
+        "text": {}
+    }
+    try:
+        found = headers if headers is not None else read_headers(image_path, max_bytes)
+        image_format = found['format']
+        if image_format is None:
+            # Containers without a header walker
+            fallback = extract_metadata(image_path)
+            fallback.setdefault('xmp', '')
+            fallback.setdefault('text', {})
+            return fallback
+        metadata['format'] = image_format
+    except Exception as e:
+        metadata["anomalies"].append(f"Error reading metadata: {e}")
+        return metadata
+
+    if 'mode' in found:
+        metadata['mode'] = found['mode']
+    if 'size' in found:
+        metadata['size'] = found['size']
+    metadata['xmp'] = found['xmp']
+    metadata['text'] = found['text']
+    if found['truncated']:
+        metadata["anomalies"].append(f"Metadata larger than {max_bytes} bytes; the rest was not read")
+
+    # Extract EXIF data
+    try:
+        exif_data = parse_tiff_exif(found['exif_block']) if found['exif_block'] else {}
+    except Exception as e:
+        exif_data = {}
+        metadata["anomalies"].append(f"Error reading metadata: {e}")
+    if exif_data:
+        for tag, value in exif_data.items():
+            metadata["exif"][TAGS.get(tag, tag)] = value
+    else:
+        metadata["anomalies"].append("No EXIF data found.")
+
+    # Check for software tags in EXIF, XMP and PNG text
+    candidates = [metadata["exif"].get("Software"), metadata["text"].get("Software")]
+    creator_tool = XMP_CREATOR_TOOL.search(metadata['xmp'])
+    if creator_tool:
+        candidates.append(creator_tool.group(1))
+    for software in candidates:
+        if isinstance(software, str) and software and software not in metadata["software_tags"]:
+            metadata["software_tags"].append(software)
+            if any(tool in software.lower() for tool in EDITING_SOFTWARE):
+                metadata["anomalies"].append(f"Potential editing software detected: {software}")
+
+    return metadata
@@ -2,12 +2,51 @@ import numpy as np
 from PIL import Image
 import cv2 # OpenCV for denoising
 
-def extract_noise_map(image_path):
+# Longest side NL-means runs at in 'auto' mode; larger images are downscaled
+AUTO_MAX_SIDE = 768
+
+# B3-spline kernel of the first a trous wavelet scale (separable)
+WAVELET_KERNEL = np.array([1, 4, 6, 4, 1], dtype=np.float32) / 16.0
+
+NOISE_MAP_METHODS = ('auto', 'nlmeans', 'median', 'bilateral', 'gaussian', 'wavelet')
+
+def _denoise(img, method):
+    """
+    Denoises a BGR uint8 image with the selected backend.
+    
+    Args:
+        img (np.ndarray): BGR image.
+        method (str): One of `NOISE_MAP_METHODS` except 'auto'.
+        
+    Returns:
+        np.ndarray: Denoised image with the same shape (float32 for 'wavelet').
+    """
+    if method == 'nlmeans':
+        # Non-local means preserves edges best but is the slowest backend
+        return cv2.fastNlMeansDenoisingColored(img, None, 10, 10, 7, 21)
+    if method == 'median':
+        return cv2.medianBlur(img, 3)
+    if method == 'bilateral':
+        return cv2.bilateralFilter(img, 5, 50, 50)
+    if method == 'gaussian':
+        return cv2.GaussianBlur(img, (5, 5), 0)
+    if method == 'wavelet':
+        # Smooth approximation of the first wavelet scale; the residual is the
+        # finest detail plane, where sensor noise lives
+        return cv2.sepFilter2D(img.astype(np.float32), -1, WAVELET_KERNEL, WAVELET_KERNEL,
+                               borderType=cv2.BORDER_REFLECT)
+    raise ValueError(f"Unknown noise map method '{method}'. Choose from {NOISE_MAP_METHODS}.")
+
+def extract_noise_map(image_path, method='auto'):
     """
     Extracts a noise map from an image by subtracting a denoised version.
     
     Args:
         image_path (str): The path to the image file.
+        method (str): Denoiser backend: 'nlmeans' (highest quality, slow on
+            large photos), 'median', 'bilateral', 'gaussian', 'wavelet', or
+            'auto', which runs NL-means on a copy downscaled to at most
+            AUTO_MAX_SIDE pixels and upsamples the residual.
         
     Returns:
         PIL.Image: An image representing the noise map.
@@ -17,21 +56,28 @@ def extract_noise_map(image_path):
         img = cv2.imread(image_path)
         if img is None:
             raise FileNotFoundError("Image not found or could not be read by OpenCV.")
-            
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         
-        # Denoise the image using a non-local means filter
-        # This is a good filter for preserving edges while removing noise.
-        denoised_img = cv2.fastNlMeansDenoisingColored(img, None, 10, 10, 7, 21)
-        denoised_img_rgb = cv2.cvtColor(denoised_img, cv2.COLOR_BGR2RGB)
-
-        # Convert to PIL images for subtraction
-        original_pil = Image.fromarray(img_rgb)
-        denoised_pil = Image.fromarray(denoised_img_rgb)
-
-        # Calculate the difference to get the noise map
-        noise_map = Image.fromarray(np.abs(np.array(original_pil, dtype=np.int16) - np.array(denoised_pil, dtype=np.int16)).astype(np.uint8))
-
+        if method not in NOISE_MAP_METHODS:
+            raise ValueError(f"Unknown noise map method '{method}'. Choose from {NOISE_MAP_METHODS}.")
+        
+        h, w = img.shape[:2]
+        scale = AUTO_MAX_SIDE / max(h, w)
+        
+        if method == 'auto' and scale < 1.0:
+            small = cv2.resize(img, (max(int(w * scale), 1), max(int(h * scale), 1)),
+                               interpolation=cv2.INTER_AREA)
+            residual = small.astype(np.int16) - _denoise(small, 'nlmeans').astype(np.int16)
+            residual = np.abs(residual).astype(np.uint8)
+            noise_map_bgr = cv2.resize(residual, (w, h), interpolation=cv2.INTER_NEAREST)
+        else:
+            backend = 'nlmeans' if method == 'auto' else method
+            denoised = _denoise(img, backend)
+            # Calculate the difference to get the noise map
+            noise_map_bgr = np.abs(img.astype(np.float32) - denoised.astype(np.float32))
+            noise_map_bgr = np.clip(noise_map_bgr, 0, 255).astype(np.uint8)
+        
+        noise_map = Image.fromarray(cv2.cvtColor(noise_map_bgr, cv2.COLOR_BGR2RGB))
+        
         return noise_map
 
     except Exception as e:
@@ -1,14 +1,153 @@
 import numpy as np
 import cv2
-from scipy import ndimage
 
-def analyze_noise_inconsistency(image_path):
+def _integral_images(residual):
+    """Integral images of a residual and of its square (float64 for precision)."""
+    return cv2.integral2(residual, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+def _window_variance(integrals, y0, x0, y1, x1):
+    """Variance of every window [y0:y1, x0:x1] with four lookups per window."""
+    sums, sq_sums = integrals
+    
+    def window_total(integral):
+        return integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+    
+    count = ((y1 - y0) * (x1 - x0)).astype(np.float64)
+    mean = window_total(sums) / count
+    return np.maximum(window_total(sq_sums) / count - mean * mean, 0)
+
+def noise_level_map(residual, window_size, stride, integrals=None):
+    """
+    Sliding-window variance of a noise residual via integral images.
+    Every window costs O(1) regardless of its size.
+    
+    Args:
+        residual (np.ndarray): 2-D float32 high-pass residual
+        window_size (int or tuple): Window side, or (height, width)
+        stride (int or tuple): Step between windows, or (dy, dx)
+        integrals (tuple): Optional precomputed `cv2.integral2` output
+        
+    Returns:
+        np.ndarray: float32 map of window variances, one entry per window
+    """
+    win_h, win_w = (window_size, window_size) if np.isscalar(window_size) else window_size
+    step_y, step_x = (stride, stride) if np.isscalar(stride) else stride
+    h, w = residual.shape
+    if win_h > h or win_w > w or win_h < 1 or win_w < 1:
+        return np.zeros((0, 0), dtype=np.float32)
+    
+    if integrals is None:
+        integrals = _integral_images(residual)
+    ys = np.arange(0, h - win_h + 1, step_y)
+    xs = np.arange(0, w - win_w + 1, step_x)
+    y0, x0 = np.ix_(ys, xs)
+    return _window_variance(integrals, y0, x0, y0 + win_h, x0 + win_w).astype(np.float32)
+
+def quadtree_noise_cells(integrals, shape, grid_size=4, min_cell=32, threshold=4.0):
+    """
+    Adaptive quadtree over the noise residual.
+    
+    Noise deviations are measured on probe windows of `min_cell` pixels
+    (stride `min_cell // 2`) against the global robust estimate, so a small
+    region is not diluted by the cell around it. Starting from a coarse
+    grid, only the cells that contain a deviating probe are split, so the
+    work grows with the amount of suspicious content rather than with the
+    image size. Any region at least 1.5 * `min_cell` pixels on each side
+    fully contains a probe and is isolated down to the smallest cells.
+    
+    Args:
+        integrals (tuple): `cv2.integral2` output for the residual
+        shape (tuple): (height, width) of the residual
+        grid_size (int): Cells per side of the starting grid
+        min_cell (int): Probe side, and cells are not split below this side length
+        threshold (float): Robust z-score (log-variance, MAD-scaled) that
+            marks a probe as deviating
+        
+    Returns:
+        tuple: (leaf cells as an (N, 4) array of y0, x0, y1, x1,
+        leaf variances, boolean flags of leaves holding a deviating probe)
+    """
+    h, w = shape
+    
+    def grid_cells(n):
+        ys = np.linspace(0, h, n + 1).astype(np.int64)
+        xs = np.linspace(0, w, n + 1).astype(np.int64)
+        y0, x0 = np.meshgrid(ys[:-1], xs[:-1], indexing='ij')
+        y1, x1 = np.meshgrid(ys[1:], xs[1:], indexing='ij')
+        return np.stack([y0.ravel(), x0.ravel(), y1.ravel(), x1.ravel()], axis=1)
+    
+    # Probe windows over the whole image (O(1) lookups each) give the global
+    # robust estimate and the deviating spots
+    step = max(min_cell // 2, 1)
+    probe_ys = np.arange(0, h - min_cell + 1, step)
+    probe_xs = np.arange(0, w - min_cell + 1, step)
+    if probe_ys.size == 0 or probe_xs.size == 0:
+        cell = np.array([[0, 0, h, w]], dtype=np.int64)
+        return cell, _window_variance(integrals, *cell.T), np.zeros(1, dtype=bool)
+    y0, x0 = np.ix_(probe_ys, probe_xs)
+    log_var = np.log(_window_variance(integrals, y0, x0, y0 + min_cell, x0 + min_cell) + 1e-6)
+    median = np.median(log_var)
+    # MAD floored at ~5% relative variance so very clean images do not explode
+    scale = max(1.4826 * np.median(np.abs(log_var - median)), 0.05)
+    deviating_probes = np.abs(log_var - median) / scale > threshold
+    
+    # Summed-area table of the deviating probes: O(1) count per cell
+    table = np.zeros((probe_ys.size + 1, probe_xs.size + 1), dtype=np.int64)
+    table[1:, 1:] = deviating_probes.cumsum(axis=0).cumsum(axis=1)
+    
+    def deviating_inside(cells):
+        # Probes whose window lies entirely inside each cell
+        r0 = np.minimum(-(-cells[:, 0] // step), probe_ys.size)
+        c0 = np.minimum(-(-cells[:, 1] // step), probe_xs.size)
+        r1 = np.clip((cells[:, 2] - min_cell) // step + 1, r0, probe_ys.size)
+        c1 = np.clip((cells[:, 3] - min_cell) // step + 1, c0, probe_xs.size)
+        return (table[r1, c1] - table[r0, c1] - table[r1, c0] + table[r0, c0]) > 0
+    
+    leaves, leaf_vars, leaf_flags = [], [], []
+    cells = grid_cells(grid_size)
+    while len(cells):
+        variances = _window_variance(integrals, *cells.T)
+        deviating = deviating_inside(cells)
+        
+        heights, widths = cells[:, 2] - cells[:, 0], cells[:, 3] - cells[:, 1]
+        split = deviating & (np.minimum(heights, widths) >= 2 * min_cell)
+        
+        leaves.append(cells[~split])
+        leaf_vars.append(variances[~split])
+        leaf_flags.append(deviating[~split])
+        
+        # Children of every split cell, built in one vectorized step
+        parents = cells[split]
+        mid_y = (parents[:, 0] + parents[:, 2]) // 2
+        mid_x = (parents[:, 1] + parents[:, 3]) // 2
+        cells = np.concatenate([
+            np.stack([parents[:, 0], parents[:, 1], mid_y, mid_x], axis=1),
+            np.stack([parents[:, 0], mid_x, mid_y, parents[:, 3]], axis=1),
+            np.stack([mid_y, parents[:, 1], parents[:, 2], mid_x], axis=1),
+            np.stack([mid_y, mid_x, parents[:, 2], parents[:, 3]], axis=1),
+        ])
+    
+    return np.concatenate(leaves), np.concatenate(leaf_vars), np.concatenate(leaf_flags)
+
+def analyze_noise_inconsistency(image_path, return_map=False, map_window=32, map_stride=16,
+                                mode='grid', min_cell=32):
     """
     Advanced local noise analysis - divides image into regions and compares noise.
     Real photos have consistent sensor noise. AI images have inconsistent or missing noise.
     
+    The high-pass residual is computed once for the whole image, so region
+    borders carry no filter seams, and region variances come from integral
+    images.
+    
     Args:
         image_path (str): Path to image file
+        return_map (bool): If True, includes a dense noise-level map
+        map_window (int): Window side of the dense map in pixels
+        map_stride (int): Step between windows of the dense map in pixels
+        mode (str): 'grid' for the fixed 4x4 grid, or 'quadtree' to refine
+            only the cells whose noise deviates from the global estimate
+        min_cell (int): Smallest quadtree cell side in pixels; regions of
+            1.5 * min_cell pixels per side and larger are isolated
         
     Returns:
         dict: Noise inconsistency analysis results
@@ -27,34 +166,24 @@ def analyze_noise_inconsistency(image_path):
         if img is None:
             return results
         
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).astype(np.float32)
         h, w = gray.shape
         
+        # Extract noise using high-pass filter over the full image
+        residual = gray - cv2.GaussianBlur(gray, (5, 5), 0)
+        
+        integrals = _integral_images(residual)
+        
+        if return_map:
+            results['noise_level_map'] = noise_level_map(residual, map_window, map_stride, integrals)
+        
         # Divide image into grid (e.g., 4x4 = 16 regions)
         grid_size = 4
         region_h = h // grid_size
         region_w = w // grid_size
         
-        noise_variances = []
-        
-        for i in range(grid_size):
-            for j in range(grid_size):
-                # Extract region
-                y_start = i * region_h
-                y_end = (i + 1) * region_h
-                x_start = j * region_w
-                x_end = (j + 1) * region_w
-                
-                region = gray[y_start:y_end, x_start:x_end]
-                
-                # Extract noise using high-pass filter
-                # Denoise the region
-                denoised = cv2.GaussianBlur(region, (5, 5), 0)
-                noise = region.astype(float) - denoised.astype(float)
-                
-                # Calculate noise variance
-                noise_var = np.var(noise)
-                noise_variances.append(noise_var)
+        grid = noise_level_map(residual, (region_h, region_w), (region_h, region_w), integrals)
+        noise_variances = grid[:grid_size, :grid_size].ravel().tolist()
         
         results['regions_analyzed'] = len(noise_variances)
         
@@ -67,10 +196,21 @@ def analyze_noise_inconsistency(image_path):
         results['noise_variance_std'] = float(noise_std)
         results['noise_variance_inconsistency'] = float(noise_std / (noise_mean + 1e-6))
         
-        # Count suspicious regions (very low or very high noise)
-        for nv in noise_variances:
-            if nv < 1.0 or nv > noise_mean * 3:
-                results['suspicious_regions'] += 1
+        if mode == 'quadtree':
+            cells, _, deviating = quadtree_noise_cells(integrals, (h, w), grid_size, min_cell)
+            areas = (cells[:, 2] - cells[:, 0]) * (cells[:, 3] - cells[:, 1])
+            suspicious_area = float(np.sum(areas[deviating])) / (h * w)
+            
+            # Area-weighted, in units of one starting grid region
+            results['regions_analyzed'] = int(len(cells))
+            results['suspicious_regions'] = round(suspicious_area * len(noise_variances), 2)
+            results['suspicious_area_ratio'] = suspicious_area
+            results['suspicious_cells'] = [tuple(int(v) for v in cell) for cell in cells[deviating]]
+        else:
+            # Count suspicious regions (very low or very high noise)
+            for nv in noise_variances:
+                if nv < 1.0 or nv > noise_mean * 3:
+                    results['suspicious_regions'] += 1
         
         # Decision criteria
         # Very low average noise suggests AI generation
@@ -82,7 +222,7 @@ def analyze_noise_inconsistency(image_path):
             results['is_suspicious'] = True
             results['confidence'] = 'Medium'
         # Too many suspicious regions
-        elif results['suspicious_regions'] > len(noise_variances) * 0.5:
+        elif results['suspicious_regions'] > grid_size * grid_size * 0.5:
             results['is_suspicious'] = True
             results['confidence'] = 'Medium'
             
@@ -0,0 +1,211 @@
+import numpy as np
+import cv2
+from scipy import fft as sp_fft
+
+from .noise_analysis import WAVELET_KERNEL
+
+# PCE above this value is the customary decision threshold for a camera match
+PCE_THRESHOLD = 60.0
+
+# Pixels at or above this level are clipped and carry no PRNU
+SATURATION_LEVEL = 250
+
+def _read_gray(image_path):
+    """Reads an image as float32 grayscale, or None if it cannot be read."""
+    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    return None if img is None else img.astype(np.float32)
+
+def extract_prnu_residual(gray):
+    """
+    Noise residual used for PRNU estimation.
+
+    The residual is the finest wavelet-like detail plane, with row and column
+    means removed to suppress linear patterns shared by every camera of a
+    model (readout lines, JPEG grid).
+
+    Args:
+        gray (np.ndarray): 2-D float32 image.
+
+    Returns:
+        np.ndarray: float32 residual of the same shape.
+    """
+    smooth = cv2.sepFilter2D(gray, -1, WAVELET_KERNEL, WAVELET_KERNEL, borderType=cv2.BORDER_REFLECT)
+    residual = gray - smooth
+    residual -= residual.mean(axis=1, keepdims=True)
+    residual -= residual.mean(axis=0, keepdims=True)
+    return residual
+
+def build_prnu_fingerprint(image_paths, output_path=None):
+    """
+    Builds a camera PRNU fingerprint from reference images.
+
+    Uses the maximum-likelihood estimate K = sum(W * I) / sum(I * I) with
+    running sums, so only two accumulators are held in memory no matter how
+    many images are used. Images whose size differs from the first readable
+    one are skipped.
+
+    Args:
+        image_paths (list): Reference images from one camera (flat, bright
+            scenes give the best estimate)
+        output_path (str): Optional .npy path to store the fingerprint
+
+    Returns:
+        np.ndarray: float32 fingerprint, or None if no image could be used
+    """
+    numerator = None
+    denominator = None
+    used = 0
+
+    for path in image_paths:
+        gray = _read_gray(path)
+        if gray is None:
+            print(f"Skipping unreadable image: {path}")
+            continue
+        if numerator is None:
+            numerator = np.zeros(gray.shape, dtype=np.float32)
+            denominator = np.zeros(gray.shape, dtype=np.float32)
+        elif gray.shape != numerator.shape:
+            print(f"Skipping {path}: size {gray.shape} differs from {numerator.shape}")
+            continue
+
+        valid = gray < SATURATION_LEVEL
+        weighted = np.where(valid, gray, 0)
+        numerator += extract_prnu_residual(gray) * weighted
+        denominator += weighted * weighted
+        used += 1
+
+    if used == 0:
+        return None
+
+    fingerprint = numerator / np.maximum(denominator, 1.0)
+    # Remove the linear patterns that survived averaging
+    fingerprint -= fingerprint.mean(axis=1, keepdims=True)
+    fingerprint -= fingerprint.mean(axis=0, keepdims=True)
+    fingerprint = fingerprint.astype(np.float32)
+
+    if output_path:
+        np.save(output_path, fingerprint)
+    return fingerprint
+
+def compute_pce(correlation, peak=(0, 0), exclude_radius=5):
+    """
+    Peak-to-correlation energy of a circular cross-correlation plane.
+
+    Args:
+        correlation (np.ndarray): 2-D cross-correlation (zero shift at [0, 0])
+        peak (tuple): Location of the peak to score
+        exclude_radius (int): Half-size of the neighbourhood left out of the
+            noise-floor energy
+
+    Returns:
+        float: Signed PCE value
+    """
+    h, w = correlation.shape
+    rows = (peak[0] + np.arange(-exclude_radius, exclude_radius + 1)) % h
+    cols = (peak[1] + np.arange(-exclude_radius, exclude_radius + 1)) % w
+    neighbourhood = correlation[np.ix_(rows, cols)]
+
+    total_energy = float(np.sum(correlation.astype(np.float64) ** 2))
+    floor_count = correlation.size - neighbourhood.size
+    floor_energy = (total_energy - float(np.sum(neighbourhood.astype(np.float64) ** 2))) / max(floor_count, 1)
+
+    value = float(correlation[peak])
+    return float(np.sign(value) * value * value / max(floor_energy, 1e-20))
+
+class PRNUFingerprintLibrary:
+    """
+    A set of camera fingerprints with cached spectra for fast matching.
+
+    The spectrum of every fingerprint is computed once, so testing an image
+    costs one forward FFT plus one multiply and inverse FFT per fingerprint.
+
+    Usage:
+        library = PRNUFingerprintLibrary({'camera_a': 'camera_a.npy'})
+        result = library.match('photo.jpg')
+    """
+
+    def __init__(self, fingerprints=None):
+        """
+        Args:
+            fingerprints (dict): Optional mapping of name -> fingerprint array
+                or .npy path
+        """
+        self.fingerprints = {}
+        self._spectra = {}
+        for name, fingerprint in (fingerprints or {}).items():
+            self.add(name, fingerprint)
+
+    def add(self, name, fingerprint):
+        """
+        Adds or replaces a fingerprint.
+
+        Args:
+            name (str): Camera identifier
+            fingerprint (np.ndarray or str): Fingerprint array or .npy path
+        """
+        if isinstance(fingerprint, str):
+            fingerprint = np.load(fingerprint, mmap_mode='r')
+        self.fingerprints[name] = fingerprint
+        self._spectra.pop(name, None)
+
+    def _spectrum(self, name):
+        """Returns the cached conjugate real FFT of a fingerprint."""
+        if name not in self._spectra:
+            fingerprint = np.asarray(self.fingerprints[name], dtype=np.float32)
+            self._spectra[name] = np.conj(sp_fft.rfft2(fingerprint, workers=-1))
+        return self._spectra[name]
+
+    def match(self, image_path, threshold=PCE_THRESHOLD):
+        """
+        Correlates an image against every fingerprint of the same size.
+
+        The test residual is weighted by the image intensity, so the
+        zero-shift correlation equals sum(W * I * K), the PRNU detector
+        statistic; fingerprints are reused across images via their spectra.
+
+        Args:
+            image_path (str): Path to image file
+            threshold (float): PCE above which a camera is identified
+
+        Returns:
+            dict: PRNU matching results
+        """
+        results = {
+            'camera_identified': False,
+            'best_match': None,
+            'best_pce': 0.0,
+            'pce_scores': {},
+            'fingerprints_compared': 0
+        }
+
+        try:
+            gray = _read_gray(image_path)
+            if gray is None:
+                return results
+
+            weighted = np.where(gray < SATURATION_LEVEL, gray, 0)
+            test = extract_prnu_residual(gray) * weighted
+            test_spectrum = None
+
+            for name, fingerprint in self.fingerprints.items():
+                if fingerprint.shape != test.shape:
+                    continue
+                if test_spectrum is None:
+                    test_spectrum = sp_fft.rfft2(test, workers=-1)
+                correlation = sp_fft.irfft2(test_spectrum * self._spectrum(name), test.shape, workers=-1)
+                pce = compute_pce(correlation)
+                results['pce_scores'][name] = pce
+                results['fingerprints_compared'] += 1
+                if pce > results['best_pce']:
+                    results['best_pce'] = pce
+                    results['best_match'] = name
+
+            if results['best_pce'] > threshold:
+                results['camera_identified'] = True
+            else:
+                results['best_match'] = None
+
+        except Exception as e:
+            print(f"Error in PRNU matching: {e}")
+
+        return results
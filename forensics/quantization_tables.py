@@ -0,0 +1,217 @@
+import hashlib
+import numpy as np
+from PIL import Image
+
+# IJG (libjpeg) reference tables from Annex K of the JPEG standard, natural order
+IJG_LUMINANCE_TABLE = np.array([
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99
+], dtype=np.float64)
+
+IJG_CHROMINANCE_TABLE = np.array([
+    17, 18, 24, 47, 99, 99, 99, 99,
+    18, 21, 26, 66, 99, 99, 99, 99,
+    24, 26, 56, 99, 99, 99, 99, 99,
+    47, 66, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99
+], dtype=np.float64)
+
+# Sampling factors of the luma component -> chroma subsampling layout
+SUBSAMPLING_LAYOUTS = {
+    (1, 1): '4:4:4',
+    (2, 1): '4:2:2',
+    (1, 2): '4:4:0',
+    (2, 2): '4:2:0',
+    (4, 1): '4:1:1',
+}
+
+# Encoder categories that count as evidence of post-capture processing
+EDITING_CATEGORIES = ('editor',)
+
+# Hashed index: table digest -> (encoder name, category)
+_SIGNATURE_INDEX = {}
+
+
+def ijg_scaled_table(base_table, quality):
+    """
+    Scales an IJG reference table the way libjpeg does for a given quality.
+
+    Args:
+        base_table (np.ndarray): 64-entry reference table.
+        quality (int): IJG quality factor (1-100).
+
+    Returns:
+        np.ndarray: The scaled 64-entry table.
+    """
+    quality = min(max(int(quality), 1), 100)
+    scale = 5000 // quality if quality < 50 else 200 - 2 * quality
+    return np.clip(np.floor((base_table * scale + 50) / 100), 1, 255)
+
+
+def _table_digest(qtables):
+    """Returns a stable hex digest for an ordered sequence of 64-entry tables."""
+    packed = np.asarray([np.asarray(t, dtype=np.uint16) for t in qtables], dtype=np.uint16)
+    return hashlib.sha1(packed.tobytes()).hexdigest()
+
+
+def register_encoder_signature(qtables, encoder, category):
+    """
+    Adds a set of quantization tables to the encoder fingerprint index.
+
+    Args:
+        qtables (list): Quantization tables in table-id order, each with 64
+            entries in natural (row-major) order, as returned by
+            `PIL.Image.open(...).quantization`.
+        encoder (str): Human-readable encoder name, e.g. 'Canon EOS (Fine)'.
+        category (str): One of 'camera', 'phone', 'editor', 'social' or
+            'library'.
+
+    Returns:
+        str: The digest under which the signature was stored.
+    """
+    if isinstance(qtables, dict):
+        qtables = [qtables[k] for k in sorted(qtables)]
+    digest = _table_digest(qtables)
+    _SIGNATURE_INDEX[digest] = (encoder, category)
+    return digest
+
+
+def _register_ijg_signatures():
+    """Indexes the standard IJG tables for every quality setting."""
+    for quality in range(1, 101):
+        luma = ijg_scaled_table(IJG_LUMINANCE_TABLE, quality)
+        chroma = ijg_scaled_table(IJG_CHROMINANCE_TABLE, quality)
+        encoder = f'IJG libjpeg (quality {quality})'
+        # Libraries (PIL, OpenCV, GIMP) and platforms that re-encode with libjpeg
+        register_encoder_signature([luma], encoder, 'library')
+        register_encoder_signature([luma, chroma], encoder, 'library')
+
+
+_register_ijg_signatures()
+
+
+def estimate_ijg_quality(table, base_table=IJG_LUMINANCE_TABLE):
+    """
+    Estimates the IJG quality factor of a quantization table analytically.
+
+    The per-coefficient scale against the reference table is inverted to a
+    quality value, and the neighbouring integer qualities are checked for an
+    exact match.
+
+    Args:
+        table (list): 64-entry quantization table in natural order.
+        base_table (np.ndarray): IJG reference table the encoder scaled.
+
+    Returns:
+        tuple: (quality, mean absolute error of the re-scaled table)
+    """
+    table = np.asarray(table, dtype=np.float64)
+    # Entries clipped to 1 or 255 no longer carry the scale factor
+    unclipped = (table > 1) & (table < 255)
+    if np.any(unclipped):
+        scale = np.median(100.0 * table[unclipped] / base_table[unclipped])
+        quality = (200.0 - scale) / 2.0 if scale <= 100 else 5000.0 / max(scale, 1e-6)
+        quality = int(round(min(max(quality, 1), 100)))
+        candidates = range(max(quality - 3, 1), min(quality + 3, 100) + 1)
+    else:
+        # Fully clipped tables: only a search over every quality finds them
+        quality, candidates = 1, range(1, 101)
+
+    best_quality, best_error = quality, np.inf
+    for candidate in candidates:
+        error = np.mean(np.abs(ijg_scaled_table(base_table, candidate) - table))
+        if error < best_error:
+            best_quality, best_error = candidate, error
+
+    return best_quality, float(best_error)
+
+
+def analyze_quantization_tables(image_path):
+    """
+    Reads JPEG quantization tables from the file header without decoding pixels.
+    Estimates the IJG quality and looks the tables up in the encoder index.
+
+    Args:
+        image_path (str): Path to image file
+
+    Returns:
+        dict: Quantization table analysis results
+    """
+    results = {
+        'is_jpeg': False,
+        'table_count': 0,
+        'quality_estimate': 0,
+        'quality_per_table': [],
+        'standard_tables': False,
+        'subsampling': 'Unknown',
+        'table_digest': '',
+        'encoder_match': None,
+        'encoder_category': None,
+        'is_suspicious': False
+    }
+
+    try:
+        # Image.open only parses the markers up to the start of scan
+        with Image.open(image_path) as img:
+            if img.format != 'JPEG':
+                results['note'] = 'Not a JPEG image'
+                return results
+
+            qtables = getattr(img, 'quantization', None) or {}
+            layers = getattr(img, 'layer', None) or []
+
+        results['is_jpeg'] = True
+        if not qtables:
+            return results
+
+        tables = [list(qtables[k]) for k in sorted(qtables)]
+        results['table_count'] = len(tables)
+
+        # Chroma subsampling from the luma sampling factors
+        if len(layers) == 1:
+            results['subsampling'] = 'Grayscale'
+        elif layers:
+            h_max = max(layer[1] for layer in layers)
+            v_max = max(layer[2] for layer in layers)
+            h_min = min(layer[1] for layer in layers)
+            v_min = min(layer[2] for layer in layers)
+            results['subsampling'] = SUBSAMPLING_LAYOUTS.get(
+                (h_max // h_min, v_max // v_min), 'Custom'
+            )
+
+        # Analytic IJG quality per table (luma first, then chroma)
+        errors = []
+        for idx, table in enumerate(tables):
+            base = IJG_LUMINANCE_TABLE if idx == 0 else IJG_CHROMINANCE_TABLE
+            quality, error = estimate_ijg_quality(table, base)
+            results['quality_per_table'].append(quality)
+            errors.append(error)
+
+        results['quality_estimate'] = results['quality_per_table'][0]
+        results['standard_tables'] = bool(max(errors) == 0)
+
+        # Encoder fingerprint lookup
+        digest = _table_digest(tables)
+        results['table_digest'] = digest
+        match = _SIGNATURE_INDEX.get(digest)
+        if match is None and len(tables) > 2:
+            # Some encoders write a separate table for each chroma component
+            match = _SIGNATURE_INDEX.get(_table_digest(tables[:2]))
+        if match is not None:
+            results['encoder_match'], results['encoder_category'] = match
+            if results['encoder_category'] in EDITING_CATEGORIES:
+                results['is_suspicious'] = True
+
+    except Exception as e:
+        print(f"Error in quantization table analysis: {e}")
+
+    return results
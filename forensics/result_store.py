@@ -0,0 +1,203 @@
+import json
+import numpy as np
+
+from .classifier import (FEATURES, VERDICTS, EVIDENCE_SECTIONS, extract_features,
+                         classify_batch, render_result, _merge_config)
+
+class ResultStore:
+    """
+    Compact store of the detector outputs the classifier consumes.
+
+    Each analysed image is kept as its classifier feature row (see
+    `classifier.FEATURES`) plus the few text values used in evidence
+    strings, together with the verdict it last received. A corpus can then
+    be re-scored with new weights or thresholds in one `classify_batch`
+    call instead of re-running every detector. Images whose verdict came
+    from a decisive metadata signature are stored as triaged: their skipped
+    detectors are empty, so re-scoring keeps the signature verdict and
+    `result` returns the triage result they were given.
+
+    Usage:
+        store = ResultStore()
+        detector = MetaForens(result_store=store)
+        detector.batch_analyze(image_paths)
+        store.save('corpus.npz')
+
+        report = reclassify(ResultStore.load('corpus.npz'), new_config)
+        print(report['changed'])
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.contexts = []
+        self.verdicts = []
+        self.triaged = []
+        self.triage_results = []  # Triage result of each triaged image, None otherwise
+        self.config = None  # Config the stored verdicts came from (None = defaults)
+        self._rows = []
+
+    @classmethod
+    def load(cls, path):
+        """Loads a store written by `save`."""
+        data = np.load(path)
+        stored_features = [str(name) for name in data['feature_names']]
+        if stored_features != list(FEATURES):
+            raise ValueError("Result store was written with a different classifier feature set")
+        store = cls()
+        store.paths = [str(p) for p in data['paths']]
+        store.contexts = [json.loads(str(c)) for c in data['contexts']]
+        store.verdicts = [int(v) for v in data['verdicts']]
+        # Stores written before triaged images were recorded have none
+        store.triaged = [bool(t) for t in data['triaged']] if 'triaged' in data.files else [False] * len(store.paths)
+        if 'triage_results' in data.files:
+            store.triage_results = [json.loads(str(r)) for r in data['triage_results']]
+        else:
+            store.triage_results = [None] * len(store.paths)
+        store.config = json.loads(str(data['config']))
+        store._rows = list(data['features'])
+        return store
+
+    def save(self, path):
+        """Stores the features, contexts and verdicts as a .npz file."""
+        np.savez_compressed(path,
+                            feature_names=np.array(FEATURES),
+                            features=self.features,
+                            paths=np.array(self.paths, dtype=str),
+                            contexts=np.array([json.dumps(c) for c in self.contexts], dtype=str),
+                            verdicts=np.array(self.verdicts, dtype=np.int8),
+                            triaged=np.array(self.triaged, dtype=bool),
+                            triage_results=np.array([json.dumps(r) for r in self.triage_results], dtype=str),
+                            config=np.array(json.dumps(self.config)))
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def features(self):
+        """(N, len(FEATURES)) float64 feature matrix."""
+        if not self._rows:
+            return np.zeros((0, len(FEATURES)), dtype=np.float64)
+        return np.vstack(self._rows)
+
+    def add(self, image_path, analyses, verdict=None, triage_result=None):
+        """
+        Adds one image.
+
+        Args:
+            image_path (str): Path of the analysed image
+            analyses (dict): `classify_image` keyword arguments (detector outputs)
+            verdict (str): Verdict already given; computed with the store's
+                config if omitted
+            triage_result (dict): Result built from a decisive metadata
+                signature; its verdict is kept by `reclassify` and the result
+                itself is returned by `result`
+        """
+        row, context = extract_features(**analyses)
+        if triage_result is not None:
+            # A copy, so keys the caller adds later are not stored
+            triage_result = json.loads(json.dumps(triage_result))
+            verdict = triage_result['verdict']
+        if verdict is None:
+            code = int(classify_batch(row[None, :], self.config)['verdict'][0])
+        else:
+            code = VERDICTS.index(verdict)
+        self.paths.append(image_path)
+        # Evidence templates only ever str() these values, so JSON keeps them exact
+        self.contexts.append({key: None if value is None else str(value) for key, value in context.items()})
+        self.verdicts.append(code)
+        self.triaged.append(triage_result is not None)
+        self.triage_results.append(triage_result)
+        self._rows.append(row)
+
+    def result(self, index, classifier_config=None):
+        """
+        Full `classify_image` result, evidence included, for one stored image.
+        Triaged images return their triage result, whatever the config.
+
+        Args:
+            index (int): Position in the store
+            classifier_config (dict): Config overrides; defaults to the
+                config of the stored verdicts
+
+        Returns:
+            dict: Classification results with probabilities and evidence
+        """
+        if self.triaged[index]:
+            return self._triage_result(index)
+        if classifier_config is None:
+            classifier_config = self.config
+        features = self._rows[index][None, :]
+        return render_result(classify_batch(features, classifier_config), 0, features, self.contexts[index])
+
+    def _triage_result(self, index):
+        """Stored triage result, or a verdict-only one if none was kept."""
+        if self.triage_results[index] is not None:
+            return json.loads(json.dumps(self.triage_results[index]))
+        code = self.verdicts[index]
+        categories = ('ai_generated', 'ai_edited', 'real_photo')
+        probabilities = {category: 0.0 for category in categories}
+        probabilities[categories[code]] = 100.0
+        return {
+            'verdict': VERDICTS[code],
+            'confidence': "High",
+            'probabilities': probabilities,
+            'evidence': {section: [] for section in EVIDENCE_SECTIONS},
+            'categorized_evidence': {category: [] for category in categories},
+            'raw_scores': {category: 0.0 for category in categories}
+        }
+
+def reclassify(store, classifier_config=None, update=True):
+    """
+    Re-scores every stored image with a new classifier configuration.
+    Triaged images keep their metadata-signature verdict.
+
+    Args:
+        store (ResultStore): Stored detector outputs
+        classifier_config (dict): Overrides of DEFAULT_CLASSIFIER_CONFIG
+            (weights, confidence thresholds, old-image rules); unknown keys
+            raise ValueError
+        update (bool): If True, the new verdicts and config become the
+            store's reference for the next comparison
+
+    Returns:
+        dict: Number of images and changed verdicts, verdict counts before
+        and after, transition counts keyed "from -> to" and the paths whose
+        verdict changed
+    """
+    report = {
+        'total': len(store),
+        'changed': 0,
+        'previous_counts': {verdict: 0 for verdict in VERDICTS},
+        'new_counts': {verdict: 0 for verdict in VERDICTS},
+        'transitions': {},
+        'changed_paths': []
+    }
+    if not len(store):
+        return report
+
+    batch = classify_batch(store.features, classifier_config)
+    previous = np.array(store.verdicts, dtype=np.int64)
+    # Triage verdicts do not depend on the classifier config
+    current = np.where(np.array(store.triaged, dtype=bool), previous, batch['verdict'])
+
+    previous_counts = np.bincount(previous, minlength=len(VERDICTS))
+    new_counts = np.bincount(current, minlength=len(VERDICTS))
+    report['previous_counts'] = {verdict: int(previous_counts[i]) for i, verdict in enumerate(VERDICTS)}
+    report['new_counts'] = {verdict: int(new_counts[i]) for i, verdict in enumerate(VERDICTS)}
+
+    changed = np.flatnonzero(previous != current)
+    report['changed'] = int(len(changed))
+    report['changed_paths'] = [store.paths[i] for i in changed]
+
+    # "from -> to" verdict pair counts via a joint index (string keys keep
+    # the report JSON-serialisable)
+    pairs = np.bincount(previous[changed] * len(VERDICTS) + current[changed], minlength=len(VERDICTS) ** 2)
+    for pair in np.flatnonzero(pairs):
+        source, target = divmod(int(pair), len(VERDICTS))
+        report['transitions'][f"{VERDICTS[source]} -> {VERDICTS[target]}"] = int(pairs[pair])
+
+    if update:
+        store.verdicts = current.tolist()
+        store.config = _merge_config(classifier_config)
+
+    return report
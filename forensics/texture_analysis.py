@@ -1,6 +1,85 @@
 import numpy as np
 from PIL import Image
 import cv2
+from scipy import fft as sp_fft
+
+# Longest side of the pyramid level used for the coarse self-similarity search
+COARSE_MAX_SIDE = 512
+
+def _normxcorr_fft(image, template):
+    """
+    Normalised cross-correlation (TM_CCOEFF_NORMED) computed with FFTs.
+    
+    The numerator is one real-FFT correlation with the zero-mean template and
+    the local image energy comes from integral images, so the cost does not
+    depend on the template size.
+    
+    Args:
+        image (np.ndarray): 2-D float32 search image.
+        template (np.ndarray): 2-D float32 template, smaller than `image`.
+        
+    Returns:
+        np.ndarray: Correlation map of shape (H - th + 1, W - tw + 1).
+    """
+    h, w = image.shape
+    th, tw = template.shape
+    template = template - template.mean()
+    template_norm = np.sqrt(np.sum(template * template))
+    
+    shape = (h + th - 1, w + tw - 1)
+    fshape = [sp_fft.next_fast_len(n, real=True) for n in shape]
+    spectrum = sp_fft.rfft2(image, fshape, workers=-1)
+    spectrum *= np.conj(sp_fft.rfft2(template, fshape, workers=-1))
+    numerator = sp_fft.irfft2(spectrum, fshape, workers=-1)[:h - th + 1, :w - tw + 1]
+    
+    # Local sums over every template-sized window via integral images
+    window_sum, window_sqsum = cv2.integral2(image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    def box(integral):
+        return (integral[th:, tw:] - integral[:-th, tw:]
+                - integral[th:, :-tw] + integral[:-th, :-tw])
+    local_sum = box(window_sum)
+    local_var = box(window_sqsum) - local_sum * local_sum / (th * tw)
+    denominator = np.sqrt(np.maximum(local_var, 0)) * template_norm
+    
+    corr = np.zeros_like(numerator)
+    valid = denominator > 1e-6 * max(template_norm, 1e-6)
+    corr[valid] = numerator[valid] / denominator[valid]
+    return np.clip(corr, -1.0, 1.0)
+
+def _find_peaks(corr, threshold, radius, exclude=None, max_peaks=10):
+    """
+    Finds correlation peaks above a threshold with non-maximum suppression.
+    
+    Args:
+        corr (np.ndarray): Correlation map.
+        threshold (float): Minimum peak value.
+        radius (int): Suppression radius in pixels.
+        exclude (tuple): Optional (y, x) location whose neighbourhood is ignored
+            (the trivial self-match).
+        max_peaks (int): Maximum number of peaks to return.
+        
+    Returns:
+        list: (y, x, value) tuples sorted by descending value.
+    """
+    radius = max(int(radius), 1)
+    kernel = np.ones((2 * radius + 1, 2 * radius + 1), np.uint8)
+    # Compare in the dilation's precision; rounding to float32 can lift a
+    # float64 peak above its own local maximum
+    corr = corr.astype(np.float32)
+    local_max = cv2.dilate(corr, kernel)
+    ys, xs = np.nonzero((corr >= local_max) & (corr > threshold))
+    order = np.argsort(-corr[ys, xs])
+    
+    peaks = []
+    for y, x in zip(ys[order], xs[order]):
+        if exclude is not None and abs(y - exclude[0]) <= radius and abs(x - exclude[1]) <= radius:
+            continue
+        if any(abs(y - py) <= radius and abs(x - px) <= radius for py, px, _ in peaks):
+            continue
+        peaks.append((int(y), int(x), float(corr[y, x])))
+        if len(peaks) >= max_peaks:
+            break
+    return peaks
 
 def analyze_texture_consistency(image_path):
     """
@@ -17,6 +96,7 @@ def analyze_texture_consistency(image_path):
         'texture_variance': 0.0,
         'smoothness_score': 0.0,
         'repetition_detected': False,
+        'repetition_peaks': 0,
         'is_suspicious': False
     }
     
@@ -44,19 +124,46 @@ def analyze_texture_consistency(image_path):
         elif results['texture_variance'] > 5000:
             results['is_suspicious'] = True
             
-        # Check for repetitive patterns using autocorrelation
-        # This is a simplified check
+        # Check for repetitive patterns using self-similarity of a quarter crop.
+        # Coarse-to-fine: FFT correlation on a downsampled pyramid level, then
+        # only the candidate peaks are refined at full resolution.
         h, w = img.shape
         if h > 100 and w > 100:
-            sample = img[h//4:h//2, w//4:w//2]
-            # Look for self-similarity
-            result_corr = cv2.matchTemplate(img, sample, cv2.TM_CCOEFF_NORMED)
-            max_val = np.max(result_corr)
-            
-            # Find peaks (excluding the center which is always 1.0)
             threshold = 0.8
-            peaks = np.where(result_corr > threshold)
-            if len(peaks[0]) > 2:  # More than just the original location
+            y0, x0 = h // 4, w // 4
+            sample = img[y0:h//2, x0:w//2]
+            
+            scale = min(1.0, COARSE_MAX_SIDE / max(h, w))
+            if scale < 1.0:
+                coarse = cv2.resize(img, (max(int(w * scale), 1), max(int(h * scale), 1)),
+                                    interpolation=cv2.INTER_AREA)
+            else:
+                coarse = img
+            cy0, cx0 = int(round(y0 * scale)), int(round(x0 * scale))
+            coarse_sample = coarse[cy0:cy0 + max(int(sample.shape[0] * scale), 1),
+                                   cx0:cx0 + max(int(sample.shape[1] * scale), 1)]
+            
+            corr = _normxcorr_fft(coarse.astype(np.float32), coarse_sample.astype(np.float32))
+            radius = max(min(coarse_sample.shape) // 4, 2)
+            # Downsampling blurs the peaks, so the coarse gate is looser
+            candidates = _find_peaks(corr, threshold - 0.1, radius, exclude=(cy0, cx0), max_peaks=5)
+            
+            repetitions = []
+            margin = int(np.ceil(2 / scale))
+            for cy, cx, _ in candidates:
+                fy, fx = int(round(cy / scale)), int(round(cx / scale))
+                ys, xs = max(fy - margin, 0), max(fx - margin, 0)
+                window = img[ys:min(fy + margin + sample.shape[0], h),
+                             xs:min(fx + margin + sample.shape[1], w)]
+                if window.shape[0] < sample.shape[0] or window.shape[1] < sample.shape[1]:
+                    continue
+                refined = cv2.matchTemplate(window, sample, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, max_loc = cv2.minMaxLoc(refined)
+                if max_val > threshold:
+                    repetitions.append((ys + max_loc[1], xs + max_loc[0], float(max_val)))
+            
+            results['repetition_peaks'] = len(repetitions)
+            if repetitions:  # More than just the original location
                 results['repetition_detected'] = True
                 
     except Exception as e:
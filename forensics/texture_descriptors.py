@@ -0,0 +1,204 @@
+import numpy as np
+import cv2
+
+# 8-neighbourhood at radius 1, in circular order starting top-left
+LBP_NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+
+# Pixel offsets (dy, dx) for the co-occurrence matrices: 0, 45, 90 and 135 degrees
+GLCM_OFFSETS = [(0, 1), (-1, 1), (-1, 0), (-1, -1)]
+
+GLCM_STATS = ['contrast', 'homogeneity', 'energy', 'correlation']
+
+def _uniform_lbp_table():
+    """Maps the 256 raw 8-bit LBP codes to 58 uniform labels plus one catch-all."""
+    table = np.zeros(256, dtype=np.uint8)
+    label = 0
+    for code in range(256):
+        bits = [(code >> i) & 1 for i in range(8)]
+        transitions = sum(bits[i] != bits[(i + 1) % 8] for i in range(8))
+        if transitions <= 2:
+            table[code] = label
+            label += 1
+        else:
+            table[code] = 58
+    return table
+
+UNIFORM_LBP_TABLE = _uniform_lbp_table()
+LBP_BINS = 59
+
+def compute_lbp_codes(gray):
+    """
+    Uniform LBP labels computed with shifted-array comparisons.
+
+    Args:
+        gray (np.ndarray): 2-D uint8 image.
+
+    Returns:
+        np.ndarray: uint8 labels in [0, 58] of shape (H - 2, W - 2).
+    """
+    h, w = gray.shape
+    center = gray[1:h - 1, 1:w - 1]
+    codes = np.zeros(center.shape, dtype=np.uint8)
+    for bit, (dy, dx) in enumerate(LBP_NEIGHBOURS):
+        neighbour = gray[1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx]
+        codes |= (neighbour >= center).astype(np.uint8) << bit
+    return UNIFORM_LBP_TABLE[codes]
+
+def _tile_view(values, tile_size):
+    """Crops to whole tiles and returns an (n_tiles, T, T) array plus the grid shape."""
+    rows, cols = values.shape[0] // tile_size, values.shape[1] // tile_size
+    cropped = values[:rows * tile_size, :cols * tile_size]
+    tiles = cropped.reshape(rows, tile_size, cols, tile_size).swapaxes(1, 2)
+    return tiles.reshape(rows * cols, tile_size, tile_size), rows, cols
+
+def tile_lbp_histograms(codes, tile_size):
+    """
+    Normalised uniform-LBP histograms for every tile with a single bincount.
+
+    Args:
+        codes (np.ndarray): Output of `compute_lbp_codes`.
+        tile_size (int): Tile side in pixels.
+
+    Returns:
+        np.ndarray: float32 array of shape (n_tiles, 59).
+    """
+    tiles, rows, cols = _tile_view(codes, tile_size)
+    n_tiles = rows * cols
+    index_type = np.int32 if n_tiles * LBP_BINS < 2 ** 31 else np.int64
+    tile_base = (np.arange(n_tiles, dtype=index_type) * LBP_BINS)[:, None, None]
+    packed = (tile_base + tiles).ravel()
+    hist = np.bincount(packed, minlength=n_tiles * LBP_BINS).reshape(n_tiles, LBP_BINS)
+    return (hist / float(tile_size * tile_size)).astype(np.float32)
+
+def tile_glcm(quantized, tile_size, levels, offsets=GLCM_OFFSETS):
+    """
+    Symmetric, normalised co-occurrence matrices for every tile and offset.
+
+    Tile and level pair are packed into one index, so every offset costs a
+    single bincount. Pairs never cross tile borders.
+
+    Args:
+        quantized (np.ndarray): 2-D integer image with values in [0, levels).
+        tile_size (int): Tile side in pixels.
+        levels (int): Number of gray levels.
+        offsets (list): (dy, dx) pixel offsets.
+
+    Returns:
+        np.ndarray: float64 array of shape (n_tiles, n_offsets, levels, levels).
+    """
+    tiles, rows, cols = _tile_view(quantized, tile_size)
+    n_tiles, n_offsets = rows * cols, len(offsets)
+    cells = levels * levels
+    index_type = np.int32 if n_tiles * cells < 2 ** 31 else np.int64
+    tile_base = (np.arange(n_tiles, dtype=index_type) * cells)[:, None, None]
+    tiles = tiles.astype(index_type)
+
+    glcm = np.zeros((n_tiles, n_offsets, levels, levels), dtype=np.float64)
+    for k, (dy, dx) in enumerate(offsets):
+        y0, y1 = max(0, -dy), tile_size - max(0, dy)
+        x0, x1 = max(0, -dx), tile_size - max(0, dx)
+        first = tiles[:, y0:y1, x0:x1]
+        second = tiles[:, y0 + dy:y1 + dy, x0 + dx:x1 + dx]
+        packed = (tile_base + first * levels + second).ravel()
+        counts = np.bincount(packed, minlength=n_tiles * cells)
+        glcm[:, k] = counts.reshape(n_tiles, levels, levels)
+
+    glcm += glcm.swapaxes(2, 3)
+    glcm /= np.maximum(glcm.sum(axis=(2, 3), keepdims=True), 1)
+    return glcm
+
+def glcm_statistics(glcm):
+    """
+    Haralick statistics for a stack of normalised co-occurrence matrices.
+
+    Args:
+        glcm (np.ndarray): Array of shape (..., levels, levels).
+
+    Returns:
+        np.ndarray: Array of shape (..., 4) ordered as `GLCM_STATS`.
+    """
+    levels = glcm.shape[-1]
+    i, j = np.meshgrid(np.arange(levels), np.arange(levels), indexing='ij')
+    diff = (i - j).astype(np.float64)
+
+    contrast = np.sum(glcm * diff ** 2, axis=(-2, -1))
+    homogeneity = np.sum(glcm / (1.0 + np.abs(diff)), axis=(-2, -1))
+    energy = np.sum(glcm ** 2, axis=(-2, -1))
+
+    mu_i = np.sum(glcm * i, axis=(-2, -1))
+    mu_j = np.sum(glcm * j, axis=(-2, -1))
+    var_i = np.sum(glcm * (i - mu_i[..., None, None]) ** 2, axis=(-2, -1))
+    var_j = np.sum(glcm * (j - mu_j[..., None, None]) ** 2, axis=(-2, -1))
+    cov = np.sum(glcm * (i - mu_i[..., None, None]) * (j - mu_j[..., None, None]), axis=(-2, -1))
+    denom = np.sqrt(var_i * var_j)
+    # Constant tiles have no defined correlation; report perfect correlation
+    correlation = np.where(denom > 1e-12, cov / np.maximum(denom, 1e-12), 1.0)
+
+    return np.stack([contrast, homogeneity, energy, correlation], axis=-1)
+
+def feature_names(offsets=GLCM_OFFSETS):
+    """Column names of the descriptor matrix returned by `extract_texture_descriptors`."""
+    names = [f'lbp_{b}' for b in range(LBP_BINS)]
+    for dy, dx in offsets:
+        names.extend(f'glcm_{stat}_{dy}_{dx}' for stat in GLCM_STATS)
+    return names
+
+def extract_texture_descriptors(image_path, tile_size=64, levels=16):
+    """
+    Computes per-tile texture descriptors (uniform LBP histograms and GLCM
+    statistics) as a float32 feature matrix.
+
+    Args:
+        image_path (str): Path to image file
+        tile_size (int): Tile side in pixels
+        levels (int): Gray levels used for the co-occurrence matrices
+
+    Returns:
+        dict: Descriptor matrix, column names, tile origins and summary scores
+    """
+    names = feature_names()
+    results = {
+        'features': np.zeros((0, len(names)), dtype=np.float32),
+        'feature_names': names,
+        'tile_origins': np.zeros((0, 2), dtype=np.int32),
+        'tile_size': tile_size,
+        'lbp_uniform_ratio': 0.0,
+        'texture_heterogeneity': 0.0
+    }
+
+    try:
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return results
+
+        # Both descriptors are computed on the same interior so tiles line up
+        codes = compute_lbp_codes(gray)
+        interior = gray[1:-1, 1:-1]
+        if min(codes.shape) < tile_size:
+            return results
+
+        lbp_hist = tile_lbp_histograms(codes, tile_size)
+        quantized = (interior.astype(np.uint16) * levels) >> 8
+        stats = glcm_statistics(tile_glcm(quantized, tile_size, levels))
+
+        n_tiles = lbp_hist.shape[0]
+        features = np.concatenate([lbp_hist, stats.reshape(n_tiles, -1).astype(np.float32)], axis=1)
+
+        cols = codes.shape[1] // tile_size
+        tile_ids = np.arange(n_tiles)
+        # Origins in full-image coordinates (the LBP interior starts at (1, 1))
+        origins = np.stack([(tile_ids // cols) * tile_size + 1, (tile_ids % cols) * tile_size + 1], axis=1)
+
+        results['features'] = features
+        results['tile_origins'] = origins.astype(np.int32)
+        results['lbp_uniform_ratio'] = float(1.0 - np.mean(lbp_hist[:, -1]))
+
+        # Mean chi-square distance of each tile's LBP histogram to the image mean
+        mean_hist = lbp_hist.mean(axis=0, keepdims=True)
+        chi2 = 0.5 * np.sum((lbp_hist - mean_hist) ** 2 / (lbp_hist + mean_hist + 1e-10), axis=1)
+        results['texture_heterogeneity'] = float(np.mean(chi2))
+
+    except Exception as e:
+        print(f"Error in texture descriptor extraction: {e}")
+
+    return results
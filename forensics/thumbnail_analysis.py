@@ -0,0 +1,224 @@
+import numpy as np
+from PIL import Image
+import cv2
+from io import BytesIO
+
+from .header_scanner import read_exif_thumbnail, parse_exif_thumbnail
+
+# A thumbnail border row/column darker and flatter than this is letterbox padding
+LETTERBOX_LEVEL = 16
+LETTERBOX_SPREAD = 6
+
+# Pixels by which a letterbox bar may fall short of the size the main
+# image's aspect ratio implies (JPEG ringing blurs the bar edge)
+LETTERBOX_TOLERANCE = 2
+
+# Side of the thumbnail blocks whose mean SSIM is compared with the typical block
+SIMILARITY_BLOCK_SIZE = 8
+
+# Gaussian blur (thumbnail pixels) applied to both sides before SSIM. Camera
+# firmware shrinks with anything from nearest-neighbour decimation to
+# bicubic filtering plus sharpening; the finest detail depends on that
+# choice and not on the content, so it is left out of the comparison
+THUMBNAIL_LOWPASS_SIGMA = 1.0
+
+# Thresholds for a thumbnail that no longer matches the main image. Untouched
+# images score an SSIM of 0.89 or more and a worst block within 0.14 of the
+# median block for nearest, bilinear, bicubic and unsharp-masked thumbnails;
+# a pasted region covering 1% of the image drops its block by 0.27 or more
+MIN_STRUCTURAL_SIMILARITY = 0.7
+MAX_LOCAL_SIMILARITY_DROP = 0.2
+MAX_ASPECT_DIFFERENCE = 0.05
+MAX_COLOR_DIFFERENCE = 20.0
+
+def _bar_lengths(flat):
+    """Lengths of the runs of flat lines at the start and at the end of a border profile."""
+    if flat.all():
+        return len(flat), len(flat)
+    return int(np.argmin(flat)), int(np.argmin(flat[::-1]))
+
+def _trim_letterbox(thumb, main_aspect):
+    """
+    Crops the black bars cameras add when the thumbnail aspect differs from the sensor's.
+
+    The bars are only removed when both opposite sides carry a near-constant
+    dark bar at least as large as the main image's aspect ratio implies, and
+    then exactly that much is cut, centred. Dark content such as a night sky
+    is never trimmed beyond the padding.
+    """
+    gray = thumb.mean(axis=2)
+    th, tw = gray.shape
+    if main_aspect > tw / th:
+        # Wider main image: bars at the top and bottom
+        axis, length, content = 1, th, int(round(tw / main_aspect))
+    else:
+        axis, length, content = 0, tw, int(round(th * main_aspect))
+    padding = length - content
+    if padding < 2:
+        return thumb
+
+    flat = (gray.mean(axis=axis) <= LETTERBOX_LEVEL) & (gray.std(axis=axis) <= LETTERBOX_SPREAD)
+    start, end = _bar_lengths(flat)
+    bar = padding // 2
+    if min(start, end) < bar - LETTERBOX_TOLERANCE or start + end < padding - LETTERBOX_TOLERANCE:
+        return thumb
+    if axis == 1:
+        return thumb[bar:bar + content]
+    return thumb[:, bar:bar + content]
+
+def _decode_main_image(image_path, size):
+    """
+    Decodes the main image at roughly twice the thumbnail size.
+
+    For JPEGs `Image.draft` lets libjpeg decode at 1/2, 1/4 or 1/8 scale, so
+    only a fraction of the full-resolution IDCT work is done.
+    """
+    with Image.open(image_path) as img:
+        img.draft('RGB', (size[0] * 2, size[1] * 2))
+        return np.array(img.convert('RGB'))
+
+def _ssim_map(first, second):
+    """Per-pixel SSIM of two equally sized grayscale images (Gaussian window, sigma 1.5)."""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    first = first.astype(np.float64)
+    second = second.astype(np.float64)
+
+    def blur(image):
+        return cv2.GaussianBlur(image, (7, 7), 1.5)
+
+    mu1, mu2 = blur(first), blur(second)
+    var1 = blur(first * first) - mu1 * mu1
+    var2 = blur(second * second) - mu2 * mu2
+    covar = blur(first * second) - mu1 * mu2
+    return ((2 * mu1 * mu2 + c1) * (2 * covar + c2)) / ((mu1 * mu1 + mu2 * mu2 + c1) * (var1 + var2 + c2))
+
+def structural_similarity(first, second):
+    """
+    Mean SSIM of two equally sized grayscale images (Gaussian window, sigma 1.5).
+
+    Args:
+        first (np.ndarray): (H, W) image
+        second (np.ndarray): (H, W) image
+
+    Returns:
+        float: Similarity in [-1, 1]
+    """
+    return float(_ssim_map(first, second).mean())
+
+def local_structural_similarity(first, second, block_size=SIMILARITY_BLOCK_SIZE):
+    """
+    Lowest and median block-mean SSIM of two equally sized grayscale images.
+
+    A local edit barely moves the mean SSIM of a whole thumbnail but drags
+    the blocks it covers far below the typical block, while a different
+    resampling filter lowers all blocks alike.
+
+    Args:
+        first (np.ndarray): (H, W) image
+        second (np.ndarray): (H, W) image
+        block_size (int): Block side in pixels
+
+    Returns:
+        tuple: (lowest, median) block similarity, each in [-1, 1]
+    """
+    ssim = _ssim_map(first, second)
+    rows, cols = ssim.shape[0] // block_size, ssim.shape[1] // block_size
+    if rows == 0 or cols == 0:
+        return float(ssim.mean()), float(ssim.mean())
+    blocks = ssim[:rows * block_size, :cols * block_size].reshape(rows, block_size, cols, block_size)
+    blocks = blocks.mean(axis=(1, 3))
+    return float(blocks.min()), float(np.median(blocks))
+
+def analyze_thumbnail_consistency(image_path, headers=None):
+    """
+    Compares the embedded EXIF thumbnail with the main image.
+
+    Editors often rewrite the pixels but keep the camera's original
+    thumbnail, so a thumbnail that shows different content, framing or
+    colours is strong evidence of editing. The thumbnail is read from the
+    headers and the main image is decoded at reduced scale, which keeps the
+    check cheap enough for metadata triage.
+
+    Args:
+        image_path (str): The path to the image file.
+        headers (dict): Output of `read_headers` for the file; walked here
+            if not given.
+
+    Returns:
+        dict: Analysis results.
+    """
+    results = {
+        'has_thumbnail': False,
+        'thumbnail_size': None,
+        'aspect_ratio_difference': 0.0,
+        'structural_similarity': 1.0,
+        'min_local_similarity': 1.0,
+        'local_similarity_drop': 0.0,
+        'color_difference': 0.0,
+        'thumbnail_mismatch': False,
+        'is_suspicious': False
+    }
+
+    try:
+        if headers is not None:
+            exif_block = headers['exif_block']
+            thumbnail_data = parse_exif_thumbnail(exif_block) if exif_block else b''
+        else:
+            thumbnail_data = read_exif_thumbnail(image_path)
+        if not thumbnail_data:
+            return results
+
+        with Image.open(BytesIO(thumbnail_data)) as thumb_img:
+            thumb = np.array(thumb_img.convert('RGB'))
+        results['has_thumbnail'] = True
+        results['thumbnail_size'] = (thumb.shape[1], thumb.shape[0])
+
+        if headers is not None and 'size' in headers:
+            width, height = headers['size']
+        else:
+            with Image.open(image_path) as img:
+                width, height = img.size
+        thumb = _trim_letterbox(thumb, width / height)
+        th, tw = thumb.shape[:2]
+        if th < 8 or tw < 8:
+            return results
+
+        main = _decode_main_image(image_path, (tw, th))
+
+        # Aspect ratio (the thumbnail is stored in the same orientation as the pixels)
+        thumb_aspect = tw / th
+        main_aspect = width / height
+        results['aspect_ratio_difference'] = float(abs(thumb_aspect - main_aspect) / main_aspect)
+
+        # Bring the main image to the thumbnail grid
+        main_small = cv2.resize(main, (tw, th), interpolation=cv2.INTER_AREA)
+
+        # Both sides low-passed, so the shrink filter does not count
+        thumb = cv2.GaussianBlur(thumb.astype(np.float32), (0, 0), THUMBNAIL_LOWPASS_SIGMA)
+        main_small = cv2.GaussianBlur(main_small.astype(np.float32), (0, 0), THUMBNAIL_LOWPASS_SIGMA)
+
+        # Structural difference on luminance, overall and for the worst
+        # block against the typical one
+        thumb_gray = cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY)
+        main_gray = cv2.cvtColor(main_small, cv2.COLOR_RGB2GRAY)
+        results['structural_similarity'] = structural_similarity(thumb_gray, main_gray)
+        lowest, median = local_structural_similarity(thumb_gray, main_gray)
+        results['min_local_similarity'] = lowest
+        results['local_similarity_drop'] = median - lowest
+
+        # Colour statistics: per-channel mean and spread
+        thumb_stats = np.concatenate([thumb.mean(axis=(0, 1)), thumb.std(axis=(0, 1))])
+        main_stats = np.concatenate([main_small.mean(axis=(0, 1)), main_small.std(axis=(0, 1))])
+        results['color_difference'] = float(np.max(np.abs(thumb_stats - main_stats)))
+
+        if (results['structural_similarity'] < MIN_STRUCTURAL_SIMILARITY
+                or results['local_similarity_drop'] > MAX_LOCAL_SIMILARITY_DROP
+                or results['aspect_ratio_difference'] > MAX_ASPECT_DIFFERENCE
+                or results['color_difference'] > MAX_COLOR_DIFFERENCE):
+            results['thumbnail_mismatch'] = True
+            results['is_suspicious'] = True
+
+    except Exception as e:
+        print(f"Error in thumbnail analysis: {e}")
+
+    return results
@@ -12,12 +12,14 @@ import os
 
 # Import all forensic modules
 from forensics.metadata_extractor import extract_metadata
+from forensics.header_scanner import scan_metadata, read_headers
+from forensics.generator_signatures import match_generator_signatures
 from forensics.ela import perform_ela
 from forensics.frequency_analysis import analyze_frequency
 from forensics.noise_analysis import extract_noise_map
 from forensics.jpeg_analysis import analyze_jpeg_artifacts
 from forensics.chromatic_analysis import analyze_chromatic_aberration
-from forensics.color_analysis import analyze_color_distribution
+from forensics.color_analysis import analyze_color_distribution, ColorHistogram
 from forensics.texture_analysis import analyze_texture_consistency
 from forensics.gan_detection import detect_gan_fingerprint
 from forensics.noise_inconsistency import analyze_noise_inconsistency
@@ -25,7 +27,15 @@ from forensics.benford_analysis import benford_law_analysis
 from forensics.cfa_detection import detect_cfa_pattern
 from forensics.double_jpeg import detect_double_jpeg_compression
 from forensics.gradient_analysis import analyze_gradient_anomalies
-from forensics.classifier import classify_image
+from forensics.copy_move import detect_copy_move
+from forensics.thumbnail_analysis import analyze_thumbnail_consistency
+from forensics.classifier import classify_image, EVIDENCE_SECTIONS
+
+# Detector outputs passed to the classifier, in report order
+DETECTOR_NAMES = ('metadata', 'jpeg_analysis', 'chromatic_analysis', 'color_analysis',
+                  'texture_analysis', 'gan_detection', 'noise_inconsistency', 'benford_analysis',
+                  'cfa_detection', 'double_jpeg', 'gradient_analysis', 'copy_move',
+                  'thumbnail_analysis')
 
 
 class MetaForens:
@@ -40,18 +50,30 @@ class MetaForens:
         print(result['probabilities'])  # Percentage breakdown
     """
     
-    def __init__(self):
-        """Initialize the MetaForens detector."""
+    def __init__(self, result_store=None):
+        """
+        Initialize the MetaForens detector.
+        
+        Args:
+            result_store (ResultStore): Optional store that keeps the detector
+                outputs of every classified image for later re-scoring
+        """
         self.version = "1.0.0"
-        self.analyses_count = 15  # Number of forensic analyses performed
+        self.analyses_count = 16  # Number of forensic analyses performed
+        self.color_baseline = ColorHistogram()  # Colour histograms of every analysed image
+        self.result_store = result_store
     
-    def analyze(self, image_path, return_detailed=False):
+    def analyze(self, image_path, return_detailed=False, short_circuit=False):
         """
         Analyze an image to detect AI generation or manipulation.
         
         Args:
             image_path (str): Path to the image file
             return_detailed (bool): If True, returns detailed analysis from all modules
+            short_circuit (bool): If True, a decisive generator signature in the
+                metadata returns the verdict from the file headers alone, without
+                decoding or verifying the pixels; the detector entries in
+                'evidence' and 'detailed' are then left empty
         
         Returns:
             dict: Analysis results containing:
@@ -60,6 +82,7 @@ class MetaForens:
                 - probabilities (dict): Percentage breakdown
                 - evidence (dict): Evidence for each category
                 - raw_scores (dict): Raw scoring data
+                - signature_triage (dict): Generator signatures found in the metadata
                 - detailed (dict): Detailed analysis from all modules (if return_detailed=True)
         
         Raises:
@@ -71,97 +94,158 @@ class MetaForens:
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
         
+        # Perform all forensic analyses
+        print(f"Analyzing image: {os.path.basename(image_path)}")
+        
+        # 1. Metadata extraction
+        print("  [1/12] Extracting metadata...")
+        # Walk the headers once for the metadata, triage and thumbnail checks
+        try:
+            headers = read_headers(image_path)
+        except Exception:
+            headers = None
+        metadata = scan_metadata(image_path, headers=headers)
+        
+        # Generator-signature triage over the raw metadata bytes
+        signature_triage = match_generator_signatures(image_path, headers=headers)
+        if short_circuit and signature_triage['decisive']:
+            result = self._triage_result(signature_triage)
+            print(f"  ✓ Metadata signature found: {result['verdict']} ({', '.join(signature_triage['generators'])})")
+            # Skipped detectors keep their keys with empty results
+            analyses = {name: {} for name in DETECTOR_NAMES}
+            analyses['metadata'] = metadata
+            analyses['image_path'] = image_path
+            if self.result_store is not None:
+                self.result_store.add(image_path, analyses, triage_result=result)
+            if return_detailed:
+                result['detailed'] = {name: analyses[name] for name in DETECTOR_NAMES}
+            return result
+        
+        # The pixel detectors need a decodable image
         try:
-            # Verify it's a valid image
             img = Image.open(image_path)
             img.verify()
         except Exception as e:
             raise ValueError(f"Invalid image file: {str(e)}")
         
-        # Perform all forensic analyses
-        print(f"Analyzing image: {os.path.basename(image_path)}")
-        
-        # 1. Metadata extraction
-        print("  [1/11] Extracting metadata...")
-        metadata = extract_metadata(image_path)
+        # Embedded thumbnail vs. reduced-scale decode of the image
+        thumbnail_analysis = analyze_thumbnail_consistency(image_path, headers=headers)
         
         # 2. JPEG analysis
-        print("  [2/11] Analyzing JPEG artifacts...")
+        print("  [2/12] Analyzing JPEG artifacts...")
         jpeg_analysis = analyze_jpeg_artifacts(image_path)
         
         # 3. Chromatic aberration
-        print("  [3/11] Checking chromatic aberration...")
+        print("  [3/12] Checking chromatic aberration...")
         chromatic_analysis = analyze_chromatic_aberration(image_path)
         
         # 4. Color distribution
-        print("  [4/11] Analyzing color distribution...")
-        color_analysis = analyze_color_distribution(image_path)
+        print("  [4/12] Analyzing color distribution...")
+        color_analysis = analyze_color_distribution(image_path, histogram=self.color_baseline)
         
         # 5. Texture consistency
-        print("  [5/11] Checking texture consistency...")
+        print("  [5/12] Checking texture consistency...")
         texture_analysis = analyze_texture_consistency(image_path)
         
         # 6. GAN fingerprint detection
-        print("  [6/11] Detecting GAN fingerprints...")
+        print("  [6/12] Detecting GAN fingerprints...")
         gan_detection = detect_gan_fingerprint(image_path)
         
         # 7. Noise inconsistency
-        print("  [7/11] Analyzing noise patterns...")
+        print("  [7/12] Analyzing noise patterns...")
         noise_inconsistency = analyze_noise_inconsistency(image_path)
         
         # 8. Benford's Law analysis
-        print("  [8/11] Running Benford's Law test...")
+        print("  [8/12] Running Benford's Law test...")
         benford_analysis = benford_law_analysis(image_path)
         
         # 9. CFA pattern detection
-        print("  [9/11] Detecting camera sensor patterns...")
+        print("  [9/12] Detecting camera sensor patterns...")
         cfa_detection = detect_cfa_pattern(image_path)
         
         # 10. Double JPEG compression
-        print(" [10/11] Checking for double compression...")
+        print(" [10/12] Checking for double compression...")
         double_jpeg = detect_double_jpeg_compression(image_path)
         
         # 11. Gradient analysis
-        print(" [11/11] Analyzing image gradients...")
+        print(" [11/12] Analyzing image gradients...")
         gradient_analysis = analyze_gradient_anomalies(image_path)
         
+        # 12. Copy-move (clone) detection
+        print(" [12/12] Searching for cloned regions...")
+        copy_move = detect_copy_move(image_path)
+        
         # Classify the image
         print("  Classifying image...")
-        result = classify_image(
-            metadata=metadata,
-            jpeg_analysis=jpeg_analysis,
-            chromatic_analysis=chromatic_analysis,
-            color_analysis=color_analysis,
-            texture_analysis=texture_analysis,
-            gan_detection=gan_detection,
-            noise_inconsistency=noise_inconsistency,
-            benford_analysis=benford_analysis,
-            cfa_detection=cfa_detection,
-            double_jpeg=double_jpeg,
-            gradient_analysis=gradient_analysis,
-            image_path=image_path
-        )
+        analyses = {
+            'metadata': metadata,
+            'jpeg_analysis': jpeg_analysis,
+            'chromatic_analysis': chromatic_analysis,
+            'color_analysis': color_analysis,
+            'texture_analysis': texture_analysis,
+            'gan_detection': gan_detection,
+            'noise_inconsistency': noise_inconsistency,
+            'benford_analysis': benford_analysis,
+            'cfa_detection': cfa_detection,
+            'double_jpeg': double_jpeg,
+            'gradient_analysis': gradient_analysis,
+            'image_path': image_path,
+            'copy_move': copy_move,
+            'thumbnail_analysis': thumbnail_analysis
+        }
+        result = classify_image(**analyses)
+        
+        # Keep the classifier inputs so the corpus can be re-scored later
+        if self.result_store is not None:
+            self.result_store.add(image_path, analyses, verdict=result['verdict'])
+        
+        result['signature_triage'] = signature_triage
         
         print(f"  ✓ Analysis complete: {result['verdict']} ({result['confidence']} confidence)")
         
         # Add detailed analysis if requested
         if return_detailed:
-            result['detailed'] = {
-                'metadata': metadata,
-                'jpeg_analysis': jpeg_analysis,
-                'chromatic_analysis': chromatic_analysis,
-                'color_analysis': color_analysis,
-                'texture_analysis': texture_analysis,
-                'gan_detection': gan_detection,
-                'noise_inconsistency': noise_inconsistency,
-                'benford_analysis': benford_analysis,
-                'cfa_detection': cfa_detection,
-                'double_jpeg': double_jpeg,
-                'gradient_analysis': gradient_analysis
-            }
+            result['detailed'] = {name: analyses[name] for name in DETECTOR_NAMES}
         
         return result
     
+    def _triage_result(self, signature_triage):
+        """
+        Builds a classifier-style result from a decisive metadata signature.
+        
+        Args:
+            signature_triage (dict): Output of match_generator_signatures
+        
+        Returns:
+            dict: Result in the classify_image format
+        """
+        verdicts = {
+            'ai_generated': "AI Generated",
+            'ai_edited': "AI Edited / Modified"
+        }
+        # Only decisive hits settle the verdict; weaker hits of a stronger
+        # category (e.g. a non-decisive generator name) do not override them
+        category = signature_triage['decisive_category']
+        hits = [hit for hit in signature_triage['signature_hits'] if hit['decisive'] and hit['category'] == category]
+        metadata_evidence = [f"✓✓ {hit['generator']} signature in metadata ('{hit['pattern']}')" for hit in hits]
+        
+        evidence = {section: [] for section in EVIDENCE_SECTIONS}
+        evidence['metadata'] = metadata_evidence
+        categorized_evidence = {'ai_generated': [], 'ai_edited': [], 'real_photo': []}
+        categorized_evidence[category].extend(metadata_evidence)
+        probabilities = {'ai_generated': 0.0, 'ai_edited': 0.0, 'real_photo': 0.0}
+        probabilities[category] = 100.0
+        
+        return {
+            'verdict': verdicts[category],
+            'confidence': "High",
+            'probabilities': probabilities,
+            'evidence': evidence,
+            'categorized_evidence': categorized_evidence,
+            'raw_scores': {'ai_generated': 0.0, 'ai_edited': 0.0, 'real_photo': 0.0},
+            'signature_triage': signature_triage
+        }
+    
     def batch_analyze(self, image_paths, return_detailed=False):
         """
         Analyze multiple images.
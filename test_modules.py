@@ -43,7 +43,7 @@ def test_all_modules():
     
     print("\n3. Testing Chromatic Aberration...")
     chromatic_result = analyze_chromatic_aberration(test_img)
-    print(f"   Aberration Score: {chromatic_result.get('aberration_score', 0):.6f}")
+    print(f"   Aberration Score: {chromatic_result.get('aberration_score', 0):.2f} px")
     
     print("\n4. Testing Color Analysis...")
     color_result = analyze_color_distribution(test_img)
@@ -0,0 +1,150 @@
+import os
+import struct
+import sys
+from io import BytesIO
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_photo(height=480, width=640, seed=0, noise=3.0):
+    """Photo-like BGR uint8 image: coarse structure, fine texture and sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    base = cv2.GaussianBlur(rng.normal(128, 60, (height, width, 3)), (0, 0), 6)
+    detail = cv2.GaussianBlur(rng.normal(0, 60, (height, width)), (0, 0), 1.2)[..., None]
+    img = base + detail + rng.normal(0, noise, base.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def make_noisy_gradient(height=768, width=1024, sigma=4.0, seed=0):
+    """Smooth sky-like vertical gradient with luminance noise (no repeated content)."""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(90, 200, height)[:, None, None]
+    tint = np.array([1.0, 0.9, 0.75])[None, None, :]
+    img = ramp * tint + rng.normal(0, sigma, (height, width, 1))
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def exif_with_thumbnail(thumbnail_jpeg):
+    """APP1 EXIF payload with a Make tag in IFD0 and a JPEG thumbnail in IFD1."""
+    make = b'Canon\x00'
+    ifd1_offset = 8 + 2 + 12 + 4
+    make_offset = ifd1_offset + 2 + 24 + 4
+    thumbnail_offset = make_offset + len(make)
+    ifd0 = struct.pack('<H', 1) + struct.pack('<HHII', 0x010F, 2, len(make), make_offset) + struct.pack('<I', ifd1_offset)
+    ifd1 = (struct.pack('<H', 2) + struct.pack('<HHII', 0x0201, 4, 1, thumbnail_offset)
+            + struct.pack('<HHII', 0x0202, 4, 1, len(thumbnail_jpeg)) + struct.pack('<I', 0))
+    return b'Exif\x00\x00II*\x00' + struct.pack('<I', 8) + ifd0 + ifd1 + make + thumbnail_jpeg
+
+
+def shrink_nearest(bgr, size):
+    """Thumbnail by plain decimation, as cheap camera firmware does."""
+    return cv2.resize(bgr, size, interpolation=cv2.INTER_NEAREST)
+
+
+def shrink_bilinear(bgr, size):
+    """Thumbnail by a 2x2 bilinear tap per output pixel (aliased)."""
+    return cv2.resize(bgr, size, interpolation=cv2.INTER_LINEAR)
+
+
+def shrink_sharpened(bgr, size):
+    """Decimated thumbnail with an unsharp mask on top."""
+    small = shrink_nearest(bgr, size).astype(np.float32)
+    return np.clip(2 * small - cv2.GaussianBlur(small, (0, 0), 1.0), 0, 255).astype(np.uint8)
+
+
+def make_thumbnail(bgr, size=(160, 120), shrink=None):
+    """
+    Camera-style JPEG thumbnail: fitted into `size` and letterboxed with black
+    bars. `shrink(bgr, (width, height))` replaces PIL's antialiased resize.
+    """
+    image = Image.fromarray(bgr[..., ::-1])
+    image.thumbnail(size)
+    if shrink is not None:
+        image = Image.fromarray(shrink(bgr, image.size)[..., ::-1])
+    canvas = Image.new('RGB', size)
+    canvas.paste(image, ((size[0] - image.width) // 2, (size[1] - image.height) // 2))
+    buffer = BytesIO()
+    canvas.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def random_analyses(rng):
+    """Detector outputs covering every branch of the rule table."""
+    def flag():
+        return rng.random() < 0.5
+
+    year = rng.choice([None, '1995', '2005', '2012', '2016', '2019', '2023', 'abcd'])
+    exif = {} if rng.random() < 0.3 else {'Make': 'X', **({'DateTimeOriginal': year + ':01:01'} if year else {})}
+    return {
+        'metadata': {
+            'exif': exif,
+            'software_tags': rng.choice([[], ['GIMP 2.10'], ['Canon FW'], ['Adobe Photoshop 25', 'ComfyUI']]),
+            'anomalies': ['No EXIF data found.'] if (not exif or rng.random() < 0.1) else []
+        },
+        'jpeg_analysis': {
+            'is_suspicious': flag(),
+            'compression_quality_estimate': rng.choice(['Low (60-75)', 'High (90-100) or Uncompressed',
+                                                        'Very High', 'Unknown'])
+        },
+        'chromatic_analysis': {'has_chromatic_aberration': flag(), 'is_suspicious': flag(),
+                               'aberration_score': rng.random() * 3},
+        'color_analysis': {'ai_signature_detected': flag(), 'unusual_patterns': flag(),
+                           'color_saturation_avg': rng.random() * 255},
+        'texture_analysis': {'repetition_detected': rng.random() < 0.2, 'is_suspicious': flag(),
+                             'texture_variance': rng.random() * 100},
+        'gan_detection': {'gan_signature_detected': flag(), 'is_suspicious': flag(),
+                          'high_freq_pattern_score': rng.random()},
+        'noise_inconsistency': {'is_suspicious': flag(), 'confidence': rng.choice(['Low', 'Medium', 'High']),
+                                'suspicious_regions': rng.randint(0, 6)},
+        'benford_analysis': {'follows_benford': flag(), 'is_suspicious': flag(),
+                             'benford_deviation': rng.random() * 0.3, 'p_value': rng.random()},
+        'cfa_detection': {'cfa_pattern_detected': flag(), 'cfa_strength': rng.choice([0.0, 0.005, 0.015, 0.05]),
+                          'pattern_type': 'Bayer-like'},
+        'double_jpeg': {'double_compression_detected': flag(), 'likely_edited': flag(),
+                        'compression_count_estimate': rng.randint(1, 3)},
+        'gradient_analysis': {'unnatural_smoothness_detected': flag(), 'gradient_smoothness': rng.random() * 30},
+        'image_path': 'image.jpg',
+        'copy_move': rng.choice([None, {'clone_detected': False},
+                                 {'clone_detected': True, 'clone_area_ratio': rng.random() * 0.2,
+                                  'dominant_shift': (3, 4)}]),
+        'thumbnail_analysis': rng.choice([None,
+                                          {'has_thumbnail': True, 'thumbnail_mismatch': True,
+                                           'structural_similarity': 0.4},
+                                          {'has_thumbnail': True, 'thumbnail_mismatch': False,
+                                           'structural_similarity': 0.99}])
+    }
+
+
+@pytest.fixture
+def photo():
+    return make_photo()
+
+
+@pytest.fixture
+def write_image(tmp_path):
+    """Writes a BGR array to tmp_path; JPEG quality via `quality`."""
+    def write(name, img, quality=None):
+        path = str(tmp_path / name)
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality] if quality is not None else []
+        assert cv2.imwrite(path, img, params)
+        return path
+    return write
+
+
+@pytest.fixture
+def write_jpeg_with_thumbnail(tmp_path):
+    """
+    Writes a BGR array as a JPEG whose EXIF thumbnail shows `thumbnail_of`
+    (default: itself), shrunk with `shrink` (default: PIL's thumbnail()).
+    """
+    def write(name, img, thumbnail_of=None, shrink=None):
+        path = str(tmp_path / name)
+        thumbnail = make_thumbnail(img if thumbnail_of is None else thumbnail_of, shrink=shrink)
+        Image.fromarray(img[..., ::-1]).save(path, 'JPEG', quality=92, exif=exif_with_thumbnail(thumbnail))
+        return path
+    return write
@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+
+from forensics.cfa_detection import (detect_cfa_pattern, estimate_cfa_periodicity, cfa_block_map,
+                                     CFA_PERIODIC_THRESHOLD, CFA_BLOCK_THRESHOLD, BAYER_PHASES, CFA_PREDICTOR)
+from conftest import make_photo
+
+# Bilinear demosaicing kernels for the green quincunx and the red/blue lattices
+GREEN_KERNEL = np.array([[0, 0.25, 0], [0.25, 1, 0.25], [0, 0.25, 0]], dtype=np.float32)
+RED_BLUE_KERNEL = np.array([[0.25, 0.5, 0.25], [0.5, 1, 0.5], [0.25, 0.5, 0.25]], dtype=np.float32)
+
+
+def demosaic(bgr, red=(0, 0)):
+    """Camera-like BGR image: Bayer-sampled with red at `red` in each 2x2 cell, then bilinear demosaiced."""
+    rgb = bgr[..., ::-1].astype(np.float32)
+    masks = np.zeros(rgb.shape, dtype=bool)
+    ry, rx = red
+    masks[ry::2, rx::2, 0] = True
+    masks[1 - ry::2, 1 - rx::2, 2] = True
+    masks[ry::2, 1 - rx::2, 1] = True
+    masks[1 - ry::2, rx::2, 1] = True
+    sampled = np.where(masks, rgb, 0)
+    kernels = (RED_BLUE_KERNEL, GREEN_KERNEL, RED_BLUE_KERNEL)
+    out = np.stack([cv2.filter2D(sampled[..., c], -1, kernels[c]) for c in range(3)], axis=-1)
+    return np.clip(out[..., ::-1], 0, 255).astype(np.uint8)
+
+
+def test_demosaiced_image_is_detected_with_its_phase(write_image):
+    for red, name in BAYER_PHASES.items():
+        path = write_image(f'{name}.png', demosaic(make_photo(512, 512), red))
+        result = detect_cfa_pattern(path)
+        assert result['cfa_pattern_detected'] and result['is_real_camera']
+        assert result['cfa_strength'] == result['periodic_strength'] >= CFA_PERIODIC_THRESHOLD
+        assert result['bayer_phase'] == name
+        assert result['phase_consistency'] == 1.0
+        assert result['pattern_type'] == f'Bayer ({name})'
+
+
+def test_compressed_demosaiced_image_is_still_detected(write_image):
+    path = write_image('camera.jpg', demosaic(make_photo(768, 1024)), quality=80)
+    result = detect_cfa_pattern(path)
+    assert result['cfa_pattern_detected']
+    assert not result['is_suspicious']
+
+
+def test_images_without_cfa_are_not_detected(write_image):
+    photo = make_photo(768, 1024)
+    half = cv2.resize(photo, (512, 384), interpolation=cv2.INTER_AREA)
+    for name, img in [('photo.png', photo), ('upscaled.png', cv2.resize(half, (1024, 768))),
+                      ('compressed.jpg', photo)]:
+        result = detect_cfa_pattern(write_image(name, img, quality=50 if name.endswith('jpg') else None))
+        assert not result['cfa_pattern_detected'], name
+        assert result['is_suspicious']
+        assert result['pattern_type'] == 'No CFA detected'
+
+
+def test_weak_crops_do_not_vote_for_a_phase():
+    result = estimate_cfa_periodicity(make_photo(768, 1024)[..., ::-1])
+    assert len(result['crop_strengths']) == 9
+    assert result['bayer_phase'] == 'Unknown'
+    assert result['phase_consistency'] == 0.0
+
+
+def reference_block_strength(rgb, y, x, block_size):
+    """Nyquist strength of one block from explicit per-channel polyphase means."""
+    strengths = []
+    for c in range(3):
+        channel = rgb[..., c].astype(np.float32)
+        residual = channel - cv2.filter2D(channel, -1, CFA_PREDICTOR, borderType=cv2.BORDER_REFLECT)
+        energy = residual[y:y + block_size, x:x + block_size] ** 2
+        p = [[energy[i::2, j::2].mean() for j in range(2)] for i in range(2)]
+        nyquist = (abs(p[0][0] + p[0][1] - p[1][0] - p[1][1]) + abs(p[0][0] - p[0][1] + p[1][0] - p[1][1])
+                   + abs(p[0][0] - p[0][1] - p[1][0] + p[1][1]))
+        strengths.append(nyquist / (sum(map(sum, p)) + 1e-6))
+    return np.mean(strengths)
+
+
+def test_block_map_matches_reference_and_finds_the_phase():
+    rgb = demosaic(make_photo(256, 320), red=(1, 0))[..., ::-1]
+    strength, phase, textured = cfa_block_map(rgb, 64)
+    assert strength.shape == phase.shape == textured.shape == (4, 5)
+    for by, bx in [(0, 0), (2, 3), (3, 4)]:
+        assert abs(strength[by, bx] - reference_block_strength(rgb, by * 64, bx * 64, 64)) < 1e-4
+    assert textured.all()
+    assert np.all(strength >= CFA_BLOCK_THRESHOLD)
+    assert np.all(phase == list(BAYER_PHASES).index((1, 0)))
+
+
+def test_tamper_map_flags_pasted_and_shifted_regions(write_image):
+    photo = make_photo(512, 512)
+    camera = demosaic(photo)
+    forged = camera.copy()
+    forged[128:256, 64:192] = make_photo(512, 512, seed=3)[128:256, 64:192]  # no CFA
+    forged[320:448, 320:448] = demosaic(photo, red=(1, 1))[320:448, 320:448]  # shifted phase
+    result = detect_cfa_pattern(write_image('forged.png', forged), return_map=True, block_size=32)
+
+    tampered = result['cfa_tamper_map']
+    expected = np.zeros((16, 16), dtype=bool)
+    expected[4:8, 2:6] = True
+    expected[10:14, 10:14] = True
+    np.testing.assert_array_equal(tampered, expected)
+    assert np.all(result['cfa_block_phase'][10:14, 10:14] == 3)
+    assert abs(result['cfa_tampered_ratio'] - 32 / 256) < 1e-6
+
+
+def test_untouched_camera_image_has_an_empty_tamper_map(write_image):
+    result = detect_cfa_pattern(write_image('camera.png', demosaic(make_photo(512, 512))), return_map=True)
+    assert not result['cfa_tamper_map'].any()
+    assert result['cfa_tampered_ratio'] == 0.0
+
+
+def test_tamper_map_is_empty_without_a_cfa(write_image):
+    result = detect_cfa_pattern(write_image('photo.png', make_photo(512, 512)), return_map=True)
+    assert result['cfa_block_strength'].shape == (16, 16)
+    assert not result['cfa_tamper_map'].any()
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+from forensics.chromatic_analysis import analyze_chromatic_aberration, phase_correlation, fit_radial_scaling
+from conftest import make_photo
+
+
+def lens(gray, red_scale, blue_scale):
+    """BGR image whose red and blue planes are scaled about the centre relative to green."""
+    h, w = gray.shape
+    centre = ((w - 1) / 2.0, (h - 1) / 2.0)
+
+    def scaled(factor):
+        matrix = cv2.getRotationMatrix2D(centre, 0, factor)
+        return cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
+    return np.stack([scaled(blue_scale), gray, scaled(red_scale)], axis=-1)
+
+
+def scene(height=768, width=1024):
+    return cv2.cvtColor(make_photo(height, width, noise=0), cv2.COLOR_BGR2GRAY)
+
+
+def test_phase_correlation_recovers_subpixel_shifts():
+    gray = scene(256, 256).astype(np.float32)
+    shifts = [(0.0, 0.0), (1.0, -2.0), (0.4, 0.7), (-1.3, 0.25)]
+    reference = np.stack([gray[96:160, 96:160]] * len(shifts))
+    moving = np.stack([cv2.warpAffine(gray, np.float32([[1, 0, dx], [0, 1, dy]]), (256, 256),
+                                      flags=cv2.INTER_CUBIC)[96:160, 96:160] for dy, dx in shifts])
+    measured = phase_correlation(reference, moving)
+    np.testing.assert_allclose(measured[:2], shifts[:2], atol=0.01)
+    # Parabolic peak refinement is biased towards whole pixels by up to ~0.2 px
+    np.testing.assert_allclose(measured[2:], shifts[2:], atol=0.25)
+
+
+def test_radial_fit_is_exact_for_a_radial_field():
+    positions = np.random.default_rng(0).uniform(-300, 300, (40, 2))
+    alpha, explained = fit_radial_scaling(0.003 * positions, positions)
+    assert abs(alpha - 0.003) < 1e-12
+    assert abs(explained - 1.0) < 1e-9
+
+    # A uniform translation is not radial
+    _, explained = fit_radial_scaling(np.tile([1.0, 0.5], (40, 1)), positions)
+    assert explained < 0.1
+
+
+def test_radial_channel_scaling_is_recovered(write_image):
+    result = analyze_chromatic_aberration(write_image('lens.png', lens(scene(), 1.002, 0.9985)))
+    assert result['tiles_used'] >= 100
+    assert abs(result['red_scaling'] - 0.002) < 2e-4
+    assert abs(result['blue_scaling'] + 0.0015) < 2e-4
+    corner = np.hypot(767 / 2, 1023 / 2)
+    assert abs(result['aberration_score'] - 0.002 * corner) < 0.15
+    assert result['pattern_consistency'] > 0.8
+    assert result['has_chromatic_aberration']
+    assert not result['is_suspicious']
+
+
+def test_aligned_channels_have_no_aberration(write_image):
+    gray = scene()
+    result = analyze_chromatic_aberration(write_image('aligned.png', np.stack([gray] * 3, axis=-1)))
+    assert result['aberration_score'] < 0.05
+    assert not result['has_chromatic_aberration']
+    assert result['is_suspicious']
+
+
+def test_flat_image_has_too_few_tiles(write_image):
+    result = analyze_chromatic_aberration(write_image('flat.png', np.full((256, 256, 3), 80, np.uint8)))
+    assert result['tiles_used'] == 0
+    assert result['is_suspicious']
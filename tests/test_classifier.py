@@ -0,0 +1,76 @@
+import hashlib
+import json
+import random
+
+import numpy as np
+
+from forensics.classifier import (FEATURES, VERDICTS, build_feature_matrix, classify_batch,
+                                  classify_image, render_result)
+from conftest import random_analyses
+
+# Produced by the hand-written if/elif classify_image that preceded the rule
+# table, for 2000 samples of random_analyses(random.Random(1))
+EXPECTED_VERDICT_COUNTS = {"AI Generated": 264, "AI Edited / Modified": 364, "Likely Real Photo": 1372}
+EXPECTED_DIGEST = '300d4db850eb34973b05a0dff14a57564e943144d13f433037dd2719292037f7'
+
+
+def result_digest(results):
+    """SHA-256 of classification results; ints and floats of equal value hash alike."""
+    normalised = json.loads(json.dumps(results), parse_int=float)
+    return hashlib.sha256(json.dumps(normalised, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def test_batch_matches_per_image_classification():
+    rng = random.Random(0)
+    samples = [random_analyses(rng) for _ in range(500)]
+    features, contexts = build_feature_matrix(samples)
+    assert features.shape == (len(samples), len(FEATURES))
+
+    batch = classify_batch(features)
+    for index, sample in enumerate(samples):
+        assert render_result(batch, index, features, contexts[index]) == classify_image(**sample)
+
+
+def test_rule_table_reproduces_per_image_rules():
+    # Verdicts, probabilities and evidence must be unchanged from the per-image rules
+    rng = random.Random(1)
+    results = [classify_image(**random_analyses(rng)) for _ in range(2000)]
+    verdict_counts = {verdict: sum(r['verdict'] == verdict for r in results) for verdict in VERDICTS}
+    assert verdict_counts == EXPECTED_VERDICT_COUNTS
+    assert result_digest(results) == EXPECTED_DIGEST
+
+
+def test_typical_verdicts():
+    rng = random.Random(2)
+    camera = random_analyses(rng)
+    camera['metadata'] = {'exif': {'Make': 'Canon', 'DateTimeOriginal': '2023:05:01'},
+                          'software_tags': [], 'anomalies': []}
+    camera['cfa_detection'] = {'cfa_pattern_detected': True, 'cfa_strength': 0.05, 'pattern_type': 'RGGB'}
+    camera['gan_detection'] = {'gan_signature_detected': False, 'is_suspicious': False}
+    camera['noise_inconsistency'] = {'is_suspicious': False, 'confidence': 'Low', 'suspicious_regions': 0}
+    camera['benford_analysis'] = {'follows_benford': True, 'is_suspicious': False}
+    assert classify_image(**camera)['verdict'] == "Likely Real Photo"
+
+    generated = dict(camera)
+    generated['metadata'] = {'exif': {}, 'software_tags': [], 'anomalies': ['No EXIF data found.']}
+    generated['cfa_detection'] = {'cfa_pattern_detected': False, 'cfa_strength': 0.0}
+    generated['gan_detection'] = {'gan_signature_detected': True, 'is_suspicious': True}
+    generated['benford_analysis'] = {'follows_benford': False, 'is_suspicious': True, 'benford_deviation': 0.2}
+    assert classify_image(**generated)['verdict'] == "AI Generated"
+
+    # Images from before the GAN era cannot be AI generated
+    old = dict(generated)
+    old['metadata'] = {'exif': {'Make': 'Nikon', 'DateTimeOriginal': '2005:01:01'},
+                       'software_tags': [], 'anomalies': []}
+    result = classify_image(**old)
+    assert result['verdict'] == "Likely Real Photo"
+    assert any('2005' in line for line in result['categorized_evidence']['real_photo'])
+
+
+def test_config_overrides_change_scores():
+    rng = random.Random(3)
+    features, _ = build_feature_matrix([random_analyses(rng) for _ in range(200)])
+    default = classify_batch(features)
+    no_metadata = classify_batch(features, {'weights': {'modern': {'metadata': 0}, 'old_image': {'metadata': 0}}})
+    assert not np.array_equal(default['raw_scores'], no_metadata['raw_scores'])
+    assert np.array_equal(classify_batch(features, {})['verdict'], default['verdict'])
@@ -0,0 +1,30 @@
+import cv2
+import numpy as np
+
+from forensics.color_analysis import ColorHistogram, HUE_BINS, SATURATION_BINS
+
+
+def test_histogram_matches_whole_image_counts(photo):
+    histogram = ColorHistogram(strip_rows=100).update(photo)
+    hsv = cv2.cvtColor(photo, cv2.COLOR_BGR2HSV)
+    for index, (source, channel) in enumerate([(photo, 0), (photo, 1), (photo, 2),
+                                               (hsv, 0), (hsv, 1), (hsv, 2)]):
+        expected = np.bincount(source[..., channel].ravel(), minlength=256)
+        assert np.array_equal(histogram.channels[index], expected)
+    joint = cv2.calcHist([hsv], [0, 1], None, [HUE_BINS, SATURATION_BINS], [0, 180, 0, 256])
+    assert np.array_equal(histogram.hue_saturation, joint)
+    assert histogram.pixel_count == photo.shape[0] * photo.shape[1]
+
+
+def test_merged_tiles_equal_whole_image(photo, tmp_path):
+    merged = ColorHistogram()
+    for tile in (photo[:200], photo[200:, :300], photo[200:, 300:]):
+        merged += ColorHistogram().update(tile)
+    whole = ColorHistogram().update(photo)
+    assert np.array_equal(merged.channels, whole.channels)
+    assert merged.mean('s') == whole.mean('s')
+
+    merged.save(str(tmp_path / 'hist.npz'))
+    loaded = ColorHistogram.load(str(tmp_path / 'hist.npz'))
+    assert np.array_equal(loaded.hue_saturation, whole.hue_saturation)
+    assert loaded.entropy('h') == whole.entropy('h')
@@ -0,0 +1,44 @@
+import numpy as np
+
+from forensics.copy_move import detect_copy_move, estimate_noise_sigma
+from conftest import make_photo, make_noisy_gradient
+
+
+def test_noise_sigma_estimate():
+    sky = make_noisy_gradient(sigma=4.0)[..., 0].astype(np.float32)
+    assert abs(estimate_noise_sigma(sky) - 4.0) < 0.5
+
+
+def test_noisy_sky_is_not_a_clone(write_image):
+    for sigma in (4.0, 6.0):
+        result = detect_copy_move(write_image('sky.png', make_noisy_gradient(sigma=sigma)))
+        assert not result['clone_detected']
+        assert result['clone_area_ratio'] == 0.0
+
+
+def test_untouched_photo_is_not_a_clone(write_image):
+    photo = make_photo(768, 1024, seed=2)
+    assert not detect_copy_move(write_image('photo.png', photo))['clone_detected']
+    assert not detect_copy_move(write_image('photo.jpg', photo, quality=75))['clone_detected']
+
+
+def test_cloned_region_is_detected(write_image):
+    photo = make_photo(768, 1024, seed=2)
+    photo[400:480, 600:680] = photo[100:180, 150:230]
+    for path in (write_image('clone.png', photo), write_image('clone.jpg', photo, quality=90)):
+        result = detect_copy_move(path, return_mask=True)
+        assert result['clone_detected']
+        assert result['dominant_shift'] == (300, 450)
+        mask = result['clone_mask'].astype(bool)
+        assert mask[400:480, 600:680].mean() > 0.5
+        assert mask[100:180, 150:230].mean() > 0.5
+        assert mask[600:, :].sum() == 0
+
+
+def test_clone_in_noisy_sky_is_detected(write_image):
+    sky = make_noisy_gradient(sigma=4.0)
+    sky[100:200, 150:250] = make_photo(100, 100, seed=5)
+    sky[500:600, 750:850] = sky[100:200, 150:250]
+    result = detect_copy_move(write_image('sky_clone.png', sky))
+    assert result['clone_detected']
+    assert result['dominant_shift'] == (400, 600)
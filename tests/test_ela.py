@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image, ImageChops
+
+from forensics.ela import detect_jpeg_ghosts, perform_ela, analyze_ela, ela_difference
+from conftest import make_photo
+
+
+def _jpeg_round_trip(img, quality):
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def test_single_save_has_no_ghost(photo, write_image):
+    result = detect_jpeg_ghosts(write_image('single.jpg', photo, quality=95))
+    assert result['last_quality'] == 95
+    assert result['ghost_block_ratio'] < 0.01
+    assert not result['is_suspicious']
+
+
+def test_double_save_recovers_first_quality(photo, write_image):
+    result = detect_jpeg_ghosts(write_image('double.jpg', _jpeg_round_trip(photo, 70), quality=95))
+    assert result['dominant_quality'] == 70
+    assert result['last_quality'] == 95
+    assert result['ghost_block_ratio'] < 0.01
+    assert not result['is_suspicious']
+
+
+def test_splice_shows_up_as_ghost_region(write_image):
+    background = _jpeg_round_trip(make_photo(512, 768, seed=3), 70)
+    background[128:320, 256:512] = make_photo(512, 768, seed=4)[128:320, 256:512]
+    result = detect_jpeg_ghosts(write_image('splice.jpg', background, quality=95))
+
+    assert result['dominant_quality'] == 70
+    assert result['is_suspicious']
+    quality_map = result['quality_map']
+    # 16-pixel blocks: the pasted region spans block rows 8-19, columns 16-31
+    pasted = np.zeros(quality_map.shape, dtype=bool)
+    pasted[8:20, 16:32] = True
+    assert np.mean(quality_map[pasted] == 95) > 0.9
+    assert np.mean(quality_map[~pasted] == 70) > 0.95
+
+
+def test_ela_runs_in_memory_and_matches_a_file_round_trip(photo, write_image, tmp_path, monkeypatch):
+    path = write_image('photo.jpg', photo, quality=92)
+    monkeypatch.chdir(tmp_path)
+    before = sorted(os.listdir(tmp_path))
+    ela_image, difference = perform_ela(path, return_array=True)
+    assert sorted(os.listdir(tmp_path)) == before
+
+    original = Image.open(path).convert('RGB')
+    original.save(str(tmp_path / 'resaved.jpg'), 'JPEG', quality=90)
+    expected = np.asarray(ImageChops.difference(original, Image.open(str(tmp_path / 'resaved.jpg'))))
+    np.testing.assert_array_equal(difference, expected)
+    assert ela_image.size == original.size
+    assert np.asarray(ela_image).max() >= 250
+
+
+def test_tiled_reencode_matches_whole_image(photo):
+    image = Image.fromarray(photo[..., ::-1])
+    whole = ela_difference(image, tile_size=4096).astype(np.float64)
+    tiled = ela_difference(image, tile_size=128).astype(np.float64)
+    assert tiled.shape == whole.shape
+    # Tiles sit on the MCU grid; only chroma upsampling at tile seams differs
+    assert abs(tiled.mean() - whole.mean()) < 0.02 * whole.mean()
+    interior = np.ones(photo.shape[:2], dtype=bool)
+    interior[np.arange(photo.shape[0]) % 128 < 2] = False
+    interior[np.arange(photo.shape[0]) % 128 > 125] = False
+    interior[:, np.arange(photo.shape[1]) % 128 < 2] = False
+    interior[:, np.arange(photo.shape[1]) % 128 > 125] = False
+    assert np.mean(tiled[interior] == whole[interior]) > 0.95
+
+
+def test_concurrent_calls_are_independent(write_image):
+    paths = [write_image(f'photo_{s}.jpg', make_photo(seed=s), quality=90) for s in range(4)]
+    expected = [perform_ela(p, return_array=True)[1] for p in paths]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda p: perform_ela(p, return_array=True)[1], paths * 3))
+    for i, difference in enumerate(results):
+        np.testing.assert_array_equal(difference, expected[i % 4])
+
+
+def test_block_errors_match_per_block_means(photo, write_image):
+    path = write_image('photo.jpg', photo, quality=90)
+    result = analyze_ela(path, block_size=16)
+    error = perform_ela(path, return_array=True)[1].max(axis=2).astype(np.float64)
+    rows, cols = photo.shape[0] // 16, photo.shape[1] // 16
+    expected = np.array([[error[y * 16:(y + 1) * 16, x * 16:(x + 1) * 16].mean() for x in range(cols)]
+                         for y in range(rows)])
+    np.testing.assert_allclose(result['block_errors'], expected, atol=1e-4)
+    assert abs(result['ela_mean'] - error.mean()) < 1e-6
+    assert result['ela_max'] == error.max()
+    assert not result['is_suspicious']
+
+
+def test_pasted_region_has_outlier_blocks(write_image):
+    background = _jpeg_round_trip(make_photo(512, 768, seed=3), 60)
+    background[128:256, 256:448] = make_photo(512, 768, seed=4)[128:256, 256:448]
+    result = analyze_ela(write_image('splice.png', background))
+
+    block_errors = result['block_errors']
+    pasted = np.zeros(block_errors.shape, dtype=bool)
+    pasted[8:16, 16:28] = True
+    assert block_errors[pasted].min() > block_errors[~pasted].max()
+    assert abs(result['outlier_block_ratio'] - np.mean(pasted)) < 0.01
+    assert result['is_suspicious']
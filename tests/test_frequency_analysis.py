@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from forensics.frequency_analysis import analyze_frequency, welch_spectrum
+
+
+def test_unknown_mode_is_rejected(write_image, photo):
+    path = write_image('photo.png', photo)
+    with pytest.raises(ValueError):
+        analyze_frequency(path, mode='Welch')
+
+
+def test_welch_output_size_is_fixed(write_image, photo):
+    for shape in [(480, 640), (100, 300)]:
+        path = write_image(f'photo_{shape[0]}.png', photo[:shape[0], :shape[1]])
+        preview, spectrum = analyze_frequency(path, mode='welch', tile_size=256, return_array=True)
+        assert spectrum.shape == (256, 256)
+        assert preview.size == (256, 256)
+    _, full = analyze_frequency(path, mode='full', return_array=True)
+    assert full.shape == (100, 300)
+
+
+def test_welch_brings_out_periodic_peaks():
+    # Faint 8-pixel period (e.g. a block grid) buried in noise
+    rng = np.random.default_rng(0)
+    x = np.arange(1024)
+    gray = 128 + rng.normal(0, 20, (1024, 1024)) + 2 * np.cos(2 * np.pi * x / 8)[None, :]
+    spectrum = welch_spectrum(gray, tile_size=256)
+    centre = 128
+    peak = spectrum[centre, centre + 256 // 8]
+    ring = spectrum[centre + 10:centre + 60, centre + 20:centre + 44]
+    assert peak > ring.mean() + 10 * ring.std()
+    # Averaging tiles smooths the noise floor
+    full = np.log(np.abs(np.fft.fft2(gray - gray.mean())) ** 2 + 1)
+    assert ring.std() < 0.5 * full[10:60, 20:44].std()
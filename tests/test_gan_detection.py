@@ -0,0 +1,99 @@
+import cv2
+import numpy as np
+from scipy import fftpack
+
+import forensics.gan_detection as gan_detection
+from forensics.gan_detection import (detect_gan_fingerprint, detect_gan_fingerprint_batch, gan_spectrum_scores,
+                                     GeneratorSpectrumLibrary)
+from conftest import make_photo
+
+
+def make_upsampled(seed, factor=4, size=512):
+    """Generator-like image: low-resolution content upsampled with nearest neighbour."""
+    small = make_photo(size // factor, size // factor, seed=seed)
+    return cv2.resize(small, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
+def _write_all(write_image, prefix, images):
+    return [write_image(f'{prefix}_{i}.png', img) for i, img in enumerate(images)]
+
+
+def reference_scores(img):
+    """Per-image scores from a full fft2 / fftshift spectrum and a nested DCT."""
+    img = img.astype(np.float64)
+    h, w = img.shape
+    dct = np.abs(fftpack.dct(fftpack.dct(img.T, norm='ortho').T, norm='ortho'))
+    bands = [dct[:h // 4, :w // 4].sum(), dct[h // 4:h // 2, w // 4:w // 2].sum(), dct[h // 2:, w // 2:].sum()]
+
+    magnitude = np.abs(np.fft.fftshift(np.fft.fft2(img)))
+    y, x = np.ogrid[:h, :w]
+    r = np.sqrt((x - w // 2) ** 2 + (y - h // 2) ** 2).astype(int)
+    radial_mean = np.bincount(r.ravel(), magnitude.ravel()) / np.bincount(r.ravel())
+    log_spectrum = np.log(magnitude + 1)
+    return {
+        'high_freq_pattern_score': bands[2] / sum(bands),
+        'frequency_anomaly_score': np.std(np.diff(radial_mean[:50])),
+        'spectral_residual_score': np.sum(np.abs(log_spectrum - cv2.GaussianBlur(log_spectrum, (3, 3), 0)))
+    }
+
+
+def test_batched_scores_match_the_full_spectrum_reference():
+    images = [cv2.cvtColor(make_photo(128, 128, seed=1), cv2.COLOR_BGR2GRAY),
+              cv2.cvtColor(make_upsampled(2, size=128), cv2.COLOR_BGR2GRAY)]
+    for score, img in zip(gan_spectrum_scores(np.stack(images)), images):
+        for key, expected in reference_scores(img).items():
+            assert abs(score[key] - expected) <= 1e-6 * abs(expected), key
+
+
+def test_batch_matches_single_image_detection(write_image):
+    images = [make_photo(300, 400, seed=s) for s in range(3)] + [make_upsampled(s) for s in range(2)]
+    paths = _write_all(write_image, 'mixed', images)
+    expected = {path: detect_gan_fingerprint(path) for path in paths}
+    for batch_size in (1, 2, 16):
+        results = detect_gan_fingerprint_batch(paths, batch_size=batch_size)
+        assert list(results) == paths
+        for path in paths:
+            for key, value in expected[path].items():
+                assert np.isclose(results[path][key], value, rtol=1e-9), (batch_size, key)
+
+
+def test_library_attributes_images_to_their_generator(write_image, tmp_path):
+    cameras = _write_all(write_image, 'camera', [make_photo(512, 512, seed=s) for s in range(4)])
+    upsampled = _write_all(write_image, 'upsampled', [make_upsampled(s) for s in range(4)])
+    library = GeneratorSpectrumLibrary()
+    assert library.add_images('camera', cameras[:3]) == 3
+    assert library.add_images('upsampler', upsampled[:3]) == 3
+
+    assert library.match(cameras[3])['best_match'] == 'camera'
+    result = library.match(upsampled[3], top_k=5)
+    assert result['best_match'] == 'upsampler'
+    assert [m['generator'] for m in result['generator_matches']] == ['upsampler', 'camera']
+    assert result['references_compared'] == 2
+    assert 0.0 <= result['best_distance'] < result['generator_matches'][1]['distance']
+
+    library.save(str(tmp_path / 'library.npz'))
+    loaded = GeneratorSpectrumLibrary.load(str(tmp_path / 'library.npz'))
+    assert loaded.names == library.names
+    assert np.allclose(loaded.references, library.references)
+
+
+def test_batch_failures_stay_in_their_batch(write_image, monkeypatch):
+    paths = _write_all(write_image, 'photo', [make_photo(96, 96, seed=s) for s in range(4)])
+    paths.insert(1, 'missing.png')
+    expected = {path: detect_gan_fingerprint(path) for path in paths}
+
+    scores = gan_detection.gan_spectrum_scores
+    calls = []
+
+    def fail_first_batch(stack):
+        calls.append(len(stack))
+        if len(calls) == 1:
+            raise MemoryError("out of memory")
+        return scores(stack)
+    monkeypatch.setattr(gan_detection, 'gan_spectrum_scores', fail_first_batch)
+
+    results = detect_gan_fingerprint_batch(paths, batch_size=3)
+    assert calls == [2, 2]
+    assert results[paths[0]] == results['missing.png'] == expected['missing.png']
+    for path in paths[3:]:
+        assert results[path] == expected[path]
@@ -0,0 +1,115 @@
+from PIL import Image, PngImagePlugin
+
+from forensics.classifier import EVIDENCE_SECTIONS
+from forensics.generator_signatures import AhoCorasick, match_generator_signatures
+from forensics.result_store import ResultStore, reclassify
+from metaforens import MetaForens, DETECTOR_NAMES
+
+
+def _png_with_text(path, photo, **text):
+    info = PngImagePlugin.PngInfo()
+    for key, value in text.items():
+        info.add_text(key, value)
+    Image.fromarray(photo[..., ::-1]).save(path, pnginfo=info)
+    return path
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    patterns = [b'he', b'she', b'his', b'hers']
+    text = b'ushers and his'
+    found = sorted(AhoCorasick(patterns).search(text))
+    expected = sorted((start + len(p) - 1, i) for i, p in enumerate(patterns)
+                      for start in range(len(text)) if text.startswith(p, start))
+    assert found == expected
+
+
+def test_diffusion_parameters_are_decisive(photo, tmp_path):
+    path = _png_with_text(str(tmp_path / 'sd.png'), photo,
+                          parameters='a cat\nNegative prompt: blurry\nSteps: 20, Sampler: Euler a, CFG scale: 7')
+    result = match_generator_signatures(path)
+    assert result['category'] == 'ai_generated'
+    assert result['decisive']
+    assert result['generators'] == ['Stable Diffusion WebUI']
+
+
+def test_composite_source_type_supersedes_generated(photo, tmp_path):
+    path = _png_with_text(str(tmp_path / 'edit.png'), photo,
+                          Description='DigitalSourceType: compositeWithTrainedAlgorithmicMedia')
+    result = match_generator_signatures(path)
+    assert [hit['category'] for hit in result['signature_hits']] == ['ai_edited']
+    assert result['decisive']
+
+
+def test_editor_tag_is_not_decisive(photo, tmp_path):
+    path = _png_with_text(str(tmp_path / 'gimp.png'), photo, Software='GIMP 2.10')
+    result = match_generator_signatures(path)
+    assert result['category'] == 'editor'
+    assert not result['decisive']
+
+
+def test_patterns_do_not_match_inside_words(photo, tmp_path):
+    path = _png_with_text(str(tmp_path / 'camera.png'), photo, Comment='ImageNumber 12, imagename=IMG_0001, jumbo')
+    result = match_generator_signatures(path)
+    assert result['signature_hits'] == []
+    assert result['category'] is None
+
+
+def test_verdict_comes_from_the_strongest_decisive_hit(photo, tmp_path):
+    path = _png_with_text(str(tmp_path / 'fill.png'), photo[:64, :64],
+                          Software='Adobe Photoshop Generative Fill', Description='Google Imagen 3 preview')
+    triage = match_generator_signatures(path)
+    assert triage['category'] == 'ai_generated'  # non-decisive Imagen hit
+    assert triage['decisive_category'] == 'ai_edited'
+
+    result = MetaForens().analyze(path, short_circuit=True)
+    assert result['verdict'] == "AI Edited / Modified"
+    assert result['probabilities']['ai_edited'] == 100.0
+    assert any('Generative Fill' in line for line in result['evidence']['metadata'])
+    assert result['categorized_evidence']['ai_edited'] == result['evidence']['metadata']
+
+
+def test_short_circuit_keeps_report_shape_and_records_triage(photo, tmp_path):
+    path = _png_with_text(str(tmp_path / 'comfy.png'), photo[:64, :64], prompt='{"3": {"class_type": "KSampler"}}')
+    store = ResultStore()
+    detector = MetaForens(result_store=store)
+    result = detector.analyze(path, return_detailed=True, short_circuit=True)
+
+    assert result['verdict'] == "AI Generated"
+    assert set(result['evidence']) == set(EVIDENCE_SECTIONS)
+    assert result['evidence']['metadata']
+    assert set(result['detailed']) == set(DETECTOR_NAMES)
+    assert result['detailed']['cfa_detection'] == {}
+
+    assert store.paths == [path]
+    assert store.triaged == [True]
+    report = reclassify(store, {'weights': {'modern': {'metadata': 0}}})
+    assert report['changed'] == 0
+    assert store.verdicts == [0]
+
+    # The stored result is the triage verdict, not a re-score of empty detectors
+    expected = {key: value for key, value in result.items() if key != 'detailed'}
+    assert store.result(0) == expected
+    assert store.result(0, {'weights': {'modern': {'metadata': 0}}})['verdict'] == "AI Generated"
+
+    store.save(str(tmp_path / 'store.npz'))
+    loaded = ResultStore.load(str(tmp_path / 'store.npz'))
+    assert loaded.triaged == [True]
+    assert loaded.result(0) == expected
+
+
+def test_short_circuit_reads_headers_once_and_skips_pixels(photo, tmp_path, monkeypatch):
+    import forensics.header_scanner as header_scanner
+    import metaforens
+
+    path = _png_with_text(str(tmp_path / 'comfy.png'), photo[:64, :64], prompt='{"3": {"class_type": "KSampler"}}')
+    walks = []
+    walk_headers = header_scanner._walk_headers
+    monkeypatch.setattr(header_scanner, '_walk_headers', lambda *args: walks.append(args) or walk_headers(*args))
+
+    def no_pixels(*args, **kwargs):
+        raise AssertionError("pixels opened on the triage path")
+    monkeypatch.setattr(metaforens.Image, 'open', no_pixels)
+
+    result = MetaForens().analyze(path, short_circuit=True)
+    assert result['verdict'] == "AI Generated"
+    assert len(walks) == 1
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+from scipy import ndimage
+
+from forensics.gradient_analysis import analyze_gradient_anomalies
+from conftest import make_photo
+
+
+def reference_statistics(gray, window_size=16):
+    """Per-window circular variance from arctan2 angles and ndimage component count."""
+    gray = gray.astype(np.float64)
+    gx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+    magnitude = np.hypot(gx, gy)
+    angles = np.arctan2(gy, gx)
+    h, w = angles.shape
+    variances = []
+    for i in range(0, h - h % window_size, window_size):
+        for j in range(0, w - w % window_size, window_size):
+            window = angles[i:i + window_size, j:j + window_size]
+            variances.append(1 - np.hypot(np.cos(window).mean(), np.sin(window).mean()))
+    _, count = ndimage.label(magnitude > np.percentile(magnitude, 95))
+    return float(np.mean(variances)), count
+
+
+def test_vectorized_statistics_match_reference(write_image):
+    img = make_photo()
+    result = analyze_gradient_anomalies(write_image('photo.png', img))
+    consistency, count = reference_statistics(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+    assert abs(result['gradient_consistency'] - consistency) < 1e-3
+    # The histogram percentile is quantised to 1/2000 of the range
+    assert abs(result['sharp_transition_count'] - count) <= 0.05 * count
+
+
+def test_flat_regions_count_as_angle_zero(write_image):
+    img = make_photo(256, 256)
+    img[:128] = 120
+    result = analyze_gradient_anomalies(write_image('half_flat.png', img))
+    consistency, _ = reference_statistics(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+    assert abs(result['gradient_consistency'] - consistency) < 1e-3
+
+
+def test_textured_photo_has_varied_directions(write_image):
+    result = analyze_gradient_anomalies(write_image('photo.png', make_photo()))
+    assert result['gradient_consistency'] > 0.22
+
+
+def test_linear_ramp_is_too_consistent(write_image):
+    ramp = np.tile(np.linspace(0, 255, 512), (384, 1)).astype(np.uint8)
+    result = analyze_gradient_anomalies(write_image('ramp.png', ramp))
+    assert result['gradient_consistency'] < 0.22
+    assert result['is_suspicious']
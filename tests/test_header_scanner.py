@@ -0,0 +1,67 @@
+from PIL import Image, PngImagePlugin
+
+from forensics.generator_signatures import match_generator_signatures
+from forensics.header_scanner import (scan_metadata, read_exif_thumbnail, read_metadata_segments,
+                                      HEADER_READ_LIMIT)
+from forensics.metadata_extractor import extract_metadata
+from conftest import make_thumbnail, exif_with_thumbnail
+
+
+def _camera_exif():
+    exif = Image.Exif()
+    exif[0x010F] = 'Canon'                 # Make
+    exif[0x0110] = 'EOS 5D'                # Model
+    exif[0x0131] = 'Adobe Photoshop 25.0'  # Software
+    exif[0x0132] = '2023:05:01 10:00:00'   # DateTime
+    exif[0x011A] = 300.0                   # XResolution
+    exif.get_ifd(0x8769)[0x9003] = '2023:05:01 09:59:58'  # DateTimeOriginal
+    return exif
+
+
+def test_scan_metadata_matches_extract_metadata(photo, tmp_path):
+    path = str(tmp_path / 'camera.jpg')
+    Image.fromarray(photo[..., ::-1]).save(path, 'JPEG', quality=90, exif=_camera_exif())
+
+    scanned, legacy = scan_metadata(path), extract_metadata(path)
+    for key in ('format', 'mode', 'size', 'software_tags', 'anomalies'):
+        assert scanned[key] == legacy[key]
+    assert scanned['exif'].keys() == legacy['exif'].keys()
+    for tag, value in legacy['exif'].items():
+        assert scanned['exif'][tag] == value or float(scanned['exif'][tag]) == float(value)
+
+
+def test_png_text_and_missing_exif(photo, tmp_path):
+    path = str(tmp_path / 'text.png')
+    info = PngImagePlugin.PngInfo()
+    info.add_text('Software', 'GIMP 2.10')
+    info.add_itxt('Comment', 'compressed comment ' * 50, zip=True)
+    Image.fromarray(photo[..., ::-1]).save(path, pnginfo=info)
+
+    metadata = scan_metadata(path)
+    assert metadata['format'] == 'PNG'
+    assert metadata['size'] == (photo.shape[1], photo.shape[0])
+    assert metadata['text']['Comment'] == 'compressed comment ' * 50
+    assert metadata['software_tags'] == ['GIMP 2.10']
+    assert "No EXIF data found." in metadata['anomalies']
+
+
+def test_oversized_chunk_keeps_earlier_metadata(photo, tmp_path):
+    # A workflow chunk larger than the read limit, after the software chunk
+    path = str(tmp_path / 'workflow.png')
+    info = PngImagePlugin.PngInfo()
+    info.add_text('Software', 'ComfyUI')
+    info.add_text('workflow', '{"3": {"class_type": "KSampler"}, "pad": "' + 'x' * (2 * HEADER_READ_LIMIT) + '"}')
+    Image.fromarray(photo[..., ::-1]).save(path, pnginfo=info)
+
+    metadata = scan_metadata(path)
+    assert 'ComfyUI' in metadata['software_tags']
+    assert any('not read' in anomaly for anomaly in metadata['anomalies'])
+    assert match_generator_signatures(path)['decisive']
+
+
+def test_exif_thumbnail_is_read_from_headers(photo, tmp_path):
+    thumbnail = make_thumbnail(photo)
+    path = str(tmp_path / 'thumb.jpg')
+    Image.fromarray(photo[..., ::-1]).save(path, 'JPEG', exif=exif_with_thumbnail(thumbnail))
+    assert read_exif_thumbnail(path) == thumbnail
+    assert any(segment.startswith(b'Exif') for segment in read_metadata_segments(path))
@@ -0,0 +1,26 @@
+import cv2
+
+from forensics.jpeg_analysis import analyze_jpeg_artifacts, GRID_CONTRAST_THRESHOLD
+
+
+def test_uncompressed_photo_has_no_jpeg_artifacts(photo, write_image):
+    result = analyze_jpeg_artifacts(write_image('photo.png', photo))
+    assert result['blockiness_score'] > 2.0  # texture alone raises blockiness
+    assert result['grid_contrast'] < GRID_CONTRAST_THRESHOLD
+    assert not result['has_jpeg_artifacts']
+    assert result['compression_quality_estimate'] == 'High (90-100) or Uncompressed'
+
+
+def test_low_quality_jpeg_has_grid(photo, write_image):
+    result = analyze_jpeg_artifacts(write_image('photo.jpg', photo, quality=50))
+    assert result['grid_contrast'] > GRID_CONTRAST_THRESHOLD
+    assert result['has_jpeg_artifacts']
+    assert result['grid_offset'] == (0, 0)
+
+
+def test_cropped_jpeg_grid_offset(photo, write_image):
+    path = write_image('photo.jpg', photo, quality=50)
+    cropped = cv2.imread(path)[3:, 5:]
+    result = analyze_jpeg_artifacts(write_image('cropped.png', cropped))
+    assert result['has_jpeg_artifacts']
+    assert result['grid_offset'] == (5, 3)
@@ -0,0 +1,45 @@
+import numpy as np
+
+from forensics.noise_analysis import extract_noise_map, NOISE_MAP_METHODS
+from conftest import make_photo, make_noisy_gradient
+
+
+def test_every_method_returns_a_full_size_map(write_image):
+    path = write_image('photo.png', make_photo(120, 160))
+    for method in NOISE_MAP_METHODS:
+        noise_map = extract_noise_map(path, method=method)
+        assert noise_map is not None, method
+        assert noise_map.size == (160, 120)
+        assert noise_map.mode == 'RGB'
+
+
+def test_residual_follows_the_noise_level(write_image):
+    quiet = write_image('quiet.png', make_noisy_gradient(128, 160, sigma=1.0))
+    noisy = write_image('noisy.png', make_noisy_gradient(128, 160, sigma=8.0))
+    for method in NOISE_MAP_METHODS:
+        quiet_level = np.asarray(extract_noise_map(quiet, method=method), dtype=np.float64).mean()
+        noisy_level = np.asarray(extract_noise_map(noisy, method=method), dtype=np.float64).mean()
+        assert noisy_level > 2 * quiet_level, method
+
+
+def test_wavelet_residual_of_a_flat_image_is_zero(write_image):
+    noise_map = extract_noise_map(write_image('flat.png', np.full((64, 64, 3), 90, np.uint8)), method='wavelet')
+    assert not np.asarray(noise_map).any()
+
+
+def test_auto_matches_nlmeans_on_small_images(write_image):
+    path = write_image('photo.png', make_photo(120, 160))
+    auto = np.asarray(extract_noise_map(path))
+    np.testing.assert_array_equal(auto, np.asarray(extract_noise_map(path, method='nlmeans')))
+
+
+def test_auto_downscales_large_images(write_image):
+    path = write_image('large.png', make_noisy_gradient(900, 1600, sigma=8.0))
+    noise_map = np.asarray(extract_noise_map(path))
+    assert noise_map.shape == (900, 1600, 3)
+    # INTER_AREA averaging lowers the noise but the residual stays clearly non-zero
+    assert noise_map.mean() > 1.0
+
+
+def test_unknown_method_returns_none(write_image):
+    assert extract_noise_map(write_image('photo.png', make_photo(64, 64)), method='fourier') is None
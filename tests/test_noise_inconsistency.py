@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+
+from forensics.noise_inconsistency import (analyze_noise_inconsistency, noise_level_map, quadtree_noise_cells,
+                                           _integral_images)
+from conftest import make_noisy_gradient, make_photo
+
+
+def _overlaps(cell, y0, x0, y1, x1):
+    return cell[0] < y1 and y0 < cell[2] and cell[1] < x1 and x0 < cell[3]
+
+
+def test_noise_level_map_matches_window_variances():
+    rng = np.random.default_rng(1)
+    # Offset mean exercises the float64 integrals (naive float32 sums cancel badly)
+    residual = (rng.normal(0, 3, (97, 131)) + 200).astype(np.float32)
+    level_map = noise_level_map(residual, (20, 24), (7, 9))
+
+    ys, xs = range(0, 97 - 20 + 1, 7), range(0, 131 - 24 + 1, 9)
+    expected = np.array([[residual[y:y + 20, x:x + 24].astype(np.float64).var() for x in xs] for y in ys])
+    assert level_map.shape == expected.shape
+    assert level_map.dtype == np.float32
+    np.testing.assert_allclose(level_map, expected, rtol=1e-4)
+
+
+def test_noise_level_map_rejects_oversized_windows():
+    assert noise_level_map(np.zeros((10, 10), np.float32), 11, 1).shape == (0, 0)
+
+
+def test_grid_variances_and_dense_map_agree(write_image):
+    img = make_photo(256, 256)
+    result = analyze_noise_inconsistency(write_image('photo.png', img), return_map=True,
+                                         map_window=64, map_stride=64)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    residual = gray - cv2.GaussianBlur(gray, (5, 5), 0)
+    expected = [residual[y:y + 64, x:x + 64].astype(np.float64).var() for y in range(0, 256, 64) for x in range(0, 256, 64)]
+
+    assert result['regions_analyzed'] == 16
+    np.testing.assert_allclose(result['noise_level_map'].ravel(), expected, rtol=1e-4)
+    assert abs(result['noise_variance_std'] - np.std(expected)) < 1e-3 * np.std(expected)
+
+
+def test_quadtree_isolates_a_small_region_in_a_large_image(write_image):
+    # 64 px denoised patch in a 1.5 MP image
+    img = make_noisy_gradient(1000, 1500)
+    img[500:564, 700:764] = cv2.GaussianBlur(img[500:564, 700:764], (0, 0), 3)
+    result = analyze_noise_inconsistency(write_image('patch.png', img), mode='quadtree')
+
+    assert result['suspicious_cells']
+    assert all(_overlaps(cell, 500, 700, 564, 764) for cell in result['suspicious_cells'])
+    assert all(min(y1 - y0, x1 - x0) < 128 for y0, x0, y1, x1 in result['suspicious_cells'])
+    assert 0 < result['suspicious_area_ratio'] < 0.02
+
+
+def test_quadtree_leaves_uniform_noise_unsplit(write_image):
+    result = analyze_noise_inconsistency(write_image('clean.png', make_noisy_gradient(1000, 1500)), mode='quadtree')
+    assert result['regions_analyzed'] == 16
+    assert result['suspicious_cells'] == []
+
+
+def test_quadtree_leaves_tile_the_image():
+    rng = np.random.default_rng(0)
+    residual = rng.normal(0, 2, (480, 640)).astype(np.float32)
+    residual[100:160, 300:360] *= 4
+    cells, variances, deviating = quadtree_noise_cells(_integral_images(residual), residual.shape)
+
+    coverage = np.zeros(residual.shape, dtype=np.int32)
+    for y0, x0, y1, x1 in cells:
+        coverage[y0:y1, x0:x1] += 1
+    assert np.all(coverage == 1)
+    assert deviating.any()
+    assert np.all(variances[deviating] > np.median(variances))
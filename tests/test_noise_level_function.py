@@ -0,0 +1,36 @@
+import numpy as np
+
+from forensics.noise_level_function import estimate_noise_level_function
+
+
+def make_ramp(noise_variance, height=512, width=768, seed=0):
+    """Smooth horizontal ramp from dark to bright with noise of the given variance per intensity."""
+    rng = np.random.default_rng(seed)
+    clean = np.tile(np.linspace(20, 235, width), (height, 1))
+    noisy = clean + rng.normal(0, 1, clean.shape) * np.sqrt(noise_variance(clean))
+    return np.clip(np.round(noisy), 0, 255).astype(np.uint8)
+
+
+def test_sensor_noise_is_signal_dependent(write_image):
+    # Poisson-Gaussian sensor noise: variance 0.1 * I + 2
+    path = write_image('sensor.png', make_ramp(lambda i: 0.1 * i + 2.0))
+    result = estimate_noise_level_function(path)
+    assert result['bins_used'] >= 20
+    assert 0.07 < result['nlf_slope'] < 0.13
+    assert result['signal_dependent_ratio'] > 0.7
+    assert result['nlf_fit_error'] < 0.2
+    assert not result['is_suspicious']
+
+
+def test_constant_noise_is_suspicious(write_image):
+    path = write_image('flat_noise.png', make_ramp(lambda i: np.full_like(i, 9.0)))
+    result = estimate_noise_level_function(path)
+    assert abs(result['nlf_intercept'] - 9.0) < 1.5
+    assert result['signal_dependent_ratio'] < 0.1
+    assert result['is_suspicious']
+
+
+def test_noiseless_image_has_too_few_bins(write_image):
+    result = estimate_noise_level_function(write_image('flat.png', np.full((64, 64), 128, np.uint8)))
+    assert result['bins_used'] < 3
+    assert result['bin_variance'] == []
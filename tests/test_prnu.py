@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+from forensics.prnu import (build_prnu_fingerprint, compute_pce, extract_prnu_residual, PRNUFingerprintLibrary,
+                            PCE_THRESHOLD)
+from conftest import make_photo
+
+SHAPE = (256, 320)
+
+
+def sensor_pattern(seed):
+    """Multiplicative PRNU factor K of a simulated sensor."""
+    return np.random.default_rng(seed).normal(0, 0.03, SHAPE)
+
+
+def shoot(scene, pattern, seed):
+    """Grayscale capture of a scene through a sensor: I = S * (1 + K) + shot noise."""
+    noise = np.random.default_rng(seed).normal(0, 1.5, SHAPE)
+    return np.clip(np.round(scene * (1 + pattern) + noise), 0, 255).astype(np.uint8)
+
+
+def flat_scene(seed):
+    """Bright, smooth reference scene (an overcast sky or a wall)."""
+    rng = np.random.default_rng(seed)
+    return 170 + cv2.GaussianBlur(rng.normal(0, 40, SHAPE), (0, 0), 30)
+
+
+def build(write_image, name, pattern, count=8):
+    paths = [write_image(f'{name}_{i}.png', shoot(flat_scene(100 + i), pattern, 200 + i)) for i in range(count)]
+    return paths, build_prnu_fingerprint(paths)
+
+
+def test_streaming_estimate_matches_the_batch_formula(write_image):
+    paths, fingerprint = build(write_image, 'a', sensor_pattern(1), count=4)
+    images = [cv2.imread(p, cv2.IMREAD_GRAYSCALE).astype(np.float32) for p in paths]
+    numerator = sum(extract_prnu_residual(i) * i for i in images)
+    expected = numerator / np.sum([i * i for i in images], axis=0)
+    expected -= expected.mean(axis=1, keepdims=True)
+    expected -= expected.mean(axis=0, keepdims=True)
+    assert fingerprint.dtype == np.float32
+    np.testing.assert_allclose(fingerprint, expected, atol=1e-5)
+
+
+def test_fingerprint_recovers_the_sensor_pattern(write_image):
+    pattern = sensor_pattern(1)
+    _, fingerprint = build(write_image, 'a', pattern)
+    assert np.corrcoef(fingerprint.ravel(), pattern.ravel())[0, 1] > 0.8
+
+
+def test_same_camera_matches_and_other_camera_does_not(write_image, tmp_path):
+    pattern_a, pattern_b = sensor_pattern(1), sensor_pattern(2)
+    _, fingerprint_a = build(write_image, 'a', pattern_a)
+    build_prnu_fingerprint(build(write_image, 'b', pattern_b)[0], output_path=str(tmp_path / 'b.npy'))
+    library = PRNUFingerprintLibrary({'a': fingerprint_a, 'b': str(tmp_path / 'b.npy')})
+
+    scene = cv2.cvtColor(make_photo(*SHAPE), cv2.COLOR_BGR2GRAY).astype(np.float64)
+    result = library.match(write_image('from_a.png', shoot(scene, pattern_a, 7)))
+    assert result['fingerprints_compared'] == 2
+    assert result['camera_identified']
+    assert result['best_match'] == 'a'
+    assert result['pce_scores']['a'] > PCE_THRESHOLD
+    assert result['pce_scores']['b'] < PCE_THRESHOLD
+
+    result = library.match(write_image('other.png', shoot(scene, sensor_pattern(3), 7)))
+    assert not result['camera_identified']
+    assert result['best_match'] is None
+
+
+def test_mismatched_sizes_are_skipped(write_image):
+    paths, _ = build(write_image, 'a', sensor_pattern(1), count=2)
+    small = write_image('small.png', np.full((64, 64), 150, np.uint8))
+    fingerprint = build_prnu_fingerprint([small] + paths)
+    assert fingerprint.shape == (64, 64)
+
+    library = PRNUFingerprintLibrary({'small': fingerprint})
+    assert library.match(paths[0])['fingerprints_compared'] == 0
+    assert build_prnu_fingerprint(['missing.png']) is None
+
+
+def test_pce_of_a_spike_over_noise():
+    correlation = np.random.default_rng(0).normal(0, 1, (128, 128))
+    correlation[0, 0] = 30.0
+    assert abs(compute_pce(correlation) - 900) < 100
+    correlation[0, 0] = -30.0
+    assert compute_pce(correlation) < 0
@@ -0,0 +1,56 @@
+import numpy as np
+from PIL import Image
+
+from forensics.quantization_tables import (analyze_quantization_tables, estimate_ijg_quality,
+                                           ijg_scaled_table, register_encoder_signature,
+                                           IJG_LUMINANCE_TABLE, IJG_CHROMINANCE_TABLE)
+
+
+def _save_jpeg(path, photo, **options):
+    Image.fromarray(photo[..., ::-1]).save(path, 'JPEG', **options)
+    return path
+
+
+def test_quality_is_recovered_from_scaled_tables():
+    for quality in range(1, 101):
+        for base in (IJG_LUMINANCE_TABLE, IJG_CHROMINANCE_TABLE):
+            estimate, error = estimate_ijg_quality(ijg_scaled_table(base, quality), base)
+            assert error == 0.0
+            # Qualities that clip every entry give identical tables
+            assert np.array_equal(ijg_scaled_table(base, estimate), ijg_scaled_table(base, quality))
+
+
+def test_library_jpeg_is_identified_from_the_header(photo, tmp_path):
+    for quality, subsampling, layout in [(75, 2, '4:2:0'), (90, 1, '4:2:2'), (95, 0, '4:4:4')]:
+        path = _save_jpeg(str(tmp_path / f'q{quality}.jpg'), photo, quality=quality, subsampling=subsampling)
+        result = analyze_quantization_tables(path)
+        assert result['is_jpeg']
+        assert result['table_count'] == 2
+        assert result['quality_per_table'] == [quality, quality]
+        assert result['standard_tables']
+        assert result['subsampling'] == layout
+        assert result['encoder_match'] == f'IJG libjpeg (quality {quality})'
+        assert result['encoder_category'] == 'library'
+        assert not result['is_suspicious']
+
+
+def test_registered_editor_tables_are_suspicious(photo, tmp_path):
+    luma = [max(1, v // 2) for v in ijg_scaled_table(IJG_LUMINANCE_TABLE, 50).astype(int)]
+    chroma = [max(1, v // 3) for v in ijg_scaled_table(IJG_CHROMINANCE_TABLE, 50).astype(int)]
+    path = _save_jpeg(str(tmp_path / 'editor.jpg'), photo, qtables=[luma, chroma])
+
+    result = analyze_quantization_tables(path)
+    assert not result['standard_tables']
+    assert result['encoder_match'] is None
+
+    digest = register_encoder_signature({0: luma, 1: chroma}, 'Test Editor', 'editor')
+    result = analyze_quantization_tables(path)
+    assert result['table_digest'] == digest
+    assert result['encoder_match'] == 'Test Editor'
+    assert result['is_suspicious']
+
+
+def test_non_jpeg_is_skipped(photo, write_image):
+    result = analyze_quantization_tables(write_image('photo.png', photo))
+    assert not result['is_jpeg']
+    assert result['note'] == 'Not a JPEG image'
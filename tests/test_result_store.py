@@ -0,0 +1,107 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from forensics.classifier import classify_image, FEATURES, VERDICTS, DEFAULT_CLASSIFIER_CONFIG
+from forensics.result_store import ResultStore, reclassify
+from conftest import random_analyses
+
+NO_METADATA = {'weights': {'modern': {'metadata': 0}, 'old_image': {'metadata': 0}}}
+
+
+def make_store(count=200, seed=0):
+    rng = random.Random(seed)
+    store = ResultStore()
+    samples = []
+    for index in range(count):
+        sample = random_analyses(rng)
+        store.add(f'image_{index}.jpg', sample)
+        samples.append(sample)
+    return store, samples
+
+
+def test_store_reproduces_classify_image():
+    store, samples = make_store()
+    for index, sample in enumerate(samples):
+        expected = classify_image(**sample)
+        assert store.result(index) == expected
+        assert VERDICTS[store.verdicts[index]] == expected['verdict']
+
+
+def test_save_load_round_trip(tmp_path):
+    store, _ = make_store()
+    reclassify(store, NO_METADATA)
+    store.save(str(tmp_path / 'store.npz'))
+    loaded = ResultStore.load(str(tmp_path / 'store.npz'))
+
+    assert loaded.paths == store.paths
+    assert loaded.verdicts == store.verdicts
+    assert loaded.triaged == store.triaged
+    assert loaded.contexts == store.contexts
+    assert np.array_equal(loaded.features, store.features, equal_nan=True)
+    assert loaded.config['weights']['modern']['metadata'] == 0
+    for index in (0, 57, 199):
+        assert loaded.result(index) == store.result(index)
+    assert reclassify(loaded, update=False) == reclassify(store, update=False)
+
+
+def test_load_rejects_other_feature_sets(tmp_path):
+    path = str(tmp_path / 'store.npz')
+    make_store(5)[0].save(path)
+    data = dict(np.load(path))
+    data['feature_names'] = np.array(FEATURES[:-1])
+    np.savez(path, **data)
+    with pytest.raises(ValueError):
+        ResultStore.load(path)
+
+
+def test_reclassify_report():
+    store, samples = make_store()
+    report = reclassify(store, NO_METADATA, update=False)
+
+    expected = [classify_image(**sample, config=NO_METADATA)['verdict'] for sample in samples]
+    before = [store.result(index)['verdict'] for index in range(len(store))]
+    changed = [i for i in range(len(store)) if expected[i] != before[i]]
+    assert report['total'] == len(store)
+    assert report['changed'] == len(changed) > 0
+    assert report['changed_paths'] == [store.paths[i] for i in changed]
+    assert sum(report['transitions'].values()) == report['changed']
+    assert all(' -> ' in key for key in report['transitions'])
+    assert report['new_counts'] == {v: expected.count(v) for v in report['new_counts']}
+    json.dumps(report)
+
+    # update=False leaves the reference verdicts alone; update=True replaces them
+    assert reclassify(store, NO_METADATA)['changed'] == report['changed']
+    assert reclassify(store, NO_METADATA)['changed'] == 0
+
+
+def test_reclassify_rejects_unknown_config_keys():
+    store, _ = make_store(5)
+    for config in ({'weight': {}}, {'weights': {'recent': {}}}, {'weights': {'modern': {'metadta': 0}}}):
+        with pytest.raises(ValueError):
+            reclassify(store, config)
+    assert store.config is None
+
+
+def test_given_verdict_is_stored_as_is():
+    sample = random_analyses(random.Random(3))
+    store = ResultStore()
+    store.config = NO_METADATA
+    for verdict in VERDICTS:
+        store.add('image.jpg', sample, verdict=verdict)
+    assert [VERDICTS[code] for code in store.verdicts] == list(VERDICTS)
+    assert store.triaged == [False] * 3
+
+
+def test_store_keeps_the_verdict_analyze_returned(write_image, photo):
+    from metaforens import MetaForens
+
+    store = ResultStore()
+    # Only the noise detector counts, so re-scoring gives another verdict
+    weights = DEFAULT_CLASSIFIER_CONFIG['weights']['modern']
+    store.config = {'weights': {'modern': {name: 0 for name in weights if name != 'noise_inconsistency'}}}
+    result = MetaForens(result_store=store).analyze(write_image('photo.jpg', photo, quality=90))
+    assert store.result(0)['verdict'] != result['verdict']
+    assert VERDICTS[store.verdicts[0]] == result['verdict']
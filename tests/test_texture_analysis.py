@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+
+from forensics.texture_analysis import analyze_texture_consistency, _normxcorr_fft, _find_peaks
+from conftest import make_photo
+
+
+def make_tiled(height, width, tile=150, seed=0):
+    """Grayscale texture tile repeated across the frame, as a cloned background would be."""
+    rng = np.random.default_rng(seed)
+    texture = cv2.GaussianBlur(rng.normal(128, 50, (tile, tile)), (0, 0), 1.5)
+    tiled = np.tile(texture, (height // tile + 1, width // tile + 1))[:height, :width]
+    return np.clip(tiled, 0, 255).astype(np.uint8)
+
+
+def test_fft_correlation_matches_match_template():
+    rng = np.random.default_rng(3)
+    image = cv2.GaussianBlur(rng.normal(128, 40, (120, 160)), (0, 0), 1.0).astype(np.float32)
+    template = image[30:70, 50:100].copy()
+    expected = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    corr = _normxcorr_fft(image, template)
+    assert corr.shape == expected.shape
+    assert np.max(np.abs(corr - expected)) < 1e-3
+    assert np.unravel_index(np.argmax(corr), corr.shape) == (30, 50)
+
+
+def test_peaks_are_suppressed_around_maxima_and_the_self_match():
+    corr = np.zeros((50, 50))
+    corr[10, 10], corr[11, 12], corr[30, 40], corr[45, 5] = 0.95, 0.9, 0.85, 0.99
+    peaks = _find_peaks(corr, 0.8, radius=3, exclude=(44, 6))
+    assert [(y, x) for y, x, _ in peaks] == [(10, 10), (30, 40)]
+
+
+def test_tiled_texture_is_repetitive(write_image):
+    result = analyze_texture_consistency(write_image('tiled.png', make_tiled(600, 600)))
+    assert result['repetition_detected']
+    assert result['repetition_peaks'] >= 2
+
+
+def test_large_tiled_texture_is_found_through_the_pyramid(write_image):
+    # Larger than COARSE_MAX_SIDE, so the coarse level is downsampled
+    result = analyze_texture_consistency(write_image('tiled_large.png', make_tiled(1200, 1600, tile=200)))
+    assert result['repetition_detected']
+
+
+def test_photo_has_no_repetition(write_image):
+    for height, width in ((480, 640), (1200, 1600)):
+        result = analyze_texture_consistency(write_image('photo.png', make_photo(height, width)))
+        assert not result['repetition_detected']
+        assert result['repetition_peaks'] == 0
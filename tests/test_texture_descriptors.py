@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+
+from forensics.texture_descriptors import (compute_lbp_codes, tile_lbp_histograms, tile_glcm, glcm_statistics,
+                                           extract_texture_descriptors, feature_names,
+                                           LBP_NEIGHBOURS, UNIFORM_LBP_TABLE, GLCM_OFFSETS)
+from conftest import make_photo
+
+
+def reference_lbp(gray):
+    """Pixel-by-pixel uniform LBP labels."""
+    h, w = gray.shape
+    labels = np.zeros((h - 2, w - 2), dtype=np.uint8)
+    for y in range(1, h - 1):
+        for x in range(1, w - 1):
+            code = sum(1 << bit for bit, (dy, dx) in enumerate(LBP_NEIGHBOURS)
+                       if gray[y + dy, x + dx] >= gray[y, x])
+            labels[y - 1, x - 1] = UNIFORM_LBP_TABLE[code]
+    return labels
+
+
+def reference_glcm(tile, levels, dy, dx):
+    """Symmetric normalised co-occurrence matrix of one tile."""
+    glcm = np.zeros((levels, levels))
+    size = tile.shape[0]
+    for y in range(size):
+        for x in range(size):
+            if 0 <= y + dy < size and 0 <= x + dx < size:
+                glcm[tile[y, x], tile[y + dy, x + dx]] += 1
+    glcm += glcm.T
+    return glcm / glcm.sum()
+
+
+def reference_statistics(glcm):
+    """Contrast, homogeneity, energy and correlation with explicit marginals."""
+    i, j = np.indices(glcm.shape)
+    mu_i, mu_j = np.sum(i * glcm), np.sum(j * glcm)
+    sd_i = np.sqrt(np.sum((i - mu_i) ** 2 * glcm))
+    sd_j = np.sqrt(np.sum((j - mu_j) ** 2 * glcm))
+    return [np.sum((i - j) ** 2 * glcm), np.sum(glcm / (1 + np.abs(i - j))), np.sum(glcm ** 2),
+            np.sum((i - mu_i) * (j - mu_j) * glcm) / (sd_i * sd_j)]
+
+
+def test_lbp_codes_match_reference():
+    gray = cv2.cvtColor(make_photo(40, 50), cv2.COLOR_BGR2GRAY)
+    gray[10:20, 10:20] = 90  # flat patch: ties count as "greater or equal"
+    np.testing.assert_array_equal(compute_lbp_codes(gray), reference_lbp(gray))
+
+
+def test_lbp_histograms_are_per_tile():
+    codes = compute_lbp_codes(cv2.cvtColor(make_photo(70, 100), cv2.COLOR_BGR2GRAY))
+    hist = tile_lbp_histograms(codes, 16)
+    assert hist.shape == (4 * 6, 59)
+    np.testing.assert_allclose(hist.sum(axis=1), 1.0, atol=1e-6)
+    expected = np.bincount(codes[16:32, 32:48].ravel(), minlength=59) / 256.0
+    np.testing.assert_allclose(hist[1 * 6 + 2], expected, atol=1e-6)
+
+
+def test_glcm_and_statistics_match_reference():
+    levels, tile_size = 8, 12
+    quantized = np.random.default_rng(2).integers(0, levels, (24, 36))
+    glcm = tile_glcm(quantized, tile_size, levels)
+    stats = glcm_statistics(glcm)
+    assert glcm.shape == (6, len(GLCM_OFFSETS), levels, levels)
+    for t in range(6):
+        tile = quantized[(t // 3) * tile_size:(t // 3 + 1) * tile_size, (t % 3) * tile_size:(t % 3 + 1) * tile_size]
+        for k, (dy, dx) in enumerate(GLCM_OFFSETS):
+            expected = reference_glcm(tile, levels, dy, dx)
+            np.testing.assert_allclose(glcm[t, k], expected, atol=1e-12)
+            np.testing.assert_allclose(stats[t, k], reference_statistics(expected), atol=1e-9)
+
+
+def test_constant_tile_has_unit_correlation():
+    glcm = tile_glcm(np.full((8, 8), 3), 8, 4)
+    stats = glcm_statistics(glcm)
+    np.testing.assert_allclose(stats[..., 3], 1.0)
+    np.testing.assert_allclose(stats[..., 0], 0.0)
+
+
+def test_extract_descriptors_layout_and_heterogeneity(write_image):
+    photo = make_photo(258, 322)
+    result = extract_texture_descriptors(write_image('photo.png', photo))
+    assert result['features'].shape == (4 * 5, len(feature_names()))
+    assert result['features'].dtype == np.float32
+    assert tuple(result['tile_origins'][6]) == (65, 65)
+    uniform = result['texture_heterogeneity']
+
+    mixed = photo.copy()
+    mixed[:, :161] = cv2.GaussianBlur(mixed[:, :161], (0, 0), 4)
+    mixed_result = extract_texture_descriptors(write_image('mixed.png', mixed))
+    assert mixed_result['texture_heterogeneity'] > 2 * uniform
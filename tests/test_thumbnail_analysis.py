@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+from forensics.thumbnail_analysis import (analyze_thumbnail_consistency, _trim_letterbox,
+                                          MIN_STRUCTURAL_SIMILARITY, MAX_LOCAL_SIMILARITY_DROP)
+from conftest import make_photo, shrink_nearest, shrink_bilinear, shrink_sharpened
+
+SHRINKS = (shrink_nearest, shrink_bilinear, shrink_sharpened)
+
+
+def make_scene(height, width, seed=1):
+    """Photo-like image with structure at thumbnail scale."""
+    return cv2.resize(make_photo(height // 8, width // 8, seed=seed), (width, height),
+                      interpolation=cv2.INTER_CUBIC)
+
+
+def make_night_sky(height, width, seed=0):
+    """Dark sky with a few stars over a lit foreground."""
+    rng = np.random.default_rng(seed)
+    sky = np.zeros((height, width, 3)) + np.linspace(2, 40, height)[:, None, None]
+    sky[rng.integers(0, height, 300), rng.integers(0, width, 300)] = 255
+    sky = cv2.GaussianBlur(sky, (0, 0), 1.0) * 3
+    horizon = int(height * 0.75)
+    sky[horizon:] = make_scene(height, width, seed=9)[horizon:] * 0.6
+    return np.clip(sky + rng.normal(0, 2, sky.shape), 0, 255).astype(np.uint8)
+
+
+def test_untouched_image_matches_thumbnail(write_jpeg_with_thumbnail):
+    result = analyze_thumbnail_consistency(write_jpeg_with_thumbnail('photo.jpg', make_scene(1200, 1600)))
+    assert result['has_thumbnail']
+    assert result['min_local_similarity'] > 0.9
+    assert not result['thumbnail_mismatch']
+
+
+def test_letterboxed_night_sky_is_not_a_mismatch(write_jpeg_with_thumbnail):
+    # 3:2 image in a 4:3 thumbnail: black bars above and below, merging with the dark sky
+    result = analyze_thumbnail_consistency(write_jpeg_with_thumbnail('night.jpg', make_night_sky(1000, 1500)))
+    assert result['aspect_ratio_difference'] < 0.01
+    assert not result['thumbnail_mismatch']
+
+
+def test_dark_content_is_not_trimmed_without_padding():
+    thumb = make_scene(120, 160)[..., ::-1].copy()
+    thumb[:30] = 5  # dark sky, but the thumbnail already has the main image's aspect
+    assert _trim_letterbox(thumb, 160 / 120).shape == thumb.shape
+    # Bars on one side only are not letterbox padding either
+    assert _trim_letterbox(thumb, 1.5).shape == thumb.shape
+
+
+def test_local_edits_are_caught(write_jpeg_with_thumbnail):
+    original = make_scene(1000, 1500)
+
+    inverted = original.copy()
+    inverted[200:800, 450:1050] = 255 - inverted[200:800, 450:1050]
+    result = analyze_thumbnail_consistency(write_jpeg_with_thumbnail('inverted.jpg', inverted, original))
+    assert result['thumbnail_mismatch']
+    assert result['min_local_similarity'] < 0
+
+    pasted = original.copy()
+    pasted[333:483, 500:725] = make_scene(1000, 1500, seed=7)[:150, :225]
+    result = analyze_thumbnail_consistency(write_jpeg_with_thumbnail('pasted.jpg', pasted, original))
+    assert result['structural_similarity'] > MIN_STRUCTURAL_SIMILARITY
+    assert result['thumbnail_mismatch']
+
+
+def test_firmware_resampling_is_not_a_mismatch(write_jpeg_with_thumbnail):
+    images = {'scene': make_scene(1000, 1500), 'photo': make_photo(), 'night': make_night_sky(1000, 1500)}
+    for name, img in images.items():
+        for shrink in SHRINKS:
+            path = write_jpeg_with_thumbnail(f'{name}_{shrink.__name__}.jpg', img, shrink=shrink)
+            result = analyze_thumbnail_consistency(path)
+            assert not result['thumbnail_mismatch'], (name, shrink.__name__, result)
+
+
+def test_local_edits_are_caught_with_sharpened_thumbnails(write_jpeg_with_thumbnail):
+    original = make_photo()
+    pasted = original.copy()
+    pasted[150:260, 200:340] = make_photo(seed=5)[:110, :140]
+    for shrink in SHRINKS:
+        path = write_jpeg_with_thumbnail(f'pasted_{shrink.__name__}.jpg', pasted, original, shrink=shrink)
+        result = analyze_thumbnail_consistency(path)
+        assert result['local_similarity_drop'] > MAX_LOCAL_SIMILARITY_DROP
+        assert result['thumbnail_mismatch']